@@ -0,0 +1,132 @@
+import time
+import queue
+import threading
+from collections import deque
+
+import numpy as np
+
+# --- Ayrı İş Parçacığında Veri Toplama (Üretici / Tüketici) ---
+# Cihaz okuma, arayüzden bağımsız bir toplama iş parçacığında yapılır: iş parçacığı kısa aralıklarla
+# get_latest_data_packet çağırır ve yeni örnek içeren paketleri sınırlı bir kuyruğa koyar (üretici).
+# Arayüz kendi kare hızında drain() ile kuyrukta biriken tüm paketleri alır (tüketici); yavaş bir çizim
+# karesi toplamayı geciktirmez, yalnızca sonraki karede daha fazla paket işlenir.
+# Kuyruk doluysa (arayüz uzun süre tüketmezse) yeni paket atılır ve örnekleri dropped_samples ile sayılır.
+# Ölçümler: kuyruk derinliği (anlık ve en yüksek), atılan örnekler ve örnekten piksele gecikme
+# (paketin toplama iş parçacığında okunduğu andan, onu içeren karenin çizimi bitene kadar).
+# Akış sırasında simülatörün durumunu yalnızca bu iş parçacığı değiştirir; arayüz akışı durdurmadan önce
+# stop() ile iş parçacığının bitmesini bekler.
+# capture verilirse (stream_capture.CaptureWriter) alınan her paket, kuyruk dolu olsa bile, kayıt dosyasına da
+# bu iş parçacığında yazılır; dosya iş parçacığı biterken kapatılır.
+
+DEFAULT_POLL_INTERVAL_SEC = 0.005
+DEFAULT_MAX_QUEUE_PACKETS = 1000
+LATENCY_WINDOW = 1000 # Gecikme yüzdelikleri son bu kadar karenin ölçümünden hesaplanır
+
+
+class AcquisitionMetrics:
+    """Toplama kuyruğu ve örnekten piksele gecikme ölçümleri."""
+
+    def __init__(self):
+        self.acquired_samples = 0
+        self.dropped_samples = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.frames = 0
+        self.frame_latencies = deque(maxlen=LATENCY_WINDOW) # saniye; karedeki en eski örneğin gecikmesi
+
+    def record_frame(self, packets, drawn_at=None):
+        """Çizimi biten karenin gecikmesini, karedeki en eski paketin okunma zamanına göre kaydeder."""
+        if not packets:
+            return
+        drawn_at = drawn_at or time.perf_counter()
+        self.frames += 1
+        self.frame_latencies.append(drawn_at - min(packet["AcquiredAt"] for packet in packets))
+
+    def snapshot(self):
+        latencies = np.asarray(self.frame_latencies) * 1e3
+        return {
+            "acquired_samples": self.acquired_samples,
+            "dropped_samples": self.dropped_samples,
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "frames": self.frames,
+            "latency_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "latency_p95_ms": float(np.percentile(latencies, 95)) if len(latencies) else None,
+            "latency_max_ms": float(latencies.max()) if len(latencies) else None,
+        }
+
+    def summary_text(self):
+        """Durum satırı için kısa özet."""
+        snapshot = self.snapshot()
+        latency = (f"{snapshot['latency_p50_ms']:.0f}/{snapshot['latency_p95_ms']:.0f} ms"
+                   if snapshot["latency_p50_ms"] is not None else "-")
+        return (f"Kuyruk: {snapshot['queue_depth']} (en fazla {snapshot['max_queue_depth']})  "
+                f"Atılan örnek: {snapshot['dropped_samples']}  Örnek→piksel p50/p95: {latency}")
+
+
+class AcquisitionThread:
+    """Simülatörden paketleri ayrı bir iş parçacığında okuyup sınırlı bir kuyruğa koyan üretici."""
+
+    def __init__(self, simulator, poll_interval_sec=DEFAULT_POLL_INTERVAL_SEC,
+                 max_queue_packets=DEFAULT_MAX_QUEUE_PACKETS, capture=None):
+        self.simulator = simulator
+        self.capture = capture
+        self.poll_interval_sec = poll_interval_sec
+        self.metrics = AcquisitionMetrics()
+        self._queue = queue.Queue(maxsize=max_queue_packets)
+        self._stop_event = threading.Event()
+        self.finished_status = None # Akış cihaz tarafında bittiğinde durum mesajı
+        self._thread = threading.Thread(target=self._run, name="acquisition", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """İş parçacığını durdurur ve bitmesini bekler (bundan sonra simülatör güvenle durdurulabilir)."""
+        self._stop_event.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    @property
+    def is_running(self):
+        return self._thread.is_alive()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                packet, status = self.simulator.get_latest_data_packet()
+                if packet is None:
+                    self.finished_status = status
+                    break
+                num_samples = len(packet.get("NewSamples", packet.get("SampleIndices", ())))
+                if num_samples:
+                    packet["AcquiredAt"] = time.perf_counter()
+                    if self.capture is not None:
+                        self.capture.write_packet(packet, packet["AcquiredAt"])
+                    try:
+                        self._queue.put_nowait(packet)
+                        self.metrics.acquired_samples += num_samples
+                    except queue.Full:
+                        self.metrics.dropped_samples += num_samples
+                self._stop_event.wait(self.poll_interval_sec)
+        finally:
+            if self.capture is not None:
+                self.capture.close()
+
+    def drain(self):
+        """
+        Kuyrukta biriken tüm paketleri döndürür (arayüz iş parçacığından, her karede).
+        (paketler, bitiş_durumu) döndürür; bitiş_durumu akış bitmiş ve kuyruk boşalmışsa mesajdır, yoksa None.
+        """
+        depth = self._queue.qsize()
+        self.metrics.queue_depth = depth
+        self.metrics.max_queue_depth = max(self.metrics.max_queue_depth, depth)
+        packets = []
+        while True:
+            try:
+                packets.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        finished = self.finished_status is not None and not self._thread.is_alive() and self._queue.empty()
+        return packets, self.finished_status if finished else None
@@ -1,20 +1,27 @@
+import time
+APP_START_TIME = time.perf_counter() # İlk pencereye kadar geçen süre bu andan itibaren ölçülür
+
 import tkinter as tk
 from tkinter import ttk, messagebox
-import pandas as pd
 import os
-import nltk
-import time
-from collections import deque 
-
-# Grafik çizimi için
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import asyncio
 import numpy as np
 
-# Kendi modüllerimizi içe aktarıyoruz
-import data_handler
-import ml_model_handler
-import bluetooth_simulator
+# Kendi modüllerimizden hafif olanlar (yalnızca numpy/asyncio kullanır)
+import live_plot
+import async_bridge
+import stream_ingest
+import acquisition
+import stream_capture
+
+# Ağır modüller (matplotlib, pandas, scikit-learn ve bunları kullanan modüllerimiz) pencere açıldıktan sonra
+# arka planda yüklenir (bkz. 21. Aşamalı başlangıç fonksiyonları); yüklenene kadar None'dur.
+plt = None
+FigureCanvasTkAgg = None
+data_handler = None
+ml_model_handler = None
+bluetooth_simulator = None
+device_manager = None
 
 # Global değişkenler (Tüm fonksiyonlar tarafından erişilebilir olması için en başta tanımlanır)
 app_widgets = {}
@@ -29,6 +36,37 @@ animation_idx = 0 # Animasyonda o anki veri noktası indeksi
 # Bluetooth Simülatör Instance'ı (Uygulama başlatıldığında create_main_window içinde oluşturulacak)
 bluetooth_sim = None
 live_stream_job_id = None # root.after döngüsünün ID'si
+live_ingestor = None # Canlı akış paketlerini boşlukları doldurarak biriktiren alıcı (stream_ingest)
+live_acquisition = None # Cihazı arayüzden bağımsız okuyan toplama iş parçacığı (acquisition)
+# Canlı akış ekran yenileme aralığı; cihaz örnekleme hızından bağımsızdır (her karede biriken tüm paketler işlenir)
+LIVE_UI_REFRESH_MS = 33
+device_bridge = None # Bluetooth işlemlerini arayüzü bloklamadan yürüten asyncio köprüsü
+
+# Çoklu cihaz (aynı anda birden fazla Locum ünitesi) durumu
+multi_device_manager = None
+multi_device_panels = {} # cihaz adı -> panel widget'ları
+multi_device_job_id = None # Tüm cihaz panellerini güncelleyen tek root.after döngüsünün ID'si
+# Hasta geçmişi tablosu: yalnızca görünen sayfa Treeview'e yüklenir
+HISTORY_PAGE_SIZE = 100
+history_rows = None # Filtreye uyan satır konumları (artan sıralı)
+history_page = 0
+history_item_by_id = {} # Görünen sayfadaki PatientID -> Treeview öğesi
+HISTORY_TREE_COLUMNS = ("PatientID", "FirstName", "LastName", "Age", "Gender", "Diagnosis", "Qmax", "Qave", "Volume", "FlowTime")
+
+MULTI_DEVICE_POLL_MS = 100 # 10 Hz
+MULTI_DEVICE_COLUMNS = 4 # Panel ızgarasındaki sütun sayısı
+DEVICE_CANVAS_WIDTH = 280
+DEVICE_CANVAS_HEIGHT = 110
+
+# Aşamalı başlangıç durumu
+startup_stages_done = set() # Tamamlanan aşamalar: "modules", "data", "models"
+startup_timings = {}        # aşama -> süre (s); "first_window" ilk pencerenin açılma süresidir
+# Her aşama tamamlanana kadar kapalı tutulan düğmeler
+STARTUP_STAGE_WIDGETS = {
+    "modules": ["scan_button", "multi_scan_button"],
+    "data": ["load_patient_button", "history_filter_button", "history_clear_button"],
+    "models": ["analyze_button"],
+}
 
 
 # --- Yardımcı Fonksiyonlar (En Temelden Başlayarak YUKARIDAN aşağıya doğru tanımlanır) ---
@@ -62,6 +100,7 @@ def clear_live_data_fields():
         app_widgets["live_qave_label"].config(text="Anlık Qave: -")
         app_widgets["live_volume_label"].config(text="Anlık Hacim: -")
         app_widgets["live_flow_time_label"].config(text="Anlık Süre: -")
+        app_widgets["live_pipeline_label"].config(text="Kuyruk: -")
     
     # Grafiği de temizle (eğer canlı grafik figürü varsa)
     if "live_chart_figure" in app_widgets: 
@@ -76,6 +115,8 @@ def clear_live_data_fields():
         del app_widgets["live_chart_line"]
         del app_widgets["live_chart_canvas"]
         del app_widgets["live_chart_canvas_widget"]
+        del app_widgets["live_chart_renderer"]
+        del app_widgets["live_time_points"]
 
 # 3. Manuel giriş alanlarının durumunu ayarlama fonksiyonu
 def set_manual_input_state(state):
@@ -86,9 +127,9 @@ def set_manual_input_state(state):
     if "notes_text_widget" in app_widgets:
         app_widgets["notes_text_widget"].config(state=state)
     if "analyze_button" in app_widgets:
-        app_widgets["analyze_button"].config(state=state)
+        app_widgets["analyze_button"].config(state=_gated_state(state, "models"))
     if "load_patient_button" in app_widgets:
-        app_widgets["load_patient_button"].config(state=state)
+        app_widgets["load_patient_button"].config(state=_gated_state(state, "data"))
     if "patient_id_entry" in app_widgets:
         app_widgets["patient_id_entry"].config(state=state)
     
@@ -112,17 +153,29 @@ def on_data_source_change():
 
 # 5. Canlı akış döngüsünü durdurma fonksiyonu (bluetooth simülatörü kullanır)
 def stop_live_stream_loop():
-    """Tkinter after() döngüsünü durdurur."""
-    global live_stream_job_id
+    """
+    Tkinter after() döngüsünü ve toplama iş parçacığını durdurur; alıcıda biriken eğri analiz için listeye kopyalanır.
+    Simülatör durdurulmadan önce çağrılmalıdır (akış sırasında simülatörü yalnızca toplama iş parçacığı kullanır).
+    """
+    global live_stream_job_id, current_flow_curve_data, live_acquisition
     if live_stream_job_id:
         app_widgets["root"].after_cancel(live_stream_job_id)
         live_stream_job_id = None
+    if live_acquisition is not None:
+        live_acquisition.stop()
+        print(f"Canlı akış ölçümleri: {live_acquisition.metrics.snapshot()}")
+        if live_acquisition.capture is not None:
+            print(f"Oturum kaydı: {live_acquisition.capture.path} ({live_acquisition.capture.num_samples} örnek)")
+        live_acquisition = None
+    if live_ingestor is not None and len(live_ingestor.samples):
+        current_flow_curve_data = live_ingestor.samples.tolist()
 
 # 6. Canlı akış eğrisini çizme fonksiyonu (periyodik olarak çağrılır)
 def plot_live_flow_curve(flow_data, flow_time_current):
     """
     Canlı akış verisini matplotlib kullanarak çizer ve Tkinter penceresine gömer.
-    Bu, reset_and_plot_static_curve'dan farklı olarak, her adımda yeniden çizilir.
+    Eksenler akış başında beklenen toplam süreye göre bir kez kurulur; her adımda yalnızca
+    çizgi blit ile yeniden çizilir. Zaman ekseni de bir kez hesaplanır ve dilimlenir.
     """
     # Sadece ilk kez figür oluştur veya temizlendiyse yeniden oluştur
     if "live_chart_figure" not in app_widgets:
@@ -133,9 +186,10 @@ def plot_live_flow_curve(flow_data, flow_time_current):
         ax.set_ylabel("Akış Hızı (ml/s)")
         ax.grid(True)
         # Y ekseni limitini eğrinin toplam maksimumuna göre belirle (eğer biliniyorsa)
-        ax.set_ylim(bottom=0, top=max(bluetooth_sim.flow_curve_data) * 1.2 if bluetooth_sim.flow_curve_data else 5)
+        full_curve = bluetooth_sim.flow_curve_data
+        ax.set_ylim(bottom=0, top=max(full_curve) * 1.2 if full_curve is not None and len(full_curve) else 5)
         # X ekseni limitini toplam beklenen süreye göre belirle
-        ax.set_xlim(0, bluetooth_sim.flow_time_sec * 1.05)
+        ax.set_xlim(0, bluetooth_sim.flow_time_sec * 1.05 if bluetooth_sim.flow_time_sec > 0 else 1)
         
         canvas = FigureCanvasTkAgg(fig, master=app_widgets["chart_frame"])
         canvas_widget = canvas.get_tk_widget()
@@ -146,18 +200,23 @@ def plot_live_flow_curve(flow_data, flow_time_current):
         app_widgets["live_chart_line"], = ax.plot([], [], color='blue', linewidth=2)
         app_widgets["live_chart_canvas"] = canvas
         app_widgets["live_chart_canvas_widget"] = canvas_widget
+        app_widgets["live_chart_renderer"] = live_plot.BlitLineRenderer(canvas, ax, app_widgets["live_chart_line"])
+        # Örnekler arası süre sabit (1 / cihaz örnekleme hızı); zaman ekseni bir kez hesaplanır
+        app_widgets["live_time_points"] = live_plot.sample_time_axis(
+            max(bluetooth_sim.expected_sample_count, 2), live_ingestor.sample_interval)
+        canvas.draw() # Statik arka plan burada bir kez çizilir ve önbelleğe alınır
     
     # Veriyi güncelle
-    ax = app_widgets["live_chart_ax"]
-    line = app_widgets["live_chart_line"]
-    canvas = app_widgets["live_chart_canvas"]
+    renderer = app_widgets["live_chart_renderer"]
+    time_points = app_widgets["live_time_points"]
+    if len(flow_data) > len(time_points): # Beklenenden uzun akış: zaman eksenini iki katına çıkar
+        time_points = live_plot.sample_time_axis(2 * len(flow_data), time_points[1] if len(time_points) > 1 else 0.1)
+        app_widgets["live_time_points"] = time_points
 
-    time_points = np.linspace(0, flow_time_current, len(flow_data))
-    line.set_data(time_points, flow_data)
-    
-    ax.set_xlim(0, flow_time_current * 1.05 if flow_time_current > 0 else bluetooth_sim.flow_time_sec * 1.05)
-
-    canvas.draw_idle()
+    time_points = time_points[:len(flow_data)]
+    if len(time_points):
+        renderer.extend_xlim(time_points[-1])
+    renderer.update(time_points, flow_data)
 
 
 # 7. `reset_and_plot_static_curve` (Statik grafik çizimi, animasyon için kullanılır)
@@ -185,6 +244,8 @@ def reset_and_plot_static_curve():
             del app_widgets["live_chart_line"]
             del app_widgets["live_chart_canvas"]
             del app_widgets["live_chart_canvas_widget"]
+            del app_widgets["live_chart_renderer"]
+            del app_widgets["live_time_points"]
 
 
     if not current_flow_curve_data: # Veri yoksa çizme
@@ -255,6 +316,8 @@ def animate_flow_curve():
             del app_widgets["live_chart_line"]
             del app_widgets["live_chart_canvas"]
             del app_widgets["live_chart_canvas_widget"]
+            del app_widgets["live_chart_renderer"]
+            del app_widgets["live_time_points"]
     
     fig_anim = plt.Figure(figsize=(5, 3), dpi=100)
     ax_anim = fig_anim.add_subplot(111)
@@ -270,7 +333,13 @@ def animate_flow_curve():
     canvas = FigureCanvasTkAgg(fig_anim, master=app_widgets["chart_frame"])
     app_widgets["canvas_widget"] = canvas.get_tk_widget()
     app_widgets["canvas_widget"].pack(fill=tk.BOTH, expand=True)
-    canvas.draw()
+    renderer = live_plot.BlitLineRenderer(canvas, ax_anim, line)
+    canvas.draw() # Statik arka plan bir kez çizilir; karelerde yalnızca çizgi blit edilir
+
+    # Zaman ekseni ve eğri bir kez diziye çevrilir; her karede yalnızca dilimlenir (kopya yok)
+    time_points_full = np.linspace(0, current_flow_time, len(current_flow_curve_data))
+    flow_values = np.asarray(current_flow_curve_data, dtype=float)
+    delay_ms = max(int((current_flow_time / len(current_flow_curve_data)) * 1000), 1)
 
     # Animasyonu güncelleme fonksiyonu
     def update_plot():
@@ -279,16 +348,10 @@ def animate_flow_curve():
         if not animation_running:
             return
 
-        time_points_current_segment = np.linspace(0, current_flow_time, len(current_flow_curve_data))[:animation_idx + 1]
-        
-        line.set_data(time_points_current_segment, current_flow_curve_data[:animation_idx + 1])
-        canvas.draw()
+        renderer.update(time_points_full[:animation_idx + 1], flow_values[:animation_idx + 1])
 
         animation_idx += 1
-        if animation_idx < len(current_flow_curve_data):
-            delay_ms = int((current_flow_time / len(current_flow_curve_data)) * 1000) 
-            if delay_ms == 0: delay_ms = 1
-            
+        if animation_idx < len(flow_values):
             animation_id = app_widgets["root"].after(delay_ms, update_plot)
         else:
             stop_animation(show_message=True)
@@ -304,15 +367,28 @@ def animate_flow_curve():
 
 # 10. Bluetooth Cihaz Tarama fonksiyonu
 def scan_for_devices():
-    """Simüle edilmiş yakındaki Bluetooth cihazlarını tarar ve Combobox'a doldurur."""
+    """
+    Simüle edilmiş yakındaki Bluetooth cihazlarını tarar ve Combobox'a doldurur.
+    Tarama asyncio köprüsünde yürür; arayüz (ve varsa devam eden akış) bu sırada donmaz.
+    """
     app_widgets["bluetooth_status_label"].config(text="Durum: Cihazlar Taranıyor...", foreground="orange")
-    app_widgets["root"].update_idletasks() # UI'ı hemen güncelle
-    
-    # Gerçek Bluetooth taraması burada yapılır
-    nearby_devices = bluetooth_sim.get_simulated_nearby_devices() # bluetooth_simulator'dan gerçek tarama çıktısı alıyor
+    app_widgets["scan_button"].config(state=tk.DISABLED) # Tarama bitene kadar tekrar basılmasın
+    device_bridge.run(bluetooth_sim.scan_devices_async(), on_scan_finished)
+
+def on_scan_finished(nearby_devices, error):
+    """Tarama sonucu geldiğinde (Tk ana iş parçacığında) cihaz listesini günceller."""
+    app_widgets["scan_button"].config(state=tk.NORMAL)
+    if error:
+        app_widgets["bluetooth_status_label"].config(text=f"Durum: Tarama Hatası - {error}", foreground="red")
+        return
+
     device_names = [d["name"] for d in nearby_devices]
     
     app_widgets["device_combobox"]['values'] = device_names
+    if bluetooth_sim.is_connected:
+        # Bağlıyken yapılan tarama yalnızca listeyi yeniler, bağlantı durumunu değiştirmez
+        app_widgets["bluetooth_status_label"].config(text=f"Durum: Bağlı ({bluetooth_sim.connected_device_name}) - {len(device_names)} cihaz bulundu.", foreground="green")
+        return
     if device_names:
         app_widgets["device_combobox"].set(device_names[0]) # İlk cihazı varsayılan seç
         app_widgets["connect_device_button"].config(state=tk.NORMAL) # Bağlan butonunu aktif et
@@ -327,7 +403,7 @@ def scan_for_devices():
 
 # 11. Bluetooth Bağlanma fonksiyonu
 def connect_to_selected_device():
-    """Combobox'tan seçilen cihaza bağlanmayı simüle eder (gerçek bağlantı denemesi)."""
+    """Combobox'tan seçilen cihaza bağlanmayı simüle eder (asyncio köprüsünde, bloklamadan)."""
     selected_device_name = app_widgets["device_combobox"].get()
     if not selected_device_name:
         messagebox.showwarning("Uyarı", "Lütfen bağlanmak için bir cihaz seçin.")
@@ -338,10 +414,14 @@ def connect_to_selected_device():
         return
 
     app_widgets["bluetooth_status_label"].config(text=f"Durum: '{selected_device_name}' bağlanılıyor...", foreground="orange")
-    app_widgets["root"].update_idletasks() # UI'ı hemen güncelle
+    app_widgets["connect_device_button"].config(state=tk.DISABLED) # Bağlantı sürerken tekrar basılmasın
     
-    # bluetooth_simulator.py'deki gerçek bağlantı metodunu çağır
-    success, message = bluetooth_sim.connect_to_device(selected_device_name)
+    # bluetooth_simulator.py'deki asenkron bağlantı metodunu çağır
+    device_bridge.run(bluetooth_sim.connect_async(selected_device_name), on_connect_finished)
+
+def on_connect_finished(result, error):
+    """Bağlantı denemesi bittiğinde (Tk ana iş parçacığında) arayüzü günceller."""
+    success, message = result if result else (False, error)
 
     if success:
         app_widgets["bluetooth_status_label"].config(text=f"Durum: Bağlı ({bluetooth_sim.connected_device_name})", foreground="green")
@@ -349,18 +429,18 @@ def connect_to_selected_device():
         app_widgets["start_stream_button"].config(state=tk.NORMAL) # Akışı başlat butonunu aktif et
         app_widgets["disconnect_button"].config(state=tk.NORMAL) # Bağlantıyı kes butonunu aktif et
         app_widgets["connect_device_button"].config(state=tk.DISABLED) # Bağlanmayı devre dışı bırak
-        app_widgets["scan_button"].config(state=tk.DISABLED) # Taramayı devre dışı bırak
         app_widgets["device_combobox"].config(state=tk.DISABLED) # Combobox'ı da devre dışı bırak
         messagebox.showinfo("Bağlantı Başarılı", message)
     else:
         app_widgets["bluetooth_status_label"].config(text=f"Durum: Bağlantı Hatası - {message}", foreground="red")
         app_widgets["connected_device_label"].config(text="Bağlı Cihaz: Yok")
         app_widgets["start_stream_button"].config(state=tk.DISABLED)
+        app_widgets["connect_device_button"].config(state=tk.NORMAL)
         messagebox.showerror("Bağlantı Hatası", message) # Hata mesajını daha belirgin göster
 
 # 12. Bluetooth Bağlantıyı Kes fonksiyonu
 def disconnect_bluetooth():
-    """Bluetooth cihazından bağlantıyı kesmeyi simüle eder."""
+    """Bluetooth cihazından bağlantıyı kesmeyi simüle eder (asyncio köprüsünde, bloklamadan)."""
     if not bluetooth_sim.is_connected:
         messagebox.showinfo("Bilgi", "Zaten bağlı değilsiniz.")
         return
@@ -368,7 +448,13 @@ def disconnect_bluetooth():
     if bluetooth_sim.is_streaming: # Bağlantı kesmeden önce akışı durdur
         stop_live_stream_from_simulator() # Bu, start_stop_stream_button'ı da günceller
     
-    bluetooth_sim.disconnect()
+    app_widgets["bluetooth_status_label"].config(text="Durum: Bağlantı kesiliyor...", foreground="orange")
+    app_widgets["disconnect_button"].config(state=tk.DISABLED)
+    app_widgets["start_stream_button"].config(state=tk.DISABLED)
+    device_bridge.run(bluetooth_sim.disconnect_async(), on_disconnect_finished)
+
+def on_disconnect_finished(_, error):
+    """Bağlantı kesildiğinde (Tk ana iş parçacığında) arayüzü sıfırlar."""
     app_widgets["bluetooth_status_label"].config(text="Durum: Bağlı Değil", foreground="red")
     app_widgets["connected_device_label"].config(text="Bağlı Cihaz: Yok")
     app_widgets["start_stream_button"].config(state=tk.DISABLED)
@@ -388,7 +474,7 @@ def start_live_stream_from_simulator():
     """
     Simülatörden canlı veri akışını başlatır.
     """
-    global live_stream_job_id, current_flow_curve_data, current_flow_time
+    global live_stream_job_id, current_flow_curve_data, current_flow_time, live_ingestor, live_acquisition
 
     if not bluetooth_sim.is_connected:
         messagebox.showerror("Hata", "Bluetooth cihazına bağlı değilsiniz. Lütfen önce bağlanın.")
@@ -414,7 +500,11 @@ def start_live_stream_from_simulator():
         app_widgets["live_stream_radio"].config(state=tk.DISABLED)
         app_widgets["manual_input_radio"].config(state=tk.DISABLED)
         
-        # Canlı veri akış döngüsünü başlat
+        # Canlı veri akış döngüsünü başlat (eğri, paketlerdeki yeni örneklerle alıcıda biriktirilir)
+        live_ingestor = stream_ingest.SampleIngestor(bluetooth_sim.sample_rate_hz, bluetooth_sim.live_flow_points.capacity)
+        live_acquisition = acquisition.AcquisitionThread(bluetooth_sim, capture=open_live_capture(bluetooth_sim)).start()
+        current_flow_curve_data = []
+        current_flow_time = 0
         get_live_data_loop()
         messagebox.showinfo("Akış Başlatıldı", message)
 
@@ -431,8 +521,8 @@ def stop_live_stream_from_simulator():
     """
     global bluetooth_sim
     if bluetooth_sim.is_streaming:
+        stop_live_stream_loop() # Önce toplama iş parçacığı durur, sonra simülatör
         bluetooth_sim.stop_streaming()
-        stop_live_stream_loop() 
         app_widgets["stream_status_label"].config(text="Akış Durumu: Durduruldu", foreground="red")
         app_widgets["start_stream_button"].config(state=tk.NORMAL)
         app_widgets["stop_stream_button"].config(state=tk.DISABLED)
@@ -462,28 +552,45 @@ def stop_live_stream_from_simulator():
     else:
         messagebox.showinfo("Bilgi", "Akış zaten aktif değil.")
 
+def open_live_capture(simulator, device_name=None):
+    """Canlı oturum için kayıt dosyası açar (stream_capture); açılamazsa uyarı yazar ve None döndürür."""
+    patient_id = (simulator.current_patient_data or {}).get('PatientID')
+    device_name = device_name or simulator.connected_device_name
+    try:
+        return stream_capture.CaptureWriter(stream_capture.capture_path(patient_id, device_name),
+                                            stream_capture.session_metadata(simulator, device_name))
+    except OSError as e:
+        print(f"Uyarı: Oturum kaydı açılamadı ({e}); akış kaydedilmeden sürecek.")
+        return None
+
 # 15. Canlı veri akış döngüsünü çeken fonksiyon
 def get_live_data_loop():
     """
-    Tkinter'ın after() metodu ile periyodik olarak veri paketlerini çeker ve UI'ı günceller.
+    Tkinter'ın after() metodu ile kendi kare hızında çalışır: toplama iş parçacığının kuyruğunda son kareden beri
+    biriken tüm paketleri alır; kayıp örnekler alıcıda interpolasyonla doldurulur. Yeni örnek yoksa ekran güncellenmez.
     """
-    global live_stream_job_id, current_flow_curve_data, current_flow_time
+    global live_stream_job_id, current_flow_time
 
-    packet, status = bluetooth_sim.get_latest_data_packet()
+    packets, status = live_acquisition.drain()
+    new_samples = sum(live_ingestor.ingest(packet) for packet in packets)
 
-    if packet:
+    if status is None and not new_samples:
+        live_stream_job_id = app_widgets["root"].after(LIVE_UI_REFRESH_MS, get_live_data_loop)
+    elif status is None:
+        packet = packets[-1]
         app_widgets["live_flow_rate_label"].config(text=f"Anlık Akış Hızı: {packet['FlowRate']:.2f} ml/s")
         app_widgets["live_qmax_label"].config(text=f"Anlık Qmax: {packet['CurrentQmax']:.2f} ml/s")
         app_widgets["live_qave_label"].config(text=f"Anlık Qave: {packet['CurrentQave']:.2f} ml/s")
         app_widgets["live_volume_label"].config(text=f"Anlık Hacim: {packet['CurrentVolume']:.2f} ml")
         app_widgets["live_flow_time_label"].config(text=f"Geçen Süre: {packet['CurrentFlowTime']:.2f} s")
 
-        current_flow_curve_data = packet['LiveFlowCurve']
         current_flow_time = packet['CurrentFlowTime']
-        
-        plot_live_flow_curve(current_flow_curve_data, current_flow_time)
 
-        live_stream_job_id = app_widgets["root"].after(100, get_live_data_loop)
+        plot_live_flow_curve(live_ingestor.samples.view(), current_flow_time)
+        live_acquisition.metrics.record_frame(packets)
+        app_widgets["live_pipeline_label"].config(text=live_acquisition.metrics.summary_text())
+
+        live_stream_job_id = app_widgets["root"].after(LIVE_UI_REFRESH_MS, get_live_data_loop)
     else:
         app_widgets["stream_status_label"].config(text=f"Akış Durumu: {status}", foreground="red")
         app_widgets["start_stream_button"].config(state=tk.NORMAL)
@@ -543,14 +650,7 @@ def load_patient_data(from_treeview=False):
         app_widgets["notebook"].select(app_widgets["input_tab"]) 
 
         if not from_treeview:
-            app_widgets["patients_tree"].selection_remove(app_widgets["patients_tree"].selection())
-            app_widgets["patients_tree"].selection_remove(app_widgets["patients_tree"].selection())
-            for item_id in app_widgets["patients_tree"].get_children():
-                if app_widgets["patients_tree"].item(item_id, "values")[0] == patient_id:
-                    app_widgets["patients_tree"].selection_add(item_id)
-                    app_widgets["patients_tree"].focus(item_id)
-                    app_widgets["patients_tree"].see(item_id)
-                    break
+            select_patient_in_history(patient_id)
 
     else:
         messagebox.showerror("Hata", f"Hasta bilgileri yüklenemedi: {error}")
@@ -575,12 +675,13 @@ def analyze_data():
     analysis_flow_curve_data = []
 
     if data_source_mode == "live_stream" and len(bluetooth_sim.live_flow_points) > 0:
-        qmax = np.max(list(bluetooth_sim.live_flow_points))
-        qave = np.mean(list(bluetooth_sim.live_flow_points))
-        volume = bluetooth_sim.current_patient_data['Volume'] if bluetooth_sim.current_patient_data else np.trapz(list(bluetooth_sim.live_flow_points), np.linspace(0, bluetooth_sim.flow_time_sec, len(bluetooth_sim.live_flow_points)))
+        live_points = bluetooth_sim.live_flow_points.view() # Kopyasız görünüm
+        qmax = float(np.max(live_points))
+        qave = float(np.mean(live_points))
+        volume = bluetooth_sim.current_patient_data['Volume'] if bluetooth_sim.current_patient_data else np.trapz(live_points, np.linspace(0, bluetooth_sim.flow_time_sec, len(live_points)))
         flow_time = bluetooth_sim.flow_time_sec
         clinical_notes = bluetooth_sim.current_patient_data['ClinicalNotes'] if bluetooth_sim.current_patient_data else ""
-        analysis_flow_curve_data = list(bluetooth_sim.live_flow_points)
+        analysis_flow_curve_data = live_points.tolist()
         
         messagebox.showinfo("Analiz Kaynağı", "Analiz, canlı akıştan gelen son veriler üzerinde yapılıyor.")
 
@@ -649,32 +750,124 @@ def analyze_data():
     messagebox.showinfo("Analiz Tamamlandı", "Veriler başarıyla analiz edildi. Sonuçlar 'Analiz Sonuçları' sekmesinde görüntülenebilir.")
     app_widgets["notebook"].select(app_widgets["results_tab"])
 
-# 18. Hastaları listeleme fonksiyonu
+# 18. Hastaları listeleme fonksiyonları (sayfalı / sanal tablo)
 def populate_patients_treeview():
     """
-    Kayıtlı tüm sentetik hastaları Treeview'e yükler.
+    Hasta Geçmişi tablosunu mevcut filtreyle yeniden kurar.
+    Tüm hastalar yerine yalnızca görünen sayfa (HISTORY_PAGE_SIZE satır) Treeview'e yüklenir.
     """
-    df = data_handler.load_data_from_csv()
+    df = data_handler.load_data_from_csv(archive_mode=True) # Sadece skaler sütunlar; eğriler arşivde kalır
     if df is None:
         messagebox.showerror("Hata", "Hasta verisi yüklenemedi.")
         return
+    apply_history_filter()
 
-    for item in app_widgets["patients_tree"].get_children():
-        app_widgets["patients_tree"].delete(item)
-
-    for index, row in df.iterrows():
-        app_widgets["patients_tree"].insert("", tk.END, values=(
-            row["PatientID"], 
-            row["FirstName"],
-            row["LastName"],
-            row["Age"], 
-            row["Gender"], 
-            row["Diagnosis"],
-            row["Qmax"],
-            row["Qave"],
-            row["Volume"],
-            row["FlowTime"]
-        ))
+def _parse_optional_float(entry_name):
+    """Boş giriş için None, sayı için float döndürür; geçersiz girişte ValueError fırlatır."""
+    text = app_widgets[entry_name].get().strip().replace(",", ".")
+    return float(text) if text else None
+
+def apply_history_filter():
+    """Ad, tanı ve Qmax aralığı filtresini data_handler indeksi üzerinden uygular ve ilk sayfayı gösterir."""
+    global history_rows, history_page
+    try:
+        qmax_min = _parse_optional_float("history_qmax_min_entry")
+        qmax_max = _parse_optional_float("history_qmax_max_entry")
+    except ValueError:
+        messagebox.showerror("Hata", "Qmax aralığı için geçerli sayılar girin.")
+        return
+    diagnosis = app_widgets["history_diagnosis_combobox"].get()
+    rows, error = data_handler.search_patients(
+        name_query=app_widgets["history_name_entry"].get(),
+        diagnosis=None if diagnosis in ("", "Tümü") else diagnosis,
+        qmax_min=qmax_min, qmax_max=qmax_max)
+    if error:
+        messagebox.showerror("Hata", error)
+        return
+    history_rows = rows
+    history_page = 0
+    render_history_page()
+
+def clear_history_filter():
+    """Filtre alanlarını temizler ve tüm hastaları listeler."""
+    for entry_name in ["history_name_entry", "history_qmax_min_entry", "history_qmax_max_entry"]:
+        app_widgets[entry_name].delete(0, tk.END)
+    app_widgets["history_diagnosis_combobox"].set("Tümü")
+    apply_history_filter()
+
+def render_history_page():
+    """
+    Görünen sayfanın satırlarını Treeview'e yazar.
+    Mevcut öğeler silinip yeniden eklenmez; değerleri güncellenir, yalnızca eksik/fazla öğeler eklenir/silinir.
+    """
+    global history_item_by_id
+    tree = app_widgets["patients_tree"]
+    df = data_handler.load_data_from_csv(archive_mode=True)
+    if df is None or history_rows is None:
+        return
+
+    start = history_page * HISTORY_PAGE_SIZE
+    page_rows = history_rows[start:start + HISTORY_PAGE_SIZE]
+    page_values = df.iloc[page_rows][list(HISTORY_TREE_COLUMNS)].itertuples(index=False, name=None)
+
+    tree.selection_remove(tree.selection())
+    items = tree.get_children()
+    history_item_by_id = {}
+    for slot, values in enumerate(page_values):
+        if slot < len(items):
+            item_id = items[slot]
+            tree.item(item_id, values=values)
+        else:
+            item_id = tree.insert("", tk.END, values=values)
+        history_item_by_id.setdefault(values[0], item_id) # Aynı ID tekrar ederse ilk satır seçilir
+    if len(items) > len(page_rows):
+        tree.delete(*items[len(page_rows):])
+    if len(page_rows):
+        tree.see(tree.get_children()[0])
+
+    total = len(history_rows)
+    page_count = max((total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE, 1)
+    app_widgets["history_page_label"].config(
+        text=f"Kayıt {start + 1 if total else 0}-{start + len(page_rows)} / {total}  (Sayfa {history_page + 1}/{page_count})")
+    app_widgets["history_prev_button"].config(state=tk.NORMAL if history_page > 0 else tk.DISABLED)
+    app_widgets["history_next_button"].config(state=tk.NORMAL if history_page < page_count - 1 else tk.DISABLED)
+
+def show_history_page(step):
+    """Önceki (-1) veya sonraki (+1) sayfaya geçer."""
+    global history_page
+    if history_rows is None:
+        return
+    page_count = max((len(history_rows) + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE, 1)
+    new_page = min(max(history_page + step, 0), page_count - 1)
+    if new_page != history_page:
+        history_page = new_page
+        render_history_page()
+
+def select_patient_in_history(patient_id):
+    """
+    Hastayı tabloda seçer: satır konumu indeksten, sayfası ikili aramayla bulunur (tablo taranmaz).
+    Hasta mevcut filtrede yoksa seçim yapılmaz.
+    """
+    global history_page
+    row = data_handler.get_patient_row(patient_id)
+    if row is None or history_rows is None:
+        return False
+    position = int(np.searchsorted(history_rows, row))
+    if position >= len(history_rows) or history_rows[position] != row:
+        return False
+    page = position // HISTORY_PAGE_SIZE
+    if page != history_page:
+        history_page = page
+        render_history_page()
+
+    item_id = history_item_by_id.get(patient_id)
+    if item_id is None:
+        return False
+    tree = app_widgets["patients_tree"]
+    tree.selection_set(item_id)
+    tree.focus(item_id)
+    tree.see(item_id)
+    return True
 
 # 19. Hasta seçimi olayı fonksiyonu
 def on_patient_select(event):
@@ -697,9 +890,285 @@ def on_patient_select(event):
     
     load_patient_data(from_treeview=True) 
 
+# 20. Çoklu cihaz fonksiyonları (her bağlı cihaz için ayrı canlı panel)
+def scan_for_multi_devices():
+    """Çoklu cihaz sekmesi için Uroflow cihazlarını bloklamadan tarar."""
+    app_widgets["multi_status_label"].config(text="Durum: Cihazlar Taranıyor...", foreground="orange")
+    app_widgets["multi_scan_button"].config(state=tk.DISABLED)
+    device_bridge.run(bluetooth_sim.scan_devices_async(), on_multi_scan_finished)
+
+def on_multi_scan_finished(nearby_devices, error):
+    """Tarama sonucundan, henüz bağlı olmayan Uroflow cihazlarını listeler."""
+    app_widgets["multi_scan_button"].config(state=tk.NORMAL)
+    if error:
+        app_widgets["multi_status_label"].config(text=f"Durum: Tarama Hatası - {error}", foreground="red")
+        return
+    device_names = [d["name"] for d in nearby_devices
+                    if d["is_uroflow"] and d["name"] not in multi_device_manager.sessions]
+    app_widgets["multi_device_combobox"]['values'] = device_names
+    app_widgets["multi_device_combobox"].set(device_names[0] if device_names else "")
+    app_widgets["multi_status_label"].config(text=f"Durum: {len(device_names)} yeni Uroflow cihazı bulundu.", foreground="blue")
+
+def connect_multi_device():
+    """Seçilen cihaz için yeni bir oturum açar; bağlantı kurulunca cihazın paneli eklenir."""
+    device_name = app_widgets["multi_device_combobox"].get()
+    if not device_name:
+        messagebox.showwarning("Uyarı", "Lütfen bağlanmak için bir cihaz seçin.")
+        return
+    if device_name in multi_device_manager.sessions:
+        app_widgets["multi_status_label"].config(text=f"Durum: '{device_name}' cihazına zaten bağlısınız.", foreground="blue")
+        return
+    app_widgets["multi_status_label"].config(text=f"Durum: '{device_name}' bağlanılıyor...", foreground="orange")
+    session = multi_device_manager.create_session(device_name)
+    device_bridge.run(multi_device_manager.connect_async(session),
+                      lambda result, error: on_multi_connect_finished(session, result, error))
+
+def on_multi_connect_finished(session, result, error):
+    device_name = session.device_name
+    success, message = result if result else (False, error)
+    if not success:
+        app_widgets["multi_status_label"].config(text=f"Durum: Bağlantı Hatası - {message}", foreground="red")
+        return
+    if device_name in multi_device_manager.sessions: # Bu arada aynı cihaza ikinci bir bağlantı tamamlandıysa
+        device_bridge.run(multi_device_manager.disconnect_async(session), lambda result, error: None)
+    else:
+        multi_device_manager.register_session(session)
+    if device_name not in multi_device_panels:
+        create_device_panel(device_name)
+    values = [name for name in app_widgets["multi_device_combobox"]['values'] if name != device_name]
+    app_widgets["multi_device_combobox"]['values'] = values
+    app_widgets["multi_device_combobox"].set(values[0] if values else "")
+    app_widgets["multi_status_label"].config(text=f"Durum: {len(multi_device_manager.sessions)} cihaz bağlı.", foreground="green")
+
+def create_device_panel(device_name):
+    """Bir cihaz için canlı panel (parametreler, hasta ID'si, küçük eğri ve kontrol düğmeleri) oluşturur."""
+    container = app_widgets["multi_panels_frame"]
+    position = len(multi_device_panels)
+    frame = ttk.LabelFrame(container, text=device_name, padding="5")
+    frame.grid(row=position // MULTI_DEVICE_COLUMNS, column=position % MULTI_DEVICE_COLUMNS, padx=5, pady=5, sticky="nsew")
+
+    # Matplotlib yerine düz Tk Canvas: her karede yalnızca çizginin koordinatları güncellenir
+    canvas = tk.Canvas(frame, width=DEVICE_CANVAS_WIDTH, height=DEVICE_CANVAS_HEIGHT, bg="white", highlightthickness=0)
+    canvas.grid(row=0, column=0, columnspan=3)
+    line_id = canvas.create_line(0, DEVICE_CANVAS_HEIGHT, 0, DEVICE_CANVAS_HEIGHT, fill="blue", width=2)
+
+    metrics_label = ttk.Label(frame, text="Akış: -", justify=tk.LEFT)
+    metrics_label.grid(row=1, column=0, columnspan=3, sticky="w")
+
+    ttk.Label(frame, text="Hasta ID:").grid(row=2, column=0, sticky="w")
+    patient_entry = ttk.Entry(frame, width=12)
+    patient_entry.grid(row=2, column=1, columnspan=2, sticky="w")
+
+    start_button = ttk.Button(frame, text="Başlat", command=lambda: start_device_stream(device_name))
+    start_button.grid(row=3, column=0, pady=3)
+    stop_button = ttk.Button(frame, text="Durdur", state=tk.DISABLED, command=lambda: stop_device_stream(device_name))
+    stop_button.grid(row=3, column=1, pady=3)
+    ttk.Button(frame, text="Kes", command=lambda: disconnect_multi_device(device_name)).grid(row=3, column=2, pady=3)
+
+    multi_device_panels[device_name] = {
+        "frame": frame, "canvas": canvas, "line_id": line_id, "metrics_label": metrics_label,
+        "patient_entry": patient_entry, "start_button": start_button, "stop_button": stop_button,
+        "x_scale": 1.0, "y_scale": 1.0,
+    }
+
+def start_device_stream(device_name):
+    """Paneldeki hasta ID'si ile (boşsa rastgele hasta) cihazda akışı başlatır."""
+    panel = multi_device_panels[device_name]
+    success, message = multi_device_manager.start_stream(device_name, panel["patient_entry"].get().strip())
+    if not success:
+        messagebox.showerror("Akış Hatası", message)
+        return
+
+    # Eksen ölçekleri akış başında bir kez hesaplanır (eğrinin tamamı ve süresi simülatörde bilinir)
+    simulator = multi_device_manager.sessions[device_name].simulator
+    curve_max = max(simulator.flow_curve_data) if len(simulator.flow_curve_data) else 0
+    panel["x_scale"] = DEVICE_CANVAS_WIDTH / max(simulator.expected_sample_count - 1, 1)
+    panel["y_scale"] = (DEVICE_CANVAS_HEIGHT - 5) / (curve_max * 1.2 if curve_max > 0 else 5)
+    panel["canvas"].coords(panel["line_id"], 0, DEVICE_CANVAS_HEIGHT, 0, DEVICE_CANVAS_HEIGHT)
+    panel["frame"].config(text=f"{device_name} - {multi_device_manager.sessions[device_name].patient_id}")
+    panel["start_button"].config(state=tk.DISABLED)
+    panel["stop_button"].config(state=tk.NORMAL)
+    start_multi_device_loop()
+
+def stop_device_stream(device_name):
+    multi_device_manager.stop_stream(device_name)
+    on_device_stream_finished(device_name, "Durduruldu")
+
+def on_device_stream_finished(device_name, status):
+    panel = multi_device_panels.get(device_name)
+    if panel is None:
+        return
+    panel["start_button"].config(state=tk.NORMAL)
+    panel["stop_button"].config(state=tk.DISABLED)
+    panel["metrics_label"].config(text=f"{panel['metrics_label'].cget('text')}\nDurum: {status}")
+
+def disconnect_multi_device(device_name):
+    """Cihazın oturumunu kapatır ve panelini kaldırır."""
+    panel = multi_device_panels.pop(device_name, None)
+    if panel is not None:
+        panel["frame"].destroy()
+        # Kalan panelleri boşluk kalmayacak şekilde yeniden yerleştir
+        for position, other in enumerate(multi_device_panels.values()):
+            other["frame"].grid(row=position // MULTI_DEVICE_COLUMNS, column=position % MULTI_DEVICE_COLUMNS)
+    session = multi_device_manager.remove_session(device_name) # Kayıt dosyası arayüz iş parçacığında kapatılır
+    if session is None:
+        return
+    device_bridge.run(multi_device_manager.disconnect_async(session),
+                      lambda result, error: app_widgets["multi_status_label"].config(
+                          text=f"Durum: {len(multi_device_manager.sessions)} cihaz bağlı.", foreground="green"))
+
+def update_device_panel(device_name, packet):
+    """Bir cihazın panelini son paketle günceller: tek etiket metni ve tek çizgi koordinat listesi."""
+    panel = multi_device_panels.get(device_name)
+    if panel is None:
+        return
+    panel["metrics_label"].config(text=(
+        f"Akış: {packet['FlowRate']:.2f} ml/s  Qmax: {packet['CurrentQmax']:.2f}  Qave: {packet['CurrentQave']:.2f}\n"
+        f"Hacim: {packet['CurrentVolume']:.2f} ml  Süre: {packet['CurrentFlowTime']:.2f} s"))
+
+    flow_points = multi_device_manager.sessions[device_name].flow_points.view() # Kopyasız görünüm
+    if len(flow_points) < 2:
+        return
+    coords = np.empty(2 * len(flow_points))
+    coords[0::2] = np.arange(len(flow_points)) * panel["x_scale"]
+    coords[1::2] = DEVICE_CANVAS_HEIGHT - flow_points * panel["y_scale"]
+    panel["canvas"].coords(panel["line_id"], coords.tolist())
+
+def start_multi_device_loop():
+    """Tüm cihaz panellerini güncelleyen döngüyü (çalışmıyorsa) başlatır."""
+    if multi_device_job_id is None:
+        multi_device_loop()
+
+def multi_device_loop():
+    """
+    Tek bir zamanlayıcı ile tüm cihazlardan paket çeker ve panelleri günceller.
+    Kare süresi ölçülür ve durum satırında gösterilir (hedef: 8+ cihazda 16 ms altı).
+    """
+    global multi_device_job_id
+    frame_start = time.perf_counter()
+
+    updates = multi_device_manager.poll()
+    for device_name, packet in updates.items():
+        if packet:
+            update_device_panel(device_name, packet)
+        else:
+            on_device_stream_finished(device_name, multi_device_manager.sessions[device_name].status)
+
+    frame_ms = (time.perf_counter() - frame_start) * 1000
+    streaming_count = sum(1 for session in multi_device_manager.sessions.values() if session.is_streaming)
+    app_widgets["multi_frame_time_label"].config(text=f"Aktif akış: {streaming_count} | Son kare: {frame_ms:.1f} ms")
+
+    if streaming_count:
+        multi_device_job_id = app_widgets["root"].after(MULTI_DEVICE_POLL_MS, multi_device_loop)
+    else:
+        multi_device_job_id = None
+
+# 21. Aşamalı başlangıç fonksiyonları
+# Pencere, ağır modüller ve modeller yüklenmeden önce açılır. Ardından üç aşama sırayla asyncio köprüsünün
+# iş parçacığında (asyncio.to_thread) yürür; her aşama bitince ilgili düğmeler Tk ana iş parçacığında açılır:
+#   modules: matplotlib ve veri/cihaz modüllerinin içe aktarılması        -> cihaz tarama
+#   data:    veri setinin başlık/sürüm kontrolü (gerekirse yeniden üretim) -> hasta geçmişi ve hasta yükleme
+#   models:  scikit-learn ve modellerin yüklenmesi (yoksa eğitim)          -> analiz
+def _gated_state(state, stage):
+    """Başlangıç aşaması tamamlanmadıysa düğmeyi istenen durumdan bağımsız olarak kapalı tutar."""
+    return state if stage in startup_stages_done else tk.DISABLED
+
+def set_startup_status(text, color="orange"):
+    app_widgets["startup_status_label"].config(text=text, foreground=color)
+
+def on_first_window_shown(event):
+    """Pencere ilk kez ekrana geldiğinde süreç başlangıcından bu yana geçen süreyi ölçer (bir kez)."""
+    if "first_window" in startup_timings:
+        return
+    startup_timings["first_window"] = time.perf_counter() - APP_START_TIME
+    print(f"İlk pencere süresi: {startup_timings['first_window'] * 1000:.0f} ms")
+
+def load_heavy_modules():
+    """(Arka planda) matplotlib ve veri/cihaz modüllerini içe aktarıp bu modülün genel adlarına bağlar."""
+    global plt, FigureCanvasTkAgg, data_handler, bluetooth_simulator, device_manager
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    import data_handler
+    import bluetooth_simulator
+    import device_manager
+
+def prepare_data():
+    """
+    (Arka planda) Veri setini yalnızca başlık/sürüm bilgisiyle doğrular; geçersizse sentetik veriyi yeniden üretir.
+    Ardından hasta tablosunu (skaler sütunlar) önbelleğe yükler. Durum açıklaması döndürür.
+    """
+    is_valid, detail = data_handler.check_data_header()
+    if not is_valid:
+        print(f"Veri seti kullanılamıyor ({detail}) Sentetik veri oluşturuluyor...")
+        simulated_df = data_handler.generate_uroflow_data(num_samples=500)
+        data_handler.save_data_to_csv(simulated_df, filename="simulated_uroflow_data.csv")
+        detail = "Sentetik veri oluşturuldu ve kaydedildi."
+    # Eski formatta bir CSV varsa ikili depoya aktarım da burada (arka planda) yapılır
+    if data_handler.load_data_from_csv(archive_mode=True) is None:
+        raise ValueError("Hasta verisi yüklenemedi.")
+    return detail
+
+def prepare_models():
+    """(Arka planda) scikit-learn'ü ve modelleri yükler; model yoksa eğitir. Durum açıklaması döndürür."""
+    global ml_model_handler
+    import ml_model_handler
+    if ml_model_handler.load_models():
+        return "Modeller yüklendi."
+    print("Makine öğrenmesi modelleri eğitiliyor. Bu işlem biraz zaman alabilir.")
+    if not ml_model_handler.train_and_save_models():
+        raise ValueError("Modeller eğitilemedi.")
+    return "Modeller eğitildi ve kaydedildi."
+
+def run_startup_stage(stage, work, on_ready):
+    """
+    Başlangıç aşamasını arka planda çalıştırır. Bitince aşamanın düğmelerini açar ve
+    on_ready(sonuç) fonksiyonunu Tk ana iş parçacığında çağırır.
+    """
+    stage_start = time.perf_counter()
+
+    def on_done(result, error):
+        if error:
+            set_startup_status(f"Başlatma hatası ({stage}): {error}", "red")
+            messagebox.showerror("Başlatma Hatası", f"Uygulama hazırlanırken hata oluştu: {error}")
+            return
+        startup_timings[stage] = time.perf_counter() - stage_start
+        startup_stages_done.add(stage)
+        for widget_name in STARTUP_STAGE_WIDGETS[stage]:
+            app_widgets[widget_name].config(state=tk.NORMAL)
+        on_data_source_change() # Veri kaynağı moduna bağlı düğmeleri (analiz, hasta yükleme) yeniden ayarla
+        on_ready(result)
+
+    device_bridge.run(asyncio.to_thread(work), on_done)
+
+def start_staged_startup():
+    """Pencere açıldıktan sonra arka plan yükleme aşamalarını sırayla başlatır."""
+    run_startup_stage("modules", load_heavy_modules, on_modules_loaded)
+
+def on_modules_loaded(_):
+    global bluetooth_sim, multi_device_manager
+    bluetooth_sim = bluetooth_simulator.BluetoothUroflowSimulator(send_full_curve=False)
+    multi_device_manager = device_manager.DeviceManager(capture_dir=stream_capture.CAPTURE_DIR)
+    app_widgets["history_diagnosis_combobox"].config(values=["Tümü"] + data_handler.DIAGNOSES)
+    set_startup_status("Hazırlanıyor: veri seti kontrol ediliyor...")
+    run_startup_stage("data", prepare_data, on_data_ready)
+
+def on_data_ready(detail):
+    populate_patients_treeview() # Hasta Geçmişi tablosunu doldur
+    set_startup_status(f"Hazırlanıyor: modeller yükleniyor... (Veri: {detail})")
+    run_startup_stage("models", prepare_models, on_models_ready)
+
+def on_models_ready(detail):
+    timings = " | ".join(f"{name}: {seconds:.2f} sn" for name, seconds in startup_timings.items())
+    set_startup_status(f"Hazır. {detail} ({timings})", "green")
+    print(f"Başlangıç süreleri: {timings}")
+
 # --- Ana Pencere Oluşturma Fonksiyonu (En Sonda ve Diğer Tüm Fonksiyonlar Tanımlandıktan Sonra) ---
 def create_main_window():
-    global app_widgets, bluetooth_sim 
+    """
+    Ana pencereyi ve tüm sekmeleri oluşturur; ağır modüllere ihtiyaç duymaz.
+    Bu modüllere bağlı düğmeler, ilgili başlangıç aşaması tamamlanana kadar kapalıdır. Tk kökünü döndürür.
+    """
+    global app_widgets, device_bridge
 
     root = tk.Tk()
     app_widgets["root"] = root
@@ -707,8 +1176,9 @@ def create_main_window():
     root.state('zoomed')
     root.resizable(True, True)
 
-    # Bluetooth simülatörü objesini oluştur (root objesi oluşturulduktan sonra)
-    bluetooth_sim = bluetooth_simulator.BluetoothUroflowSimulator()
+    # Bluetooth işlemleri ve başlangıç aşamaları için asyncio köprüsü.
+    # Simülatör ve çoklu cihaz yöneticisi, modüller arka planda yüklenince oluşturulur (on_modules_loaded).
+    device_bridge = async_bridge.TkAsyncBridge(root)
 
     # --- İKON EKLEME ---
     icon_path = os.path.join(os.path.dirname(__file__), "app_icon.ico")
@@ -776,6 +1246,10 @@ def create_main_window():
               foreground=[('selected', 'white')])   
 
 
+    # Başlangıç durumu çubuğu (pencerenin en altında)
+    app_widgets["startup_status_label"] = ttk.Label(root, text="Hazırlanıyor: modüller yükleniyor...", foreground="orange")
+    app_widgets["startup_status_label"].pack(side=tk.BOTTOM, fill='x', padx=10, pady=(0, 5))
+
     main_frame = ttk.Frame(root, padding="10")
     main_frame.pack(expand=True, fill='both')
 
@@ -873,6 +1347,9 @@ def create_main_window():
     app_widgets["live_volume_label"].grid(row=1, column=1, sticky="w", padx=5, pady=2)
     app_widgets["live_flow_time_label"] = ttk.Label(live_display_frame, text="Geçen Süre: -")
     app_widgets["live_flow_time_label"].grid(row=2, column=1, sticky="w", padx=5, pady=2)
+    # Toplama hattı ölçümleri: kuyruk derinliği, atılan örnekler, örnekten piksele gecikme
+    app_widgets["live_pipeline_label"] = ttk.Label(live_display_frame, text="Kuyruk: -", foreground="gray")
+    app_widgets["live_pipeline_label"].grid(row=3, column=0, columnspan=2, sticky="w", padx=5, pady=2)
 
 
     # --- Hasta Barkod ID Girişi (row 5) ---
@@ -1005,15 +1482,38 @@ def create_main_window():
     app_widgets["notebook"].add(patients_history_tab, text="Hasta Geçmişi")
 
     patients_history_tab.grid_rowconfigure(0, weight=0) # Başlık
-    patients_history_tab.grid_rowconfigure(1, weight=1) # Treeview (dikeyde genişlesin)
+    patients_history_tab.grid_rowconfigure(1, weight=0) # Arama/filtre satırı
+    patients_history_tab.grid_rowconfigure(2, weight=1) # Treeview (dikeyde genişlesin)
+    patients_history_tab.grid_rowconfigure(3, weight=0) # Sayfa gezinme satırı
     patients_history_tab.grid_columnconfigure(0, weight=1) # Treeview (yatayda genişlesin)
     patients_history_tab.grid_columnconfigure(1, weight=0) # Kaydırma çubuğu sütunu
 
     history_title_label = ttk.Label(patients_history_tab, text="Kayıtlı Hasta Geçmişi", style="Title.TLabel")
     history_title_label.grid(row=0, column=0, columnspan=2, pady=10)
 
-    columns = ("PatientID", "FirstName", "LastName", "Age", "Gender", "Diagnosis", "Qmax", "Qave", "Volume", "FlowTime")
-    app_widgets["patients_tree"] = ttk.Treeview(patients_history_tab, columns=columns, show="headings")
+    history_filter_frame = ttk.Frame(patients_history_tab)
+    history_filter_frame.grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+    ttk.Label(history_filter_frame, text="Ad/Soyad:").pack(side=tk.LEFT, padx=(5, 2))
+    app_widgets["history_name_entry"] = ttk.Entry(history_filter_frame, width=18)
+    app_widgets["history_name_entry"].pack(side=tk.LEFT, padx=2)
+    app_widgets["history_name_entry"].bind("<Return>", lambda event: apply_history_filter())
+    ttk.Label(history_filter_frame, text="Tanı:").pack(side=tk.LEFT, padx=(10, 2))
+    app_widgets["history_diagnosis_combobox"] = ttk.Combobox(history_filter_frame, state="readonly", width=15,
+                                                             values=["Tümü"]) # Tanılar modüller yüklenince eklenir
+    app_widgets["history_diagnosis_combobox"].set("Tümü")
+    app_widgets["history_diagnosis_combobox"].pack(side=tk.LEFT, padx=2)
+    ttk.Label(history_filter_frame, text="Qmax:").pack(side=tk.LEFT, padx=(10, 2))
+    app_widgets["history_qmax_min_entry"] = ttk.Entry(history_filter_frame, width=6)
+    app_widgets["history_qmax_min_entry"].pack(side=tk.LEFT, padx=2)
+    ttk.Label(history_filter_frame, text="-").pack(side=tk.LEFT)
+    app_widgets["history_qmax_max_entry"] = ttk.Entry(history_filter_frame, width=6)
+    app_widgets["history_qmax_max_entry"].pack(side=tk.LEFT, padx=2)
+    app_widgets["history_filter_button"] = ttk.Button(history_filter_frame, text="Filtrele", command=apply_history_filter)
+    app_widgets["history_filter_button"].pack(side=tk.LEFT, padx=(10, 2))
+    app_widgets["history_clear_button"] = ttk.Button(history_filter_frame, text="Temizle", command=clear_history_filter)
+    app_widgets["history_clear_button"].pack(side=tk.LEFT, padx=2)
+
+    app_widgets["patients_tree"] = ttk.Treeview(patients_history_tab, columns=HISTORY_TREE_COLUMNS, show="headings")
     
     app_widgets["patients_tree"].heading("PatientID", text="Hasta ID")
     app_widgets["patients_tree"].heading("FirstName", text="Adı")
@@ -1037,13 +1537,22 @@ def create_main_window():
     app_widgets["patients_tree"].column("Volume", width=70, anchor=tk.CENTER)
     app_widgets["patients_tree"].column("FlowTime", width=70, anchor=tk.CENTER)
 
-    app_widgets["patients_tree"].grid(row=1, column=0, sticky="nsew", padx=5, pady=5)
+    app_widgets["patients_tree"].grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
 
     scrollbar = ttk.Scrollbar(patients_history_tab, orient="vertical", command=app_widgets["patients_tree"].yview)
-    scrollbar.grid(row=1, column=1, sticky="ns")
+    scrollbar.grid(row=2, column=1, sticky="ns")
     app_widgets["patients_tree"].configure(yscrollcommand=scrollbar.set)
 
     app_widgets["patients_tree"].bind("<<TreeviewSelect>>", on_patient_select)
+
+    history_pager_frame = ttk.Frame(patients_history_tab)
+    history_pager_frame.grid(row=3, column=0, columnspan=2, pady=5)
+    app_widgets["history_prev_button"] = ttk.Button(history_pager_frame, text="< Önceki", command=lambda: show_history_page(-1), state=tk.DISABLED)
+    app_widgets["history_prev_button"].pack(side=tk.LEFT, padx=5)
+    app_widgets["history_page_label"] = ttk.Label(history_pager_frame, text="Kayıt 0-0 / 0")
+    app_widgets["history_page_label"].pack(side=tk.LEFT, padx=10)
+    app_widgets["history_next_button"] = ttk.Button(history_pager_frame, text="Sonraki >", command=lambda: show_history_page(1), state=tk.DISABLED)
+    app_widgets["history_next_button"].pack(side=tk.LEFT, padx=5)
     
     # populate_patients_treeview() # Buradan kaldırıldı, en altta çağrılacak
 
@@ -1067,63 +1576,55 @@ def create_main_window():
     export_report_button.grid(row=2, column=0, pady=10)
 
 
-    root.mainloop() # Tkinter olay döngüsünü başlatır
+    # --- 5. Sekme: Çoklu Cihaz ---
+    multi_device_tab = ttk.Frame(app_widgets["notebook"], padding="20")
+    app_widgets["multi_device_tab"] = multi_device_tab
+    app_widgets["notebook"].add(multi_device_tab, text="Çoklu Cihaz")
 
-if __name__ == "__main__":
-    # NLTK veri indirme ve veri/model hazırlığı
-    try:
-        nltk.data.find('corpora/stopwords')
-        nltk.data.find('tokenizers/punkt')
-        nltk.data.find('corpora/wordnet')
-        nltk.data.find('tokenizers/punkt_tab')
-    except LookupError:
-        messagebox.showinfo("NLTK Veri İndirme", "NLTK veri setleri indiriliyor. Bu işlem biraz zaman alabilir.")
-        nltk.download('punkt')
-        nltk.download('stopwords')
-        nltk.download('wordnet')
-        nltk.download('punkt_tab')
-        messagebox.showinfo("NLTK Veri İndirme", "NLTK veri setleri başarıyla indirildi.")
-
-    # Veri dosyasını kontrol et, yoksa oluştur ve kaydet.
-    data_file_path = os.path.join(os.path.dirname(__file__), "simulated_uroflow_data.csv")
-    if not os.path.exists(data_file_path):
-        messagebox.showinfo("Veri Hazırlığı", "Uroflow verisi bulunamadı. Sentetik veri oluşturuluyor...")
-        simulated_df = data_handler.generate_uroflow_data(num_samples=500)
-        data_handler.save_data_to_csv(simulated_df, filename="simulated_uroflow_data.csv")
-        messagebox.showinfo("Veri Hazırlığı", "Sentetik veri başarıyla oluşturuldu ve kaydedildi.")
-    else:
-        try:
-            temp_df = pd.read_csv(data_file_path)
-            required_cols = ["PatientID", "FirstName", "LastName", "FlowCurve"]
-            if not all(col in temp_df.columns for col in required_cols):
-                raise ValueError("CSV dosyası güncel değil veya eksik sütunlar içeriyor.")
-            
-            if "FlowCurve" in temp_df.columns and not temp_df['FlowCurve'].empty:
-                for i in range(min(50, len(temp_df))): # İlk 50 satırı veya daha azını test et
-                    test_val = temp_df['FlowCurve'].iloc[i]
-                    if isinstance(test_val, str) and len(test_val.strip()) > 0:
-                        eval(test_val) # Eval hatası verirse yakalanacak
-            
-        except (pd.errors.EmptyDataError, ValueError, SyntaxError, NameError, IndexError) as e:
-            messagebox.showinfo("Veri Güncelleme", f"Mevcut veri dosyası güncel değil veya bozuk ({e}). Yeniden oluşturuluyor...")
-            simulated_df = data_handler.generate_uroflow_data(num_samples=500)
-            data_handler.save_data_to_csv(simulated_df, filename="simulated_uroflow_data.csv")
-            messagebox.showinfo("Veri Güncelleme", "Sentetik veri başarıyla güncellendi ve kaydedildi.")
+    multi_device_tab.grid_rowconfigure(0, weight=0) # Başlık
+    multi_device_tab.grid_rowconfigure(1, weight=0) # Tarama/Bağlantı satırı
+    multi_device_tab.grid_rowconfigure(2, weight=0) # Durum etiketleri
+    multi_device_tab.grid_rowconfigure(3, weight=1) # Cihaz panelleri
+    multi_device_tab.grid_columnconfigure(0, weight=1)
 
+    multi_title_label = ttk.Label(multi_device_tab, text="Eşzamanlı Cihaz Akışları", style="Title.TLabel")
+    multi_title_label.grid(row=0, column=0, pady=10)
+
+    multi_control_frame = ttk.Frame(multi_device_tab)
+    multi_control_frame.grid(row=1, column=0, sticky="w", pady=5)
+    app_widgets["multi_scan_button"] = ttk.Button(multi_control_frame, text="Cihazları Tara", command=scan_for_multi_devices, style="TButton")
+    app_widgets["multi_scan_button"].pack(side=tk.LEFT, padx=5)
+    app_widgets["multi_device_combobox"] = ttk.Combobox(multi_control_frame, state="readonly", width=30)
+    app_widgets["multi_device_combobox"].pack(side=tk.LEFT, padx=5)
+    ttk.Button(multi_control_frame, text="Bağlan ve Panel Ekle", command=connect_multi_device, style="TButton").pack(side=tk.LEFT, padx=5)
+
+    multi_status_frame = ttk.Frame(multi_device_tab)
+    multi_status_frame.grid(row=2, column=0, sticky="w", pady=5)
+    app_widgets["multi_status_label"] = ttk.Label(multi_status_frame, text="Durum: Cihaz bağlı değil", foreground="red")
+    app_widgets["multi_status_label"].pack(side=tk.LEFT, padx=5)
+    app_widgets["multi_frame_time_label"] = ttk.Label(multi_status_frame, text="Aktif akış: 0 | Son kare: -")
+    app_widgets["multi_frame_time_label"].pack(side=tk.LEFT, padx=20)
+
+    app_widgets["multi_panels_frame"] = ttk.Frame(multi_device_tab)
+    app_widgets["multi_panels_frame"].grid(row=3, column=0, sticky="nsew")
+
+    # Başlangıç aşamalarına bağlı düğmeler, aşamaları tamamlanana kadar kapalı
+    for widget_names in STARTUP_STAGE_WIDGETS.values():
+        for widget_name in widget_names:
+            app_widgets[widget_name].config(state=tk.DISABLED)
+
+    return root
+
+if __name__ == "__main__":
+    # Aşamalı başlangıç: pencere önce oluşturulup gösterilir; ağır modüller, veri seti kontrolü (yalnızca başlık/sürüm)
+    # ve modeller pencere açıldıktan sonra arka planda hazırlanır (bkz. start_staged_startup).
+    # Metin ön işleme yerleşik Türkçe normalleştiriciyi kullanır; NLTK veri seti gerekmez.
+    root = create_main_window() # UI'ı oluştur
 
-    if not ml_model_handler.load_models():
-        messagebox.showinfo("Model Eğitimi", "Makine öğrenmesi modelleri eğitiliyor. Bu işlem biraz zaman alabilir.")
-        ml_model_handler.train_and_save_models()
-        messagebox.showinfo("Model Eğitimi", "Modeller başarıyla eğitildi ve kaydedildi.")
-    
-    # Tüm UI widget'ları create_main_window() içinde oluşturulduktan sonraki başlangıç ayarları.
-    # root.mainloop()'tan hemen önce çağrılmalıdır.
-    
-    create_main_window() # UI'ı oluştur
-    
     # UI oluştuktan sonra radio butonları ve diğer ilk ayarları yap
-    # Bu satırlar, ilgili widget'lar create_main_window içinde oluşturulduktan sonra güvenle çağrılabilir.
     app_widgets["data_source_var"].set("manual_input") # Varsayılan: Manuel Giriş modunu seç
-    on_data_source_change() # UI durumunu bu seçime göre ayarla (manuel girişleri aktif et)
+    on_data_source_change() # UI durumunu bu seçime göre ayarla (analiz/hasta yükleme hazır olana kadar kapalı kalır)
 
-    populate_patients_treeview() # Hasta Geçmişi tablosunu doldur
+    root.bind("<Map>", on_first_window_shown, add="+") # İlk pencere süresini ölç
+    root.after_idle(start_staged_startup) # Olay döngüsü başlayıp pencere çizildikten sonra arka plan yüklemesi
+    root.mainloop() # Tkinter olay döngüsünü başlatır
@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import curve_store
+import data_handler
+import ml_model_handler
+
+# --- Arşivin Toplu Yeniden Puanlanması ---
+# Model yeniden eğitildikten sonra arşivdeki tüm kayıtlar komut satırından yeniden puanlanır.
+# Kayıtlar ardışık satır aralıklarına (parçalara) bölünür ve bir süreç havuzunda puanlanır; her işçi model
+# paketini ve bellek eşlemeli veri setini başlangıçta (initializer) bir kez yükler, ana süreçten yalnızca
+# (başlangıç, bitiş) satır aralığı gönderilir.
+# Sonuçlar parça sırasıyla çıktı CSV'sine akıtılır: PatientID, Diagnosis (arşivdeki), PredictedDiagnosis, P_<sınıf>...
+# Her parçadan sonra '<çıktı>.progress.json' dosyasına bir sonraki satır ve çıktının geçerli bayt uzunluğu
+# atomik olarak yazılır. Kesintiden sonra aynı komut, aynı model paketiyle, çıktıyı bu uzunluğa kırpar ve kaldığı
+# satırdan devam eder; model paketi, veri dosyası, kayıt sayısı veya veri deposu (manifest ve dosya özeti)
+# değiştiyse puanlama baştan başlar.
+
+DEFAULT_CHUNK_SIZE = 5000
+PROGRESS_SUFFIX = ".progress.json"
+
+# İşçi süreçte başlangıçta yüklenen veri seti (FlowCurve sütunu arşive bağlı görünümlerdir)
+_worker_df = None
+
+
+def model_bundle_id(path=None):
+    """Model paketinin içerik özetini döndürür; devam ederken çıktının aynı modelle üretildiği bundan anlaşılır."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path or ml_model_handler.model_bundle_path(), "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def data_id(filename):
+    """
+    Veri deposunun özetini döndürür (manifest + depo dosyalarının boyutu ve değişiklik zamanı); arşiv yeniden
+    üretildiyse veya değiştirildiyse özet de değişir. Depo yoksa None.
+    """
+    _, store_base = data_handler.data_paths(filename)
+    manifest = curve_store.read_manifest(store_base)
+    if manifest is None:
+        return None
+    digest = hashlib.blake2b(json.dumps(manifest, sort_keys=True).encode("utf-8"), digest_size=16)
+    for path in sorted(curve_store.store_paths(store_base).values()):
+        stat = os.stat(path)
+        digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _init_worker(filename):
+    """İşçi süreç başlangıcı: modelleri ve veri setini bir kez yükler."""
+    global _worker_df
+    if not ml_model_handler.load_models():
+        raise RuntimeError("Modeller yüklenemedi.")
+    _worker_df = data_handler.load_data_from_csv(filename)
+    if _worker_df is None:
+        raise RuntimeError(f"'{filename}' verisi yüklenemedi.")
+
+
+def _score_range(start, stop):
+    """İşçi süreçte [start, stop) satırlarını toplu olarak puanlar; sonuç tablosunu CSV metni olarak döndürür."""
+    rows = _worker_df.iloc[start:stop]
+    results, error = ml_model_handler.predict_uroflow_diagnosis_batch(rows)
+    if error:
+        raise RuntimeError(error)
+    scored = rows[["PatientID", "Diagnosis"]].copy()
+    scored["PredictedDiagnosis"] = results["predicted_diagnosis"]
+    for i, label in enumerate(results["classes"]):
+        scored[f"P_{label}"] = results["probabilities"][:, i].round(4)
+    return start, scored.to_csv(index=False, header=start == 0, lineterminator="\n")
+
+
+def _read_progress(progress_path):
+    try:
+        with open(progress_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_progress(progress_path, progress):
+    tmp_path = progress_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, progress_path)
+
+
+def score_archive(output, filename="simulated_uroflow_data.csv", chunk_size=DEFAULT_CHUNK_SIZE, workers=None,
+                  restart=False):
+    """
+    Arşivdeki tüm kayıtları süreç havuzunda puanlar ve sonuçları 'output' CSV dosyasına akıtır.
+    Yarım kalmış bir puanlama (aynı model paketiyle) kaldığı yerden sürdürülür; restart=True baştan başlatır.
+    (puanlanan_kayıt, hata) döndürür.
+    """
+    if chunk_size <= 0:
+        return 0, "Parça boyutu pozitif olmalıdır."
+    if not os.path.exists(ml_model_handler.model_bundle_path()):
+        return 0, "Model paketi bulunamadı. Lütfen önce modelleri eğitin."
+    df = data_handler.load_data_from_csv(filename, archive_mode=True)
+    if df is None:
+        return 0, "Veri seti yüklenemedi."
+    num_records = len(df)
+    del df
+
+    bundle_id = model_bundle_id()
+    data_name = os.path.basename(filename)
+    data_digest = data_id(filename)
+    progress_path = output + PROGRESS_SUFFIX
+    progress = None if restart else _read_progress(progress_path)
+    if progress is not None and (progress.get("model_bundle_id") != bundle_id or progress.get("data") != data_name
+                                 or progress.get("num_records") != num_records
+                                 or progress.get("data_id") != data_digest or not os.path.exists(output)
+                                 or os.path.getsize(output) < progress.get("output_bytes", 0)):
+        print("Önceki puanlama farklı bir model paketi veya veri setiyle yapılmış ya da çıktı dosyası eksik; "
+              "baştan başlanıyor.")
+        progress = None
+    start_row = progress["next_row"] if progress else 0
+    output_bytes = progress["output_bytes"] if progress else 0
+    if start_row >= num_records:
+        print(f"'{output}' zaten tamamlanmış ({num_records} kayıt). Yeniden puanlamak için --restart kullanın.")
+        return 0, None
+
+    plan = [(start, min(start + chunk_size, num_records)) for start in range(start_row, num_records, chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2 # Bellekte bekleyen sonuç sayısını sınırlar
+    if start_row:
+        print(f"Kaldığı yerden devam ediliyor: {start_row}/{num_records} kayıt zaten puanlanmış.")
+    print(f"{num_records - start_row} kayıt, {len(plan)} parça halinde {workers} işçi ile puanlanıyor.")
+
+    start_time = time.perf_counter()
+    scored = 0
+    pending = deque()
+    next_chunk = 0
+    with open(output, "r+b" if output_bytes else "wb") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(filename,)) as executor:
+        out.truncate(output_bytes) # Yarım yazılmış parça varsa atılır
+        out.seek(output_bytes)
+        while next_chunk < len(plan) or pending:
+            while next_chunk < len(plan) and len(pending) < max_pending:
+                pending.append(executor.submit(_score_range, *plan[next_chunk]))
+                next_chunk += 1
+
+            # Parçalar satır sırasıyla yazılır; böylece çıktı işçi sayısından bağımsızdır
+            chunk_start, csv_text = pending.popleft().result()
+            out.write(csv_text.encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+            chunk_stop = min(chunk_start + chunk_size, num_records)
+            scored += chunk_stop - chunk_start
+            _write_progress(progress_path, {"model_bundle_id": bundle_id, "data": data_name, "data_id": data_digest,
+                                            "num_records": num_records, "next_row": chunk_stop,
+                                            "output_bytes": out.tell()})
+
+            elapsed = time.perf_counter() - start_time
+            print(f"  {chunk_stop}/{num_records} kayıt puanlandı ({scored / max(elapsed, 1e-9):.0f} hasta/sn)")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Puanlama tamamlandı: {scored} kayıt, {elapsed:.1f} sn ({scored / max(elapsed, 1e-9):.0f} hasta/sn). "
+          f"Sonuçlar '{output}' dosyasında.")
+    return scored, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arşivdeki kayıtları kayıtlı model paketiyle paralel olarak yeniden puanlar.")
+    parser.add_argument("output", help="Sonuçların yazılacağı CSV dosyası")
+    parser.add_argument("--data", default="simulated_uroflow_data.csv", help="Veri dosyası adı")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Parça başına kayıt sayısı")
+    parser.add_argument("--workers", type=int, default=None, help="İşçi süreç sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument("--restart", action="store_true", help="Önceki ilerlemeyi yok sayıp baştan puanla")
+    args = parser.parse_args()
+
+    _, error = score_archive(args.output, args.data, args.chunk_size, args.workers, args.restart)
+    if error:
+        print(f"Hata: {error}")
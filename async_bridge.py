@@ -0,0 +1,61 @@
+import asyncio
+import queue
+import threading
+
+# --- asyncio <-> Tkinter Köprüsü ---
+# Tkinter kendi olay döngüsünü (mainloop) ana iş parçacığında çalıştırır ve iş parçacığı güvenli değildir.
+# Bu köprü, asyncio olay döngüsünü ayrı bir arka plan iş parçacığında çalıştırır:
+#   - run(coro, on_done) eş yordamı (coroutine) asyncio döngüsüne gönderir ve hemen döner,
+#   - biten işlerin sonuçları bir kuyruğa yazılır,
+#   - Tk tarafı kuyruğu root.after ile periyodik olarak boşaltır ve on_done'ı ana iş parçacığında çağırır.
+# Böylece tarama/bağlantı gibi beklemeli işlemler sırasında arayüz donmaz.
+
+
+class TkAsyncBridge:
+    """Arka planda bir asyncio döngüsü çalıştırır ve sonuçları Tk ana iş parçacığına taşır."""
+
+    def __init__(self, root, poll_interval_ms=20):
+        self.root = root
+        self.poll_interval_ms = poll_interval_ms
+        self._results = queue.Queue()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-bridge", daemon=True)
+        self._thread.start()
+        self._poll_job_id = self.root.after(self.poll_interval_ms, self._poll_results)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def run(self, coro, on_done=None):
+        """
+        Eş yordamı arka plan döngüsünde başlatır; bloklamaz.
+        İş bitince on_done(sonuç, hata) Tk ana iş parçacığında çağrılır (hata yoksa None).
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self._results.put((on_done, f)))
+        return future
+
+    def _poll_results(self):
+        """Biten işlerin geri çağrılarını Tk ana iş parçacığında çalıştırır."""
+        while True:
+            try:
+                on_done, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if future.cancelled():
+                on_done(None, "İşlem iptal edildi.")
+            elif future.exception() is not None:
+                on_done(None, str(future.exception()))
+            else:
+                on_done(future.result(), None)
+        self._poll_job_id = self.root.after(self.poll_interval_ms, self._poll_results)
+
+    def close(self):
+        """Kuyruk taramasını ve asyncio döngüsünü durdurur (pencere kapanırken)."""
+        if self._poll_job_id is not None:
+            self.root.after_cancel(self._poll_job_id)
+            self._poll_job_id = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=1.0)
@@ -1,30 +1,80 @@
 import os
-import pandas as pd
 import numpy as np
 import random
 import time
-from collections import deque # Sınırlı boyutlu liste için
+import asyncio
 
+import clinical_features
+import sample_buffer
+import stream_capture
 import data_handler # data_handler'daki eğri simülasyon fonksiyonlarını buradan çağıracağız
 
+# Simüle edilen Bluetooth işlem gecikmeleri (saniye)
+SCAN_DELAY_SEC = 2.0
+CONNECT_DELAY_SEC = 1.5
+DISCONNECT_DELAY_SEC = 0.5
+
+# Canlı örnek tamponu boyutu: örnekleme hızı x en uzun işeme süresi (bu süreden uzun kayıtlarda en eski
+# örneklerin üzerine yazılır ve tamponun overflow_count sayacı artar)
+DEFAULT_SAMPLE_RATE_HZ = 10.0
+DEFAULT_MAX_VOID_DURATION_SEC = 180.0
+
+# --- Cihaz Zamanlaması ---
+# Cihaz, akış eğrisini sample_rate_hz hızında örnekler; k. örneğin cihaz zaman damgası k / sample_rate_hz'dir.
+# Örnekler gerçek saat ile yayınlanır: k. paket, akış başından (k / hız) x (1 + saat kayması) saniye sonra ve
+# 0..jitter_ms kadar iletim gecikmesiyle alıcıya ulaşır (sıra korunur). drop_probability olasılığıyla paket
+# iletimde kaybolur; cihazın kendi biriktiricileri (Qmax, hacim...) kaybolan örnekleri de içerir.
+# get_latest_data_packet, son çağrıdan beri ulaşmış tüm paketleri tek bir toplu pakette döndürür; böylece
+# alıcının yoklama aralığı cihaz hızından bağımsızdır. realtime=False ise saat beklenmez, her çağrıda bir
+# sonraki varış grubu (canlı akışta genellikle tek örnek) verilir (testler ve hızlı oynatma için).
+# start_replay, kaydedilmiş bir oturumu (stream_capture) aynı yoldan, kayıttaki varış zamanlarıyla yeniden oynatır.
+DEFAULT_JITTER_MS = 0.0
+DEFAULT_DROP_PROBABILITY = 0.0
+DEFAULT_CLOCK_DRIFT_PPM = 0.0
+
 class BluetoothUroflowSimulator:
     """
     Locum cihazından geliyormuş gibi sentetik uroflow verisi akışı simüle eder.
     Bluetooth cihaz tarama ve bağlanma fonksiyonlarını da içerir.
     """
-    def __init__(self, num_points_per_curve=100):
+    def __init__(self, num_points_per_curve=100, send_full_curve=True, sample_rate_hz=DEFAULT_SAMPLE_RATE_HZ,
+                 max_void_duration_sec=DEFAULT_MAX_VOID_DURATION_SEC, jitter_ms=DEFAULT_JITTER_MS,
+                 drop_probability=DEFAULT_DROP_PROBABILITY, clock_drift_ppm=DEFAULT_CLOCK_DRIFT_PPM, realtime=True,
+                 seed=None):
         self.is_connected = False
         self.is_streaming = False
         self.current_patient_data = None # Simüle edilen aktif hastanın verisi
         self.flow_curve_data = None      # Akış eğrisi listesi
         self.num_points_per_curve = num_points_per_curve # Akış eğrisindeki nokta sayısı
-        self.current_point_idx = 0       # Akış eğrisinde o anki indeks
+        self.current_point_idx = 0       # Bir sonraki cihaz örneğinin sıra numarası
         self.flow_time_sec = 0           # Akış süresi (saniye)
         self.stream_start_time = None    # Akışın başlama zamanı
 
+        # Cihaz zamanlaması (bkz. modül başındaki açıklama)
+        self.jitter_ms = jitter_ms
+        self.drop_probability = drop_probability
+        self.clock_drift_ppm = clock_drift_ppm
+        self.realtime = realtime
+        self._rng = np.random.default_rng(seed)
+        self._stream_clock_start = None  # Gerçek zamanlı yayın için perf_counter başlangıcı
+        self._stream_realtime = realtime # Etkin akışın zamanlaması (oynatmada kayda göre seçilir)
+        self.replay_source = None        # Oynatılan kayıt dosyası (canlı akışta None)
+        self._sample_indices = None      # Yayın sırasındaki her örneğin cihaz sıra numarası
+        self._sample_values = None       # Cihazın örneklediği akış hızları (sample_rate_hz ile)
+        self._arrival_times = None       # Her örneğin alıcıya ulaşma zamanı (akış başından saniye)
+        self._delivered = None           # Örnek iletildi mi (False: paket kaybı)
+        self.dropped_packet_count = 0
+
         # Canlı olarak biriken akış hızı verileri
-        # Bu deque, get_latest_data_packet tarafından doldurulur ve app.py tarafından kullanılır.
-        self.live_flow_points = deque(maxlen=self.num_points_per_curve) 
+        # Bu tampon, get_latest_data_packet tarafından doldurulur ve app.py tarafından kullanılır (view() kopyasızdır).
+        self.sample_rate_hz = sample_rate_hz
+        self.max_void_duration_sec = max_void_duration_sec
+        self.live_flow_points = sample_buffer.SampleRingBuffer.for_duration(sample_rate_hz, max_void_duration_sec) 
+
+        # True: her pakette biriken eğrinin tamamı (LiveFlowCurve) gönderilir (eski davranış).
+        # False: pakette yalnızca yeni örnekler (NewSamples) gönderilir; eğriyi alıcı taraf biriktirir.
+        self.send_full_curve = send_full_curve
+        self._reset_live_metrics()
 
         self.connected_device_name = "Yok" # Bağlı cihazın adını tutacak
         
@@ -36,6 +86,11 @@ class BluetoothUroflowSimulator:
             {"name": "Locum Uroflow Klinik", "address": "11:22:33:44:55:66", "is_uroflow": True},
             {"name": "Doktorun Tableti", "address": "77:88:99:AA:BB:CC", "is_uroflow": False},
         ]
+        # Kliniğin ölçüm odalarındaki ek Locum üniteleri (çoklu cihaz akışı için)
+        self.SIMULATED_NEARBY_DEVICES += [
+            {"name": f"Locum Uroflow Oda {i}", "address": f"22:33:44:55:66:{i:02X}", "is_uroflow": True}
+            for i in range(1, 9)
+        ]
 
         print("Bluetooth Uroflow Simülatörü başlatıldı.")
 
@@ -43,11 +98,11 @@ class BluetoothUroflowSimulator:
         """
         Yakındaki Bluetooth cihazlarını taramayı simüle eder.
         Gerçekte bu, Bluetooth API'lerini çağırırdı.
+        Çağıran iş parçacığını bloklar; arayüzden scan_devices_async kullanılmalıdır.
         """
         print("Simülatör: Yakındaki cihazlar taranıyor...")
-        time.sleep(2) # Tarama gecikmesi simülasyonu
-        random.shuffle(self.SIMULATED_NEARBY_DEVICES) # Her seferinde farklı sıralama
-        return self.SIMULATED_NEARBY_DEVICES[:random.randint(3, len(self.SIMULATED_NEARBY_DEVICES))] # Rastgele sayıda cihaz bulmuş gibi yap
+        time.sleep(SCAN_DELAY_SEC) # Tarama gecikmesi simülasyonu
+        return self._scan_result()
 
     def connect_to_device(self, device_name):
         """
@@ -58,8 +113,67 @@ class BluetoothUroflowSimulator:
             return True, "Zaten bağlı."
         
         print(f"Simülatör: '{device_name}' cihazına bağlanılıyor...")
-        time.sleep(1.5) # Bağlantı gecikmesi simülasyonu
+        time.sleep(CONNECT_DELAY_SEC) # Bağlantı gecikmesi simülasyonu
+        return self._complete_connection(device_name)
+
+    def disconnect(self):
+        """Bluetooth cihazından bağlantıyı kesmeyi simüle eder."""
+        if self.is_streaming: # Akış aktifse önce durdur
+            self.stop_streaming()
+        print("Simülatör: Cihazdan bağlantı kesiliyor...")
+        time.sleep(DISCONNECT_DELAY_SEC)
+        self._complete_disconnection()
+
+    # --- asyncio Cihaz Arayüzü ---
+    # Aynı işlemlerin bloklamayan halleri: gecikmeler asyncio.sleep ile beklenir,
+    # böylece bir olay döngüsünde tarama, bağlantı ve akış aynı anda yürüyebilir.
+    async def scan_devices_async(self):
+        """Yakındaki cihazları bloklamadan tarar."""
+        print("Simülatör: Yakındaki cihazlar taranıyor...")
+        await asyncio.sleep(SCAN_DELAY_SEC)
+        return self._scan_result()
+
+    async def connect_async(self, device_name):
+        """Cihaza bloklamadan bağlanır; (başarılı_mı, mesaj) döndürür."""
+        if self.is_connected:
+            print(f"Simülatör: Zaten '{self.connected_device_name}' cihazına bağlısınız.")
+            return True, "Zaten bağlı."
+
+        print(f"Simülatör: '{device_name}' cihazına bağlanılıyor...")
+        await asyncio.sleep(CONNECT_DELAY_SEC)
+        return self._complete_connection(device_name)
+
+    async def disconnect_async(self):
+        """Bağlantıyı bloklamadan keser."""
+        if self.is_streaming:
+            self.stop_streaming()
+        print("Simülatör: Cihazdan bağlantı kesiliyor...")
+        await asyncio.sleep(DISCONNECT_DELAY_SEC)
+        self._complete_disconnection()
 
+    async def stream_async(self, patient_id=None, interval_sec=0.1):
+        """
+        Akışı başlatır ve paketleri asenkron üreteç olarak verir (async for packet in ...).
+        Akış bittiğinde veya durdurulduğunda üreteç sona erer.
+        """
+        success, message = self.start_streaming(patient_id=patient_id)
+        if not success:
+            raise ConnectionError(message)
+        while self.is_streaming:
+            packet, _ = self.get_latest_data_packet()
+            if packet is None:
+                break
+            yield packet
+            await asyncio.sleep(interval_sec)
+
+    def _scan_result(self):
+        """Tarama sonucunu (rastgele sırada, rastgele sayıda cihaz) üretir."""
+        devices = list(self.SIMULATED_NEARBY_DEVICES)
+        random.shuffle(devices) # Her seferinde farklı sıralama
+        return devices[:random.randint(3, len(devices))] # Rastgele sayıda cihaz bulmuş gibi yap
+
+    def _complete_connection(self, device_name):
+        """Bağlantı gecikmesinden sonra cihazı doğrular ve bağlantı durumunu günceller."""
         found_device = next((d for d in self.SIMULATED_NEARBY_DEVICES if d["name"] == device_name), None)
 
         if found_device and found_device["is_uroflow"]:
@@ -74,17 +188,14 @@ class BluetoothUroflowSimulator:
             print(f"Simülatör: '{device_name}' cihazı bulunamadı veya menzilde değil.")
             return False, f"'{device_name}' cihazı bulunamadı."
 
-    def disconnect(self):
-        """Bluetooth cihazından bağlantıyı kesmeyi simüle eder."""
-        if self.is_streaming: # Akış aktifse önce durdur
-            self.stop_streaming()
-        print("Simülatör: Cihazdan bağlantı kesiliyor...")
-        time.sleep(0.5)
+    def _complete_disconnection(self):
+        """Bağlantı durumunu ve akış verilerini sıfırlar."""
         self.is_connected = False
         self.connected_device_name = "Yok"
         self.current_patient_data = None
         self.flow_curve_data = None
         self.live_flow_points.clear()
+        self._reset_live_metrics()
         print("Simülatör: Bağlantı kesildi.")
 
     def start_streaming(self, patient_id=None):
@@ -102,10 +213,9 @@ class BluetoothUroflowSimulator:
             return True, "Akış zaten devam ediyor."
 
         print("Simülatör: Veri akışı başlatılıyor...")
-        self.is_streaming = True
-        self.current_point_idx = 0
-        self.live_flow_points.clear() # Yeni akış için deque'yi temizle
-        self.stream_start_time = time.time()
+        self._begin_stream()
+        self._stream_realtime = self.realtime
+        self.replay_source = None
 
         if patient_id:
             # Belirli bir hasta için geçmiş veriyi yükleyelim
@@ -121,60 +231,187 @@ class BluetoothUroflowSimulator:
         else:
             self._generate_random_patient_for_stream()
 
+        # Klinik özellikler (Qmax'a kadar süre, plato, kesintiler, eğri şekli) örnek geldikçe güncellenir
+        self.live_clinical_features = clinical_features.LiveClinicalFeatures(1.0 / self.sample_rate_hz)
+        self._prepare_sample_schedule()
+        self._stream_clock_start = time.perf_counter() # İlk örnek hasta hazırlandıktan hemen sonra gelir
+
         print(f"Simülatör: Akış başlatıldı. Tahmini süre: {self.flow_time_sec} saniye.")
         return True, "Akış başlatıldı."
 
+    def start_replay(self, capture_path, realtime=True):
+        """
+        Kaydedilmiş bir oturumu get_latest_data_packet üzerinden yeniden oynatır (cihaz bağlantısı gerekmez).
+        realtime=True: örnekler kayıttaki varış zamanlarıyla (1x) gelir; False: her çağrıda kayıttaki bir sonraki
+        paket gelir (olabildiğince hızlı). Cihaz biriktiricileri kayıttaki (alıcıya ulaşmış) örneklerden hesaplanır.
+        """
+        if self.is_streaming:
+            return False, "Akış zaten devam ediyor."
+        capture, error = stream_capture.load_capture(capture_path)
+        if error:
+            return False, error
+        metadata, records = capture["metadata"], capture["records"]
+        if len(records) == 0:
+            return False, "Kayıtta örnek yok."
+
+        sample_rate_hz = float(metadata["device"]["sample_rate_hz"])
+        if sample_rate_hz != self.sample_rate_hz:
+            self.sample_rate_hz = sample_rate_hz
+            self.live_flow_points = sample_buffer.SampleRingBuffer.for_duration(sample_rate_hz, self.max_void_duration_sec)
+        self._begin_stream()
+        self._stream_realtime = realtime
+        self.replay_source = capture_path
+        self.current_patient_data = dict(metadata.get("patient", {}))
+        self.flow_time_sec = float(metadata.get("flow_time_sec", records["index"][-1] / sample_rate_hz))
+        self.flow_curve_data = records["flow"].tolist()
+        self.live_clinical_features = clinical_features.LiveClinicalFeatures(1.0 / sample_rate_hz)
+
+        self._sample_indices = records["index"].astype(np.int64)
+        self._sample_values = records["flow"].astype(float)
+        self._arrival_times = records["arrival"].astype(float)
+        self._delivered = np.ones(len(records), dtype=bool)
+        self.dropped_packet_count = 0
+        self._stream_clock_start = time.perf_counter()
+        print(f"Simülatör: '{os.path.basename(capture_path)}' kaydı oynatılıyor ({len(records)} örnek, "
+              f"{'1x' if realtime else 'en yüksek hız'}).")
+        return True, "Oynatma başlatıldı."
+
+    def _begin_stream(self):
+        """Yeni bir akış (canlı veya oynatma) için durum ve biriktiricileri sıfırlar."""
+        self.is_streaming = True
+        self.current_point_idx = 0
+        self.live_flow_points.clear() # Yeni akış için tamponu temizle
+        self._reset_live_metrics()
+        self.stream_start_time = time.time()
+
     def stop_streaming(self):
         """Veri akışını durdurmayı simüle eder."""
         if self.is_streaming:
             print("Simülatör: Veri akışı durduruluyor.")
             self.is_streaming = False
             print("Simülatör: Veri akışı durduruldu.")
+            if self.live_flow_points.overflow_count:
+                print(f"Simülatör: Uyarı: Kayıt tampon kapasitesini ({self.live_flow_points.capacity} örnek) aştı; "
+                      f"en eski {self.live_flow_points.overflow_count} örnek atıldı.")
             self.live_flow_points.clear() # Akış durunca biriken noktaları temizle
+            self._reset_live_metrics()
             return True
         return False
 
+    @property
+    def expected_sample_count(self):
+        """Akış boyunca cihazın üreteceği örnek sayısı (akış başlamadan 0)."""
+        return 0 if self._sample_indices is None else int(self._sample_indices[-1]) + 1
+
+    def _prepare_sample_schedule(self):
+        """
+        Eğriyi cihaz örnekleme hızına yeniden örnekler; her örneğin alıcıya ulaşma zamanını (saat kayması ve
+        iletim gecikmesiyle) ve iletilip iletilmeyeceğini (paket kaybı) akış başında bir kez belirler.
+        """
+        curve = np.asarray(self.flow_curve_data, dtype=float)
+        num_samples = int(self.flow_time_sec * self.sample_rate_hz) + 1
+        timestamps = np.arange(num_samples) / self.sample_rate_hz
+        self._sample_indices = np.arange(num_samples)
+        # Cihaz örnekleri float32 çözünürlüktedir (kayıt dosyasıyla aynı); oynatma canlı akışla birebir aynı eğriyi verir
+        self._sample_values = np.interp(timestamps, np.linspace(0, self.flow_time_sec, len(curve)), curve
+                                        ).astype(np.float32).astype(float)
+        arrival = timestamps * (1 + self.clock_drift_ppm * 1e-6)
+        if self.jitter_ms > 0:
+            arrival = arrival + self._rng.uniform(0, self.jitter_ms / 1000.0, num_samples)
+        self._arrival_times = np.maximum.accumulate(arrival) # İletim sırası korunur
+        self._delivered = self._rng.random(num_samples) >= self.drop_probability
+        self.dropped_packet_count = 0
+
+    def _reset_live_metrics(self):
+        """Canlı parametre biriktiricilerini sıfırlar (yeni akış başında)."""
+        self._live_volume = 0.0        # Yamuk kuralıyla artımlı hacim
+        self._live_flow_sum = 0.0      # Qave için toplam akış
+        self._live_qmax = 0.0
+        self._live_time_to_qmax = 0.0  # Qmax'a ulaşma süresi
+        self._live_sample_count = 0
+        self._last_flow_rate = None    # Bir önceki örnek (yamuk kuralı için)
+        self._last_elapsed_time = 0.0  # Bir önceki örneğin zamanı
+        self.live_clinical_features = None # Akış başlayınca kurulur (örnek aralığı hastaya bağlı)
+
+    def _update_live_metrics(self, flow_rate, elapsed_time):
+        """
+        Yeni örneği biriktiricilere ekler; her örnek sabit zamanda (O(1)) işlenir.
+        Hacim, yamuk kuralının artımlı halidir (aralık örnek zamanlarından; boşluklar doğrusal köprülenir).
+        """
+        if self._last_flow_rate is not None:
+            dt = elapsed_time - self._last_elapsed_time
+            self._live_volume += 0.5 * (self._last_flow_rate + flow_rate) * dt
+        if self._live_sample_count == 0 or flow_rate > self._live_qmax:
+            self._live_qmax = flow_rate
+            self._live_time_to_qmax = elapsed_time
+        self._live_flow_sum += flow_rate
+        self._live_sample_count += 1
+        self._last_flow_rate = flow_rate
+        self._last_elapsed_time = elapsed_time
+
+    def get_live_clinical_features(self):
+        """Canlı akışın o ana kadarki klinik üroflowmetri özelliklerini döndürür; akış yoksa None."""
+        if self.live_clinical_features is None:
+            return None
+        return self.live_clinical_features.features()
+
     def get_latest_data_packet(self):
         """
-        Akıştan en son veri paketini (bir veya birkaç nokta) simüle eder.
+        Son çağrıdan beri alıcıya ulaşmış tüm örnekleri tek bir toplu pakette döndürür.
+        NewSamples / SampleIndices / SampleTimestamps iletilen örnekleri (sıra numarası ve cihaz zaman damgasıyla)
+        taşır; kaybolan paketler sıra numaralarındaki boşluklardan anlaşılır. Henüz yeni örnek yoksa listeler boştur.
+        Anlık Qmax, Qave, hacim ve Qmax'a ulaşma süresi cihazın biriktiricilerinden okunur;
+        paket maliyeti biriken nokta sayısından bağımsızdır.
         """
         if not self.is_streaming or self.flow_curve_data is None:
             return None, "Akış aktif değil veya veri yok."
 
-        if self.current_point_idx < len(self.flow_curve_data):
-            # Birim zaman diliminde akış hızını al
-            flow_rate_at_point = self.flow_curve_data[self.current_point_idx]
-            
-            # Canlı akış noktalarını biriktir
-            self.live_flow_points.append(flow_rate_at_point)
-
-            # Anlık parametreleri hesaplayalım (birikmiş verilere göre)
-            # Eğer akış süresi 0 ise sıfıra bölme hatasını önle
-            current_flow_time_elapsed = (self.current_point_idx / self.num_points_per_curve) * self.flow_time_sec
-            if len(self.live_flow_points) > 0 and current_flow_time_elapsed > 0:
-                current_volume = np.trapz(list(self.live_flow_points), 
-                                      np.linspace(0, current_flow_time_elapsed, len(self.live_flow_points)))
-            else:
-                current_volume = 0.0 # Hacim yoksa 0
-
-            current_qmax = np.max(list(self.live_flow_points))
-            current_qave = np.mean(list(self.live_flow_points)) if len(self.live_flow_points) > 0 else 0
-            
-            packet = {
-                "FlowRate": flow_rate_at_point,
-                "CurrentQmax": round(current_qmax, 2),
-                "CurrentQave": round(current_qave, 2),
-                "CurrentVolume": round(current_volume, 2),
-                "CurrentFlowTime": round(current_flow_time_elapsed, 2),
-                "LiveFlowCurve": list(self.live_flow_points), # Biriken eğri verisi
-                "PatientID": self.current_patient_data.get('PatientID', 'N/A') # Canlı akış hastasının ID'si
-            }
-            self.current_point_idx += 1
-            return packet, None
-        else:
+        num_samples = len(self._sample_values)
+        if self.current_point_idx >= num_samples:
             self.stop_streaming() # Eğri bittiğinde akışı durdur
             return None, "Akış tamamlandı."
 
+        # first_idx / due_end yayın sırasındaki konumlardır; cihaz sıra numaraları _sample_indices'tedir
+        first_idx = self.current_point_idx
+        if self._stream_realtime:
+            elapsed = time.perf_counter() - self._stream_clock_start
+        else:
+            elapsed = self._arrival_times[first_idx] # Bir sonraki varış grubu beklemeden verilir
+        due_end = max(int(np.searchsorted(self._arrival_times, elapsed, side="right")), first_idx)
+
+        # Cihaz tarafı: kaybolanlar dahil tüm örnekler biriktiricilere işlenir
+        for idx in range(first_idx, due_end):
+            flow_rate = float(self._sample_values[idx])
+            self._update_live_metrics(flow_rate, int(self._sample_indices[idx]) / self.sample_rate_hz)
+            self.live_clinical_features.update(flow_rate)
+        self.live_flow_points.extend(self._sample_values[first_idx:due_end])
+        self.current_point_idx = due_end
+
+        delivered = np.flatnonzero(self._delivered[first_idx:due_end]) + first_idx
+        delivered_indices = self._sample_indices[delivered]
+        self.dropped_packet_count += (due_end - first_idx) - len(delivered)
+        current_qave = self._live_flow_sum / self._live_sample_count if self._live_sample_count else 0.0
+        last_idx = due_end - 1
+
+        packet = {
+            "FlowRate": float(self._sample_values[last_idx]) if last_idx >= 0 else 0.0,
+            "CurrentQmax": round(self._live_qmax, 2),
+            "CurrentQave": round(current_qave, 2),
+            "CurrentVolume": round(self._live_volume, 2),
+            "CurrentFlowTime": round(int(self._sample_indices[last_idx]) / self.sample_rate_hz if last_idx >= 0 else 0.0, 2),
+            "TimeToQmax": round(self._live_time_to_qmax, 2),
+            "SampleIndex": int(delivered_indices[0]) if len(delivered) else int(self._sample_indices[first_idx]), # NewSamples'ın ilk örneğinin sırası
+            "SampleIndices": delivered_indices.tolist(),
+            "SampleTimestamps": (delivered_indices / self.sample_rate_hz).tolist(), # Cihaz saatine göre (s)
+            "SampleRateHz": self.sample_rate_hz,
+            "PatientID": self.current_patient_data.get('PatientID', 'N/A') # Canlı akış hastasının ID'si
+        }
+        if self.send_full_curve:
+            packet["LiveFlowCurve"] = self.live_flow_points.tolist() # Biriken eğri verisi (paket için kopya)
+        else:
+            packet["NewSamples"] = self._sample_values[delivered].tolist() # Yalnızca bu pakette gelen örnekler
+        return packet, None
+
     def _generate_random_patient_for_stream(self):
         """Rastgele yeni bir hasta verisi oluşturur ve akış için hazırlar."""
         df_single_patient = data_handler.generate_uroflow_data(num_samples=1)
@@ -189,26 +426,12 @@ class BluetoothUroflowSimulator:
 if __name__ == "__main__":
     # Bu blok, bluetooth_simulator.py dosyası doğrudan çalıştırıldığında (test amaçlı) çalışır.
     
-    # data_handler.py'yi hiç çalıştırmadıysak veya CSV güncel değilse, burada veriyi oluşturalım.
-    data_file_path = os.path.join(os.path.dirname(__file__), "simulated_uroflow_data.csv")
-    if not os.path.exists(data_file_path):
-        print("simulated_uroflow_data.csv bulunamadı, yeniden oluşturuluyor...")
+    # data_handler.py'yi hiç çalıştırmadıysak veya veri okunamıyorsa, burada veriyi oluşturalım.
+    if data_handler.load_data_from_csv() is None:
+        print("Uroflow verisi bulunamadı veya bozuk, yeniden oluşturuluyor...")
         simulated_df = data_handler.generate_uroflow_data(num_samples=10) # Az örnekle test et
         data_handler.save_data_to_csv(simulated_df)
         print("Sentetik veri oluşturuldu.")
-    else: # Eğer dosya varsa ama yeni PatientID/FirstName/FlowCurve sütunları eksikse yeniden oluştur
-        try:
-            temp_df = pd.read_csv(data_file_path)
-            required_cols = ["PatientID", "FirstName", "FlowCurve"]
-            if not all(col in temp_df.columns for col in required_cols):
-                raise ValueError("CSV dosyası güncel değil veya eksik sütunlar içeriyor.")
-            if "FlowCurve" in temp_df.columns and not temp_df['FlowCurve'].empty and isinstance(temp_df['FlowCurve'].iloc[0], str):
-                eval(temp_df['FlowCurve'].iloc[0]) # Eval hatası kontrolü
-        except (pd.errors.EmptyDataError, ValueError, SyntaxError, NameError, IndexError) as e:
-            print(f"Mevcut veri dosyası güncel değil veya bozuk ({e}), yeniden oluşturuluyor...")
-            simulated_df = data_handler.generate_uroflow_data(num_samples=10)
-            data_handler.save_data_to_csv(simulated_df)
-            print("Sentetik veri yeniden oluşturuldu.")
     
     simulator = BluetoothUroflowSimulator()
     print("\n--- Cihaz Tarama Testi ---")
@@ -0,0 +1,180 @@
+import numpy as np
+
+# --- Klinik Üroflowmetri Özellikleri ---
+# Standart üroflowmetri indeksleri, hem çevrimdışı (eğitimde, (N, T) eğri matrisi üzerinde tek vektörel geçişte)
+# hem de canlı akışta (örnek geldikçe sabit zamanlı güncellemeyle) hesaplanır:
+#   TimeToQmax          : akış başlangıcından Qmax'a kadar geçen süre (s)
+#   VoidingTime         : ilk ve son ölçülebilir akış arasındaki toplam süre, kesintiler dahil (s)
+#   FlowTimeMeasured    : ölçülebilir akışın olduğu toplam süre, kesintiler hariç (s)
+#   FlowToVoidingRatio  : FlowTimeMeasured / VoidingTime (kesintisiz işemede ~1)
+#   PlateauDuration     : akışın Qmax'ın %90'ı ve üzerinde kaldığı süre (s)
+#   Interruptions       : akışın eşik altına düşüp yeniden başladığı kesinti sayısı
+#   PlateauRatio        : PlateauDuration / FlowTimeMeasured (düz/plato eğride yüksek)
+#   RiseFraction        : TimeToQmax / VoidingTime (çan eğride ~0.3-0.5)
+#   FluctuationIndex    : eğrinin toplam değişimi / (2 * Qmax); tek tepeli düzgün eğride ~1, dalgalı eğride büyük
+#   CurveShape          : ICS eğri şekli sınıfı (CURVE_SHAPES)
+
+CLINICAL_FEATURES = ["TimeToQmax", "VoidingTime", "FlowTimeMeasured", "FlowToVoidingRatio", "PlateauDuration",
+                     "Interruptions", "PlateauRatio", "RiseFraction", "FluctuationIndex", "CurveShape"]
+
+# ICS eğri şekli tanımlayıcıları (CurveShape değerleri)
+CURVE_SHAPES = {0: "Çan (Normal)", 1: "Plato", 2: "Kesintili", 3: "Dalgalı"}
+
+# Ölçülebilir akış histerezisle belirlenir: akış FLOW_START_THRESHOLD'u aşınca başlar,
+# FLOW_STOP_THRESHOLD'un altına inince durur. Böylece eşik çevresindeki gürültü sahte kesinti üretmez.
+FLOW_START_THRESHOLD = 2.0   # ml/s
+FLOW_STOP_THRESHOLD = 0.5    # ml/s
+PLATEAU_LEVEL = 0.9          # Qmax'ın bu oranı ve üzeri plato sayılır
+PLATEAU_SHAPE_RATIO = 0.4    # PlateauRatio bunu aşarsa eğri plato şekilli sayılır
+FLUCTUATING_SHAPE_INDEX = 2.0 # FluctuationIndex bunu aşarsa eğri dalgalı sayılır
+
+
+def classify_curve_shape(interruptions, plateau_ratio, fluctuation_index):
+    """Kesinti, plato oranı ve dalgalanma indeksinden ICS eğri şekli kodunu (dizi olarak) üretir."""
+    interruptions = np.asarray(interruptions)
+    return np.select(
+        [interruptions >= 1, np.asarray(fluctuation_index) > FLUCTUATING_SHAPE_INDEX, np.asarray(plateau_ratio) >= PLATEAU_SHAPE_RATIO],
+        [2, 3, 1], default=0)
+
+
+def _ratio(numerator, denominator):
+    """Paydası sıfır olan yerlerde 0 veren güvenli bölme."""
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape), where=denominator > 0)
+
+
+def compute_clinical_features_batch(flow_curves, lengths, sample_intervals,
+                                    start_threshold=FLOW_START_THRESHOLD, stop_threshold=FLOW_STOP_THRESHOLD):
+    """
+    (N, T) eğri matrisi için klinik özellikleri tek vektörel geçişte hesaplar.
+    lengths: her satırın geçerli nokta sayısı (kalan noktalar maskelenir).
+    sample_intervals: her eğrinin örnekler arası süresi (s); skaler de olabilir.
+    (N, len(CLINICAL_FEATURES)) dizi döndürür.
+    """
+    matrix = np.asarray(flow_curves, dtype=np.float64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    num_curves = len(lengths)
+    features = np.zeros((num_curves, len(CLINICAL_FEATURES)))
+    if num_curves == 0 or matrix.ndim != 2 or matrix.shape[1] == 0:
+        return features
+
+    dt = np.broadcast_to(np.asarray(sample_intervals, dtype=np.float64), (num_curves,))
+    num_points = matrix.shape[1]
+    positions = np.arange(num_points)
+    valid = positions < lengths[:, None]
+    masked = np.where(valid, matrix, 0.0)
+
+    qmax = np.where(valid, matrix, -np.inf).max(axis=1)
+    qmax = np.where(lengths > 0, qmax, 0.0)
+    qmax_idx = np.where(valid, matrix, -np.inf).argmax(axis=1)
+
+    # Histerezis: başlama eşiği üstünde +1, durma eşiği altında -1; aradaki noktalar son durumu korur (ileri doldurma)
+    crossing = np.where(matrix > start_threshold, 1, np.where(matrix < stop_threshold, -1, 0))
+    crossing[~valid] = -1
+    last_crossing = np.maximum.accumulate(np.where(crossing != 0, positions, -1), axis=1)
+    flowing = np.take_along_axis(crossing, np.maximum(last_crossing, 0), axis=1) > 0
+    flowing &= last_crossing >= 0
+    any_flow = flowing.any(axis=1)
+    first_flow = np.where(any_flow, flowing.argmax(axis=1), 0)
+    last_flow = np.where(any_flow, num_points - 1 - flowing[:, ::-1].argmax(axis=1), 0)
+
+    time_to_qmax = np.maximum(qmax_idx - first_flow, 0) * dt
+    voiding_time = np.where(any_flow, (last_flow - first_flow) * dt, 0.0)
+    flow_time_measured = np.maximum(flowing.sum(axis=1) - 1, 0) * dt
+
+    # Kesinti: eşik üstü akışın her yeniden başlaması (ilk başlangıç hariç)
+    starts = flowing.copy()
+    starts[:, 1:] &= ~flowing[:, :-1]
+    interruptions = np.maximum(starts.sum(axis=1) - 1, 0)
+
+    plateau_samples = (valid & (matrix >= PLATEAU_LEVEL * qmax[:, None])).sum(axis=1)
+    plateau_duration = np.where(qmax > start_threshold, plateau_samples * dt, 0.0)
+
+    total_variation = np.abs(np.diff(masked, axis=1, prepend=0.0)).sum(axis=1)
+    fluctuation_index = _ratio(total_variation, 2 * qmax)
+
+    plateau_ratio = _ratio(plateau_duration, flow_time_measured)
+    features[:, 0] = time_to_qmax
+    features[:, 1] = voiding_time
+    features[:, 2] = flow_time_measured
+    features[:, 3] = _ratio(flow_time_measured, voiding_time)
+    features[:, 4] = plateau_duration
+    features[:, 5] = interruptions
+    features[:, 6] = plateau_ratio
+    features[:, 7] = _ratio(time_to_qmax, voiding_time)
+    features[:, 8] = fluctuation_index
+    features[:, 9] = classify_curve_shape(interruptions, plateau_ratio, fluctuation_index)
+    return features
+
+
+class LiveClinicalFeatures:
+    """
+    Canlı akışta klinik özellikleri örnek geldikçe günceller; update() sabit zamanlıdır.
+    Plato süresi, Qmax akış sırasında değiştiği için 0.1 ml/s çözünürlüklü bir değer histogramından okunur.
+    Sonuçlar compute_clinical_features_batch ile aynı tanımları kullanır.
+    """
+    HISTOGRAM_BIN = 0.1     # ml/s
+    HISTOGRAM_MAX = 1000.0  # ml/s; üstü son kutuya yazılır
+
+    def __init__(self, sample_interval, start_threshold=FLOW_START_THRESHOLD, stop_threshold=FLOW_STOP_THRESHOLD):
+        self.sample_interval = sample_interval
+        self.start_threshold = start_threshold
+        self.stop_threshold = stop_threshold
+        self._histogram = np.zeros(int(self.HISTOGRAM_MAX / self.HISTOGRAM_BIN) + 1, dtype=np.int64)
+        self.sample_count = 0
+        self.qmax = 0.0
+        self.qmax_idx = 0
+        self.first_flow_idx = None
+        self.last_flow_idx = None
+        self.flowing_samples = 0
+        self.flow_starts = 0
+        self.total_variation = 0.0
+        self._previous_value = 0.0
+        self._previous_flowing = False
+
+    def update(self, flow_rate):
+        """Yeni örneği işler (O(1))."""
+        idx = self.sample_count
+        if idx == 0 or flow_rate > self.qmax:
+            self.qmax = flow_rate
+            self.qmax_idx = idx
+        if flow_rate > self.start_threshold:
+            flowing = True
+        elif flow_rate < self.stop_threshold:
+            flowing = False
+        else:
+            flowing = self._previous_flowing # Histerezis bandında önceki durum korunur
+        if flowing:
+            if self.first_flow_idx is None:
+                self.first_flow_idx = idx
+            self.last_flow_idx = idx
+            self.flowing_samples += 1
+            if not self._previous_flowing:
+                self.flow_starts += 1
+        self.total_variation += abs(flow_rate - self._previous_value)
+        self._histogram[min(int(max(flow_rate, 0.0) / self.HISTOGRAM_BIN), len(self._histogram) - 1)] += 1
+        self._previous_value = flow_rate
+        self._previous_flowing = flowing
+        self.sample_count += 1
+
+    def features(self):
+        """O ana kadarki klinik özellikleri {ad: değer} sözlüğü olarak döndürür."""
+        dt = self.sample_interval
+        first_flow = self.first_flow_idx if self.first_flow_idx is not None else 0
+        time_to_qmax = max(self.qmax_idx - first_flow, 0) * dt
+        voiding_time = (self.last_flow_idx - first_flow) * dt if self.last_flow_idx is not None else 0.0
+        flow_time_measured = max(self.flowing_samples - 1, 0) * dt
+        interruptions = max(self.flow_starts - 1, 0)
+
+        plateau_duration = 0.0
+        if self.qmax > self.start_threshold:
+            plateau_bin = int(PLATEAU_LEVEL * self.qmax / self.HISTOGRAM_BIN)
+            plateau_duration = int(self._histogram[plateau_bin:].sum()) * dt
+
+        plateau_ratio = float(_ratio(plateau_duration, flow_time_measured))
+        fluctuation_index = float(_ratio(self.total_variation, 2 * self.qmax))
+        values = [time_to_qmax, voiding_time, flow_time_measured, float(_ratio(flow_time_measured, voiding_time)),
+                  plateau_duration, interruptions, plateau_ratio, float(_ratio(time_to_qmax, voiding_time)),
+                  fluctuation_index, int(classify_curve_shape(interruptions, plateau_ratio, fluctuation_index))]
+        return dict(zip(CLINICAL_FEATURES, values))
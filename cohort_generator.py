@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import curve_store
+import data_handler
+
+# --- Paralel, Parçalı (Chunked) Kohort Üretimi ---
+# Büyük sentetik veri setleri parçalara bölünür ve bir süreç havuzunda üretilir.
+# Her parçanın seed'i, ana seed'den SeedSequence.spawn ile türetilir; böylece çıktı
+# işçi sayısından bağımsızdır ve aynı seed her zaman aynı veri setini verir.
+# Parça i, PatientID numaralandırmasına i * chunk_size'dan başlar; ID'ler küresel olarak tekildir.
+#
+# İki yazma modu vardır:
+#   depo (varsayılan): parçalar sırayla tek bir eğri deposunun sonuna eklenir (ana süreç yazar).
+#   shard: her işçi kendi parçasını ayrı bir depoya yazar; ana sürece veri taşınmaz.
+# Her iki modda da aynı anda bellekte en fazla (işçi sayısı x 2) parça bulunur.
+
+DEFAULT_CHUNK_SIZE = 50000
+SHARD_INDEX_SUFFIX = ".shards.json"
+
+
+def _chunk_plan(num_samples, chunk_size, seed):
+    """Her parça için (parça_no, id_offset, satır_sayısı, seed_sequence) listesini üretir."""
+    num_chunks = (num_samples + chunk_size - 1) // chunk_size
+    seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    return [(i, i * chunk_size, min(chunk_size, num_samples - i * chunk_size), seeds[i]) for i in range(num_chunks)]
+
+
+def shard_base_path(store_base, chunk_index):
+    """Parça (shard) deposunun temel yolunu döndürür. Örn: 'veri' -> 'veri.part00003'."""
+    return f"{store_base}.part{chunk_index:05d}"
+
+
+def _generate_chunk(chunk_index, id_offset, num_rows, seed_seq, num_points, shard_store_base):
+    """
+    İşçi süreçte bir parçayı üretir.
+    shard_store_base verilmişse parça doğrudan kendi deposuna yazılır ve yalnızca manifest döner;
+    verilmemişse DataFrame ana sürece döndürülür.
+    """
+    df = data_handler.generate_uroflow_data_batch(num_rows, seed=seed_seq, num_points=num_points, id_offset=id_offset)
+    if shard_store_base is None:
+        return chunk_index, df
+    manifest = curve_store.write_curve_store(df, shard_base_path(shard_store_base, chunk_index))
+    return chunk_index, manifest
+
+
+def generate_cohort(num_samples, filename, chunk_size=DEFAULT_CHUNK_SIZE,
+                    seed=0, workers=None, shards=False, num_points=100):
+    """
+    num_samples kayıtlık sentetik kohortu parçalar halinde, paralel olarak üretir ve diske akıtır.
+    Depo modunda veri 'filename' deposuna yazılır (eski içerik silinir); shard modunda her parça
+    ayrı bir depoya yazılır ve parça listesi '<depo>.shards.json' dosyasına kaydedilir.
+    (toplam_kayıt, hata) döndürür.
+    """
+    if num_samples <= 0 or chunk_size <= 0:
+        return 0, "Kayıt sayısı ve parça boyutu pozitif olmalıdır."
+
+    _, store_base = data_handler.data_paths(filename)
+    plan = _chunk_plan(num_samples, chunk_size, seed)
+    workers = workers or os.cpu_count() or 1
+    max_pending = workers * 2 # Bellekteki parça sayısını sınırlar
+    shard_store_base = store_base if shards else None
+
+    print(f"{num_samples} kayıt, {len(plan)} parça halinde {workers} işçi ile üretiliyor "
+          f"({'shard' if shards else 'tek depo'} modu, seed={seed}).")
+    start_time = time.perf_counter()
+    written = 0
+    shard_manifests = []
+    pending = deque()
+    next_chunk = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while next_chunk < len(plan) or pending:
+            while next_chunk < len(plan) and len(pending) < max_pending:
+                chunk_index, id_offset, num_rows, seed_seq = plan[next_chunk]
+                pending.append(executor.submit(_generate_chunk, chunk_index, id_offset, num_rows, seed_seq,
+                                               num_points, shard_store_base))
+                next_chunk += 1
+
+            # Parçalar üretim sırasıyla yazılır; böylece depo içeriği işçi sayısından bağımsızdır
+            chunk_index, result = pending.popleft().result()
+            if shards:
+                shard_manifests.append({"path": os.path.basename(shard_base_path(store_base, chunk_index)),
+                                        "num_records": result["num_records"]})
+                written += result["num_records"]
+            else:
+                if chunk_index == 0:
+                    data_handler.save_data_to_csv(result, filename)
+                else:
+                    data_handler.append_data(result, filename)
+                written += len(result)
+            del result
+
+            elapsed = time.perf_counter() - start_time
+            print(f"  Parça {chunk_index + 1}/{len(plan)} tamamlandı: {written}/{num_samples} kayıt "
+                  f"({written / max(elapsed, 1e-9):.0f} kayıt/sn)")
+
+    if shards:
+        with open(store_base + SHARD_INDEX_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump({"format": curve_store.STORE_FORMAT, "seed": seed, "chunk_size": chunk_size,
+                       "num_records": written, "shards": shard_manifests}, f, ensure_ascii=False, indent=2)
+
+    print(f"Kohort üretimi tamamlandı: {written} kayıt, {time.perf_counter() - start_time:.1f} sn.")
+    return written, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentetik üroflowmetri kohortunu paralel ve parçalı olarak üretir.")
+    parser.add_argument("num_samples", type=int, help="Üretilecek toplam kayıt sayısı")
+    parser.add_argument("--output", required=True,
+                        help="Veri dosyası adı (depo temel adı bundan türetilir; mevcut depo silinir)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Parça başına kayıt sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Ana seed (aynı seed aynı veri setini verir)")
+    parser.add_argument("--workers", type=int, default=None, help="İşçi süreç sayısı (varsayılan: CPU sayısı)")
+    parser.add_argument("--shards", action="store_true", help="Her parçayı ayrı bir depoya yaz")
+    parser.add_argument("--num-points", type=int, default=100, help="Eğri başına nokta sayısı")
+    args = parser.parse_args()
+
+    _, error = generate_cohort(args.num_samples, args.output, args.chunk_size, args.seed,
+                               args.workers, args.shards, args.num_points)
+    if error:
+        print(f"Hata: {error}")
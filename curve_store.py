@@ -0,0 +1,309 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# --- İkili (Binary) Akış Eğrisi Deposu ---
+# Her hastanın FlowCurve verisi tek bir düz float bloğunda art arda saklanır.
+# Hangi eğrinin nerede başlayıp bittiği ayrı bir ofset dizisinde tutulur:
+#   eğri i = curves[offsets[i]:offsets[i + 1]]
+# Sayısal/metinsel sütunlar (PatientID, Qmax, ClinicalNotes, ...) küçük bir CSV tablosunda durur.
+#
+# Dosyalar (base_path = "simulated_uroflow_data" için):
+#   simulated_uroflow_data.meta.csv       -> skaler sütunlar (FlowCurve hariç)
+#   simulated_uroflow_data.curves.npy     -> tüm eğrilerin düz float32 bloğu
+#   simulated_uroflow_data.offsets.npy    -> int64, uzunluk N + 1
+#   simulated_uroflow_data.manifest.json  -> format sürümü ve boyut bilgisi (en son yazılır)
+
+STORE_FORMAT = "uroflow-curve-store"
+STORE_VERSION = 1
+CURVE_DTYPE = np.float32
+CURVE_COLUMN = "FlowCurve"
+
+
+def store_paths(base_path):
+    """Verilen temel yol için deponun dosya yollarını döndürür."""
+    return {
+        "meta": base_path + ".meta.csv",
+        "curves": base_path + ".curves.npy",
+        "offsets": base_path + ".offsets.npy",
+        "manifest": base_path + ".manifest.json",
+    }
+
+
+def read_manifest(base_path):
+    """
+    Deponun manifest dosyasını okur.
+    Dosya yoksa, bozuksa veya sürüm uyuşmuyorsa None döndürür.
+    """
+    manifest_path = store_paths(base_path)["manifest"]
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != STORE_FORMAT or manifest.get("version") != STORE_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(manifest_path, manifest):
+    """Manifesti geçici dosya üzerinden atomik olarak yazar; depo ancak bundan sonra geçerli sayılır."""
+    tmp_manifest_path = manifest_path + ".tmp"
+    with open(tmp_manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_manifest_path, manifest_path)
+
+
+def curve_store_exists(base_path):
+    """Geçerli (tamamlanmış) bir eğri deposu olup olmadığını kontrol eder."""
+    return read_manifest(base_path) is not None
+
+
+def _read_npy_shape(path):
+    """Yalnızca .npy başlığını okuyarak dizinin boyutunu döndürür (veri okunmaz)."""
+    with open(path, "rb") as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, _, _ = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, _, _ = np.lib.format.read_array_header_2_0(f)
+    return shape
+
+
+def check_store_header(base_path, required_columns=()):
+    """
+    Depoyu verinin kendisini okumadan, yalnızca manifest, meta CSV başlık satırı ve .npy başlıklarıyla doğrular.
+    (geçerli_mi, açıklama) döndürür.
+    """
+    manifest = read_manifest(base_path)
+    if manifest is None:
+        return False, "Manifest yok veya sürümü uyumsuz."
+    paths = store_paths(base_path)
+    try:
+        with open(paths["meta"], "r", encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n").split(",")
+        curves_shape = _read_npy_shape(paths["curves"])
+        offsets_shape = _read_npy_shape(paths["offsets"])
+    except (OSError, ValueError) as e:
+        return False, f"Depo dosyaları okunamadı ({e})."
+
+    if header != manifest["meta_columns"]:
+        return False, "Meta tablo başlığı manifestle uyuşmuyor."
+    missing_columns = [col for col in required_columns if col != CURVE_COLUMN and col not in header]
+    if missing_columns:
+        return False, f"Eksik sütunlar: {', '.join(missing_columns)}"
+    if offsets_shape != (manifest["num_records"] + 1,) or curves_shape != (manifest["num_samples"],):
+        return False, "Eğri/ofset boyutları manifestle uyuşmuyor."
+    return True, f"{manifest['num_records']} kayıt (format sürümü {manifest['version']})."
+
+
+def pack_flow_curves(flow_curves, dtype=CURVE_DTYPE):
+    """
+    Eğri listesini (liste, dizi veya 2B matris) düz bir bloğa ve ofset dizisine çevirir.
+    """
+    if isinstance(flow_curves, np.ndarray) and flow_curves.ndim == 2:
+        # Eşit uzunluklu eğriler: kopyasız düzleştirme
+        num_curves, num_points = flow_curves.shape
+        offsets = np.arange(num_curves + 1, dtype=np.int64) * num_points
+        return np.ascontiguousarray(flow_curves, dtype=dtype).reshape(-1), offsets
+
+    arrays = [np.asarray(c if c is not None else [], dtype=dtype).reshape(-1) for c in flow_curves]
+    lengths = np.fromiter((len(a) for a in arrays), dtype=np.int64, count=len(arrays))
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    curves = np.concatenate(arrays) if arrays else np.empty(0, dtype=dtype)
+    return curves, offsets
+
+
+def split_flow_curves(curves, offsets):
+    """Düz bloğu, her hasta için bir görünüm (view) olacak şekilde böler; veri kopyalanmaz."""
+    if len(offsets) <= 1:
+        return []
+    return np.split(curves, offsets[1:-1])
+
+
+def write_curve_store(dataframe, base_path, dtype=CURVE_DTYPE):
+    """
+    DataFrame'i ikili eğri deposuna yazar.
+    FlowCurve sütunu düz bloğa, diğer sütunlar meta CSV tablosuna gider.
+    """
+    paths = store_paths(base_path)
+
+    # Yazma yarıda kalırsa eski manifest yeni (eksik) dosyaları geçerli göstermesin
+    if os.path.exists(paths["manifest"]):
+        os.remove(paths["manifest"])
+
+    curves, offsets = pack_flow_curves(dataframe[CURVE_COLUMN].tolist(), dtype=dtype)
+    meta_df = dataframe.drop(columns=[CURVE_COLUMN])
+
+    meta_df.to_csv(paths["meta"], index=False)
+    np.save(paths["curves"], curves)
+    np.save(paths["offsets"], offsets)
+
+    manifest = {
+        "format": STORE_FORMAT,
+        "version": STORE_VERSION,
+        "dtype": np.dtype(dtype).name,
+        "num_records": int(len(meta_df)),
+        "num_samples": int(offsets[-1]),
+        "meta_columns": list(meta_df.columns),
+    }
+    _write_manifest(paths["manifest"], manifest)
+    return manifest
+
+
+def _rewrite_npy_shape(f, shape):
+    """
+    Açık bir .npy dosyasının başlığındaki 'shape' bilgisini yerinde günceller.
+    NumPy başlığı büyüme payı bırakarak doldurduğu için çoğu durumda sığar; sığmazsa False döner.
+    """
+    f.seek(0)
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        _, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        len_size = 2
+    else:
+        _, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        len_size = 4
+    data_start = f.tell()
+
+    header = repr({"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": fortran_order, "shape": tuple(shape)})
+    available = data_start - 8 - len_size # 6 bayt magic + 2 bayt sürüm + başlık uzunluğu alanı
+    if len(header) + 1 > available:
+        return False
+    f.seek(8 + len_size)
+    f.write((header.ljust(available - 1) + "\n").encode("latin1"))
+    return True
+
+
+def _append_to_npy(path, values):
+    """1B bir .npy dosyasının sonuna veri ekler; mevcut veri yeniden yazılmaz."""
+    existing = np.load(path, mmap_mode="r")
+    new_shape = (existing.shape[0] + len(values),)
+    values = np.ascontiguousarray(values, dtype=existing.dtype)
+    del existing # Eşlemeyi bırak
+
+    with open(path, "r+b") as f:
+        if _rewrite_npy_shape(f, new_shape):
+            f.seek(0, os.SEEK_END)
+            f.write(values.tobytes())
+            return
+    # Başlıkta yer kalmadıysa tüm diziyi yeniden yaz (nadir durum)
+    np.save(path, np.concatenate([np.load(path), values]))
+
+
+def append_to_curve_store(dataframe, base_path):
+    """
+    Mevcut depoya yeni satırlar ekler. Eğri bloğu ve meta tablo yalnızca sona doğru büyür;
+    manifest en son güncellenir. Depo yoksa sıfırdan oluşturulur.
+    """
+    manifest = read_manifest(base_path)
+    if manifest is None:
+        return write_curve_store(dataframe, base_path)
+
+    paths = store_paths(base_path)
+    dtype = np.dtype(manifest["dtype"])
+    curves, offsets = pack_flow_curves(dataframe[CURVE_COLUMN].tolist(), dtype=dtype)
+    offsets = offsets[1:] + manifest["num_samples"] # İlk ofset (0) depoda zaten var
+    meta_df = dataframe.drop(columns=[CURVE_COLUMN])[manifest["meta_columns"]]
+
+    os.remove(paths["manifest"]) # Ekleme yarıda kalırsa depo geçersiz sayılsın
+    meta_df.to_csv(paths["meta"], mode="a", header=False, index=False)
+    _append_to_npy(paths["curves"], curves)
+    _append_to_npy(paths["offsets"], offsets)
+
+    manifest["num_records"] += int(len(meta_df))
+    manifest["num_samples"] = int(offsets[-1]) if len(offsets) else manifest["num_samples"]
+    _write_manifest(paths["manifest"], manifest)
+    return manifest
+
+
+def read_curve_store(base_path, mmap_mode=None):
+    """
+    Eğri deposunu okur ve (meta_df, curves, offsets) üçlüsünü döndürür.
+    Depo yoksa veya geçersizse None döndürür.
+    """
+    manifest = read_manifest(base_path)
+    if manifest is None:
+        return None
+
+    paths = store_paths(base_path)
+    meta_df = pd.read_csv(paths["meta"])
+    curves = np.load(paths["curves"], mmap_mode=mmap_mode)
+    offsets = np.load(paths["offsets"])
+
+    if len(offsets) != len(meta_df) + 1 or int(offsets[-1]) != len(curves):
+        print(f"Uyarı: '{base_path}' eğri deposu tutarsız (ofset/meta boyutu uyuşmuyor).")
+        return None
+    return meta_df, curves, offsets
+
+
+class CurveArchive:
+    """
+    Bellek eşlemeli (memory-mapped) eğri arşivi.
+    Eğri bloğu diskte kalır; yalnızca istenen hastanın eğrisi okunur ve RAM'e alınır.
+    Ofset dizisi küçük olduğu için (kayıt başına 8 bayt) bellekte tutulur.
+    """
+    def __init__(self, curves, offsets):
+        self.curves = curves     # np.memmap (veya normal ndarray)
+        self.offsets = offsets
+
+    @classmethod
+    def open(cls, base_path):
+        """Depoyu arşiv modunda açar: (meta_df, CurveArchive) döndürür, depo yoksa None."""
+        stored = read_curve_store(base_path, mmap_mode="r")
+        if stored is None:
+            return None
+        meta_df, curves, offsets = stored
+        return meta_df, cls(curves, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def get_curve(self, row):
+        """Verilen satırın eğrisini diskten okur ve bağımsız bir kopya olarak döndürür."""
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return np.array(self.curves[start:end])
+
+    def curve_views(self):
+        """Tüm eğriler için diske bağlı görünümler; sayfalar ancak okununca belleğe gelir."""
+        return split_flow_curves(self.curves, self.offsets)
+
+
+# --- Eski CSV Formatından Geçiş (Migration) ---
+def parse_legacy_flow_curve(text):
+    """
+    Eski CSV'deki FlowCurve metnini ('[np.float64(0.1), np.float64(0.2), ...]' veya '[0.1, 0.2]')
+    eval() kullanmadan float dizisine çevirir.
+    """
+    if not isinstance(text, str):
+        return np.empty(0, dtype=np.float64)
+    inner = text.replace("np.float64(", "").replace(")", "").strip().strip("[]")
+    if not inner.strip():
+        return np.empty(0, dtype=np.float64)
+    return np.array(inner.split(","), dtype=np.float64)
+
+
+def migrate_csv_to_curve_store(csv_path, base_path, dtype=CURVE_DTYPE):
+    """
+    Eski (FlowCurve'ü metin olarak tutan) CSV dosyasını tek seferlik olarak ikili depoya çevirir.
+    Orijinal CSV dosyasına dokunulmaz.
+    """
+    df = pd.read_csv(csv_path)
+    if CURVE_COLUMN not in df.columns:
+        raise ValueError(f"'{csv_path}' dosyasında {CURVE_COLUMN} sütunu yok.")
+    df[CURVE_COLUMN] = [parse_legacy_flow_curve(x) for x in df[CURVE_COLUMN]]
+    manifest = write_curve_store(df, base_path, dtype=dtype)
+    print(f"'{os.path.basename(csv_path)}' ikili eğri deposuna aktarıldı "
+          f"({manifest['num_records']} kayıt, {manifest['num_samples']} nokta).")
+    return manifest
+
+
+if __name__ == "__main__":
+    # Komut satırından tek seferlik geçiş: python curve_store.py [eski.csv]
+    import sys
+    legacy_csv = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), "simulated_uroflow_data.csv")
+    migrate_csv_to_curve_store(legacy_csv, os.path.splitext(legacy_csv)[0])
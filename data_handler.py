@@ -3,6 +3,8 @@ import numpy as np
 import random
 import os
 
+import curve_store
+
 # --- Akış Eğrisi Simülasyon Fonksiyonları ---
 def generate_normal_flow_curve(volume, flow_time, num_points=100):
     """Normal, çan şekilli bir akış eğrisi simüle eder."""
@@ -104,30 +106,57 @@ def generate_dysfunctional_flow_curve(volume, flow_time, num_points=100):
 
 
 # --- Ana Veri Üretme Fonksiyonu ---
+# Tanı sınıfları, isim listeleri ve klinik not şablonları (tekli ve toplu üretici ortak kullanır)
+DIAGNOSES = ["Normal", "Obstrüktif", "Disfonksiyonel"]
+GENDERS = ["Erkek", "Kadın"]
+FIRST_NAMES_MALE = ["Ahmet", "Mehmet", "Ali", "Can", "Burak", "Emre", "Deniz"]
+FIRST_NAMES_FEMALE = ["Ayşe", "Fatma", "Zeynep", "Elif", "Deniz", "Aslı", "Gamze"]
+LAST_NAMES = ["Yılmaz", "Demir", "Çelik", "Şahin", "Koç", "Can", "Arslan"]
+
+# Tanıya göre hacim (ml) ve akış süresi (s) aralıkları (alt ve üst sınır dahil)
+VOLUME_RANGES = {"Normal": (200, 500), "Obstrüktif": (150, 450), "Disfonksiyonel": (100, 400)}
+FLOW_TIME_RANGES = {"Normal": (15, 35), "Obstrüktif": (30, 80), "Disfonksiyonel": (20, 70)}
+
+CLINICAL_NOTE_TEMPLATES = {
+    "Normal": [
+        "Şikayeti yok. Normal işeme paterni.",
+        "Periyodik kontrol. Akış iyi.",
+        "Mesane boşaltımı tam.",
+        "Belirgin bir sorun yok."
+    ],
+    "Obstrüktif": [
+        "İşemede zorlanma var. Akış zayıf.",
+        "Gece sık idrara çıkma. Sabahları zorlanıyor.",
+        "Tamamen boşaltamama hissi. Kesik kesik işeme.",
+        "Prostat büyümesi şüphesi. Ikınarak işeme."
+    ],
+    "Disfonksiyonel": [
+        "Mesane kaslarında istemsiz kasılma. Ani işeme isteği.",
+        "İdrar tutamama epizodları. Sıkışma hissi.",
+        "İşeme sırasında ağrı veya yanma. Yetersiz boşaltım.",
+        "Nörolojik durumlar mevcut. Mesane kaslarında zayıflık."
+    ],
+}
+
+DATA_COLUMNS = ["PatientID", "FirstName", "LastName", "Age", "Gender", "PatientInfo", "Qmax", "Qave", "Volume", "FlowTime", "ClinicalNotes", "FlowCurve", "Diagnosis"]
+
 def generate_uroflow_data(num_samples=100):
     """
     Sentetik uroflow parametreleri, klinik notlar, akış eğrileri ve hasta bilgileri üretir.
     """
     data = []
-    diagnoses = ["Normal", "Obstrüktif", "Disfonksiyonel"]
-    
-    genders = ["Erkek", "Kadın"]
-    
-    first_names_male = ["Ahmet", "Mehmet", "Ali", "Can", "Burak", "Emre", "Deniz"]
-    first_names_female = ["Ayşe", "Fatma", "Zeynep", "Elif", "Deniz", "Aslı", "Gamze"]
-    last_names = ["Yılmaz", "Demir", "Çelik", "Şahin", "Koç", "Can", "Arslan"]
     
     for i in range(num_samples):
-        diagnosis = random.choice(diagnoses)
+        diagnosis = random.choice(DIAGNOSES)
         
         # Yeni eklenen hasta bilgileri
         patient_id = f"PID{i+1:04d}" # Örn: PID0001, PID0002
         age = random.randint(20, 80)
-        gender = random.choice(genders)
+        gender = random.choice(GENDERS)
 
         # İsim ve Soyisim seçimi
-        first_name = random.choice(first_names_male if gender == "Erkek" else first_names_female)
-        last_name = random.choice(last_names)
+        first_name = random.choice(FIRST_NAMES_MALE if gender == "Erkek" else FIRST_NAMES_FEMALE)
+        last_name = random.choice(LAST_NAMES)
         full_name = f"{first_name} {last_name}"
         
         patient_info_text = f"Hasta Adı: {full_name} | Yaş: {age} | Cinsiyet: {gender}"
@@ -138,39 +167,16 @@ def generate_uroflow_data(num_samples=100):
 
 
         qmax, qave, volume, flow_time, notes, flow_curve = 0, 0, 0, 0, "", []
+        volume = random.randint(*VOLUME_RANGES[diagnosis])
+        flow_time = random.randint(*FLOW_TIME_RANGES[diagnosis])
         
         if diagnosis == "Normal":
-            volume = random.randint(200, 500)
-            flow_time = random.randint(15, 35)
             flow_curve = generate_normal_flow_curve(volume, flow_time)
-            notes = random.choice([
-                "Şikayeti yok. Normal işeme paterni.",
-                "Periyodik kontrol. Akış iyi.",
-                "Mesane boşaltımı tam.",
-                "Belirgin bir sorun yok."
-            ])
-
         elif diagnosis == "Obstrüktif":
-            volume = random.randint(150, 450)
-            flow_time = random.randint(30, 80)
             flow_curve = generate_obstructive_flow_curve(volume, flow_time)
-            notes = random.choice([
-                "İşemede zorlanma var. Akış zayıf.",
-                "Gece sık idrara çıkma. Sabahları zorlanıyor.",
-                "Tamamen boşaltamama hissi. Kesik kesik işeme.",
-                "Prostat büyümesi şüphesi. Ikınarak işeme."
-            ])
-
         elif diagnosis == "Disfonksiyonel":
-            volume = random.randint(100, 400)
-            flow_time = random.randint(20, 70)
             flow_curve = generate_dysfunctional_flow_curve(volume, flow_time)
-            notes = random.choice([
-                "Mesane kaslarında istemsiz kasılma. Ani işeme isteği.",
-                "İdrar tutamama epizodları. Sıkışma hissi.",
-                "İşeme sırasında ağrı veya yanma. Yetersiz boşaltım.",
-                "Nörolojik durumlar mevcut. Mesane kaslarında zayıflık."
-            ])
+        notes = random.choice(CLINICAL_NOTE_TEMPLATES[diagnosis])
         
         flow_curve_arr = np.array(flow_curve)
         qmax = round(np.max(flow_curve_arr), 2)
@@ -178,74 +184,475 @@ def generate_uroflow_data(num_samples=100):
 
         data.append([patient_id, first_name, last_name, age, gender, patient_info_text, qmax, qave, volume, flow_time, notes, flow_curve, diagnosis])
 
-    df = pd.DataFrame(data, columns=["PatientID", "FirstName", "LastName", "Age", "Gender", "PatientInfo", "Qmax", "Qave", "Volume", "FlowTime", "ClinicalNotes", "FlowCurve", "Diagnosis"])
+    df = pd.DataFrame(data, columns=DATA_COLUMNS)
     return df
 
+
+# --- Vektörize Toplu (Batch) Veri Üretimi ---
+# Aşağıdaki fonksiyonlar, yukarıdaki tekli eğri üreticileriyle aynı modeli izler;
+# ancak bir tanı sınıfının tüm eğrilerini tek bir (N, num_points) NumPy matrisi olarak üretir.
+# Tüm rastgelelik tek bir np.random.Generator'dan gelir, böylece aynı seed aynı veriyi verir.
+# Hesaplar float32 yapılır (eğri deposu da float32 saklar); bu, gürültü üretimini ve exp'i belirgin hızlandırır.
+BATCH_DTYPE = np.float32
+
+def _trapz_rows(flow_rate, dt):
+    """Eşit aralıklı örnekler için satır bazında yamuk (trapez) integrali; dt satır başına (N,) dizisidir."""
+    return (flow_rate.sum(axis=1) - 0.5 * (flow_rate[:, 0] + flow_rate[:, -1])) * dt
+
+def _finalize_curves(flow_rate, rng, noise_std):
+    """Gürültü ekler, negatifleri sıfırlar ve eğrinin başını/sonunu sıfıra çeker (yerinde)."""
+    noise = rng.standard_normal(flow_rate.shape, dtype=BATCH_DTYPE)
+    noise *= BATCH_DTYPE(noise_std)
+    flow_rate += noise
+    np.maximum(flow_rate, 0, out=flow_rate)
+    flow_rate[:, 0] = 0.0
+    flow_rate[:, -1] = 0.0
+    return flow_rate
+
+def _batch_bell_flow_curves(rng, volume, flow_time, num_points, peak_range, std_range, gain_range, fade_gain_range, noise_std):
+    """Normal ve obstrüktif eğrilerin ortak (çan şekilli) toplu üreticisi."""
+    n = len(volume)
+    unit = np.linspace(0, 1, num_points, dtype=BATCH_DTYPE)
+    t = flow_time.astype(BATCH_DTYPE)[:, None] * unit
+
+    peak_time = (flow_time * rng.uniform(*peak_range, n)).astype(BATCH_DTYPE)
+    inv_two_var = (1.0 / (2 * (flow_time * rng.uniform(*std_range, n))**2)).astype(BATCH_DTYPE)
+    flow_rate = t - peak_time[:, None]
+    flow_rate *= flow_rate
+    flow_rate *= -inv_two_var[:, None]
+    np.exp(flow_rate, out=flow_rate)
+
+    scaling_factor = volume / (_trapz_rows(flow_rate, flow_time / (num_points - 1)) + 1e-9)
+    gain = scaling_factor * rng.uniform(*fade_gain_range, n)
+    if gain_range is not None:
+        gain *= rng.uniform(*gain_range, n)
+
+    fade_in_out = np.sin(np.linspace(0, np.pi, num_points)).astype(BATCH_DTYPE)
+    flow_rate *= gain.astype(BATCH_DTYPE)[:, None]
+    flow_rate *= fade_in_out
+    return _finalize_curves(flow_rate, rng, noise_std)
+
+def generate_normal_flow_curves(rng, volume, flow_time, num_points=100):
+    """generate_normal_flow_curve'ün toplu hali: (N, num_points) matris döndürür."""
+    return _batch_bell_flow_curves(rng, volume, flow_time, num_points,
+                                   peak_range=(0.4, 0.6), std_range=(0.15, 0.25),
+                                   gain_range=None, fade_gain_range=(0.8, 1.2), noise_std=0.5)
+
+def generate_obstructive_flow_curves(rng, volume, flow_time, num_points=100):
+    """generate_obstructive_flow_curve'ün toplu hali: (N, num_points) matris döndürür."""
+    return _batch_bell_flow_curves(rng, volume, flow_time, num_points,
+                                   peak_range=(0.5, 0.8), std_range=(0.25, 0.4),
+                                   gain_range=(0.4, 0.8), fade_gain_range=(0.9, 1.1), noise_std=0.3)
+
+def generate_dysfunctional_flow_curves(rng, volume, flow_time, num_points=100):
+    """
+    generate_dysfunctional_flow_curve'ün toplu hali: (N, num_points) matris döndürür.
+    Segment döngüsü en fazla 4 adımdır; her adımda tüm hastalar maskelerle birlikte işlenir.
+    Segmentler kısa olduğundan (en fazla ~%15 nokta) eğri yalnızca segment boyu kadar bir ızgarada hesaplanıp
+    yerine yazılır; tam (N, num_points) matris üzerinde işlem yapılmaz.
+    """
+    n = len(volume)
+    rows = np.arange(n)
+    dt = flow_time / (num_points - 1) # t = linspace(0, flow_time, num_points) adımı
+    # Düz (N * num_points + 1) tampon: son eleman, yazılmaması gereken noktaların atıldığı çöp hücresidir
+    flow_flat = np.zeros(n * num_points + 1, dtype=BATCH_DTYPE)
+    discard_idx = n * num_points
+
+    num_segments = rng.integers(2, 5, n)
+    current_time_pos = np.zeros(n)
+    remaining_volume = volume.astype(float)
+
+    for i in range(num_segments.max()):
+        active = (i < num_segments) & (remaining_volume > 0)
+
+        # Segment başına beş rastgele oran tek çağrıda çekilir: süre, boşluk, hacim payı, tepe konumu, genişlik
+        u = rng.random((5, n))
+        segment_duration = (0.1 + 0.2 * u[0]) * flow_time / num_segments
+        gap_duration = (0.05 + 0.05 * u[1]) * flow_time / num_segments
+        current_time_pos = np.where(active, current_time_pos + gap_duration, current_time_pos)
+
+        segment_volume = remaining_volume * (0.3 + 0.4 * u[2])
+        segment_volume = np.where(i == num_segments - 1, remaining_volume, segment_volume)
+
+        peak_time_in_segment = segment_duration * (0.4 + 0.2 * u[3])
+        std_dev_segment = segment_duration * (0.1 + 0.1 * u[4])
+
+        segment_len = (num_points * segment_duration / flow_time).astype(int)
+        active &= segment_len > 0 # Tekli üreticideki 'continue' ile aynı
+        max_len = segment_len[active].max() if active.any() else 0
+        if max_len == 0:
+            continue
+
+        # Segment içi zaman: linspace(0, segment_duration, segment_len), (N, max_len) ızgarada
+        local_idx = np.arange(max_len)
+        in_segment = local_idx < segment_len[:, None]
+        step = np.where(segment_len > 1, segment_duration / np.maximum(segment_len - 1, 1), 0.0)
+        segment_flow = local_idx.astype(BATCH_DTYPE) * step.astype(BATCH_DTYPE)[:, None]
+        segment_flow -= peak_time_in_segment.astype(BATCH_DTYPE)[:, None]
+        segment_flow *= segment_flow
+        segment_flow *= (-1.0 / (2 * std_dev_segment**2)).astype(BATCH_DTYPE)[:, None]
+        np.exp(segment_flow, out=segment_flow)
+        segment_flow *= in_segment
+
+        # Segment alanı (yamuk kuralı), yalnızca segment uzunluğu kadar nokta üzerinden
+        last_point = segment_flow[rows, np.clip(segment_len - 1, 0, max_len - 1)]
+        segment_area = (segment_flow.sum(axis=1, dtype=np.float64) - 0.5 * (segment_flow[:, 0] + last_point)) * step
+        segment_gain = np.where(segment_area > 0, segment_volume / np.where(segment_area > 0, segment_area, 1.0), 0.0)
+        segment_flow *= segment_gain.astype(BATCH_DTYPE)[:, None]
+
+        # t >= current_time_pos olan ilk indeksten itibaren yerleştir; sona taşan kısım kesilir
+        start_idx = np.ceil(current_time_pos / dt).astype(np.int64)
+        target_col = start_idx[:, None] + local_idx
+        flat_idx = target_col + (rows * num_points)[:, None]
+        flat_idx[~(in_segment & active[:, None]) | (target_col >= num_points)] = discard_idx
+        flow_flat[flat_idx.ravel()] = segment_flow.ravel()
+
+        current_time_pos = np.where(active, current_time_pos + segment_duration, current_time_pos)
+        remaining_volume = np.where(active, remaining_volume - segment_volume, remaining_volume)
+
+    flow_rate = flow_flat[:discard_idx].reshape(n, num_points)
+    return _finalize_curves(flow_rate, rng, 0.8)
+
+BATCH_CURVE_GENERATORS = {
+    "Normal": generate_normal_flow_curves,
+    "Obstrüktif": generate_obstructive_flow_curves,
+    "Disfonksiyonel": generate_dysfunctional_flow_curves,
+}
+
+_patient_info_table = None
+
+def _get_patient_info_table():
+    """
+    Olası tüm PatientInfo metinlerini bir kez üretir: [ek_not, kadın_mı, ad, soyad, yaş - 20].
+    Toplu üretimde metinler satır satır birleştirilmek yerine bu tablodan indekslenir.
+    """
+    global _patient_info_table
+    if _patient_info_table is None:
+        suffixes = ["", " | Şüpheli BPH geçmişi.", " | Pelvik taban disfonksiyonu notları."]
+        table = np.empty((len(suffixes), len(GENDERS), len(FIRST_NAMES_MALE), len(LAST_NAMES), 61), dtype=object)
+        for g, (gender, names) in enumerate(zip(GENDERS, [FIRST_NAMES_MALE, FIRST_NAMES_FEMALE])):
+            for f, first_name in enumerate(names):
+                for l, last_name in enumerate(LAST_NAMES):
+                    for age in range(20, 81):
+                        text = f"Hasta Adı: {first_name} {last_name} | Yaş: {age} | Cinsiyet: {gender}"
+                        for k, suffix in enumerate(suffixes):
+                            table[k, g, f, l, age - 20] = text + suffix
+        _patient_info_table = table
+    return _patient_info_table
+
+def generate_uroflow_data_batch(num_samples=100, seed=None, num_points=100, id_offset=0):
+    """
+    generate_uroflow_data ile aynı şemada bir DataFrame'i vektörize olarak üretir.
+    Her tanı sınıfının eğrileri tek bir 2B NumPy matrisinde oluşturulur; aynı seed aynı çıktıyı verir.
+    id_offset, PatientID numaralandırmasının nereden başlayacağını belirler (parçalı üretim için).
+    """
+    rng = np.random.default_rng(seed)
+
+    diagnosis_idx = rng.integers(0, len(DIAGNOSES), num_samples)
+    ages = rng.integers(20, 81, num_samples)
+    gender_idx = rng.integers(0, len(GENDERS), num_samples)
+    is_female = gender_idx == 1
+    first_name_idx = rng.integers(0, len(FIRST_NAMES_MALE), num_samples)
+    last_name_idx = rng.integers(0, len(LAST_NAMES), num_samples)
+
+    first_names = np.array([FIRST_NAMES_MALE, FIRST_NAMES_FEMALE], dtype=object)[gender_idx, first_name_idx]
+    last_names = np.array(LAST_NAMES, dtype=object)[last_name_idx]
+    genders = np.array(GENDERS, dtype=object)[gender_idx]
+    patient_ids = [f"PID{i:04d}" for i in range(id_offset + 1, id_offset + num_samples + 1)]
+
+    # Ek not: 1 = BPH şüphesi (50 yaş üstü erkek, obstrüktif), 2 = pelvik taban (kadın, disfonksiyonel)
+    suffix_idx = np.zeros(num_samples, dtype=np.int64)
+    suffix_idx[(ages > 50) & ~is_female & (diagnosis_idx == DIAGNOSES.index("Obstrüktif"))] = 1
+    suffix_idx[is_female & (diagnosis_idx == DIAGNOSES.index("Disfonksiyonel"))] = 2
+    patient_info = _get_patient_info_table()[suffix_idx, gender_idx, first_name_idx, last_name_idx, ages - 20]
+
+    volumes = np.zeros(num_samples, dtype=np.int64)
+    flow_times = np.zeros(num_samples, dtype=np.int64)
+    notes = np.empty(num_samples, dtype=object)
+    flow_curves = np.empty((num_samples, num_points), dtype=BATCH_DTYPE)
+
+    for class_idx, diagnosis in enumerate(DIAGNOSES):
+        rows = np.flatnonzero(diagnosis_idx == class_idx)
+        if len(rows) == 0:
+            continue
+        low, high = VOLUME_RANGES[diagnosis]
+        volumes[rows] = rng.integers(low, high + 1, len(rows))
+        low, high = FLOW_TIME_RANGES[diagnosis]
+        flow_times[rows] = rng.integers(low, high + 1, len(rows))
+        templates = np.array(CLINICAL_NOTE_TEMPLATES[diagnosis], dtype=object)
+        notes[rows] = templates[rng.integers(0, len(templates), len(rows))]
+        flow_curves[rows] = BATCH_CURVE_GENERATORS[diagnosis](rng, volumes[rows], flow_times[rows].astype(float), num_points)
+
+    return pd.DataFrame({
+        "PatientID": patient_ids,
+        "FirstName": first_names,
+        "LastName": last_names,
+        "Age": ages,
+        "Gender": genders,
+        "PatientInfo": patient_info,
+        "Qmax": np.round(flow_curves.max(axis=1).astype(np.float64), 2),
+        "Qave": np.round(flow_curves.mean(axis=1, dtype=np.float64), 2),
+        "Volume": volumes,
+        "FlowTime": flow_times,
+        "ClinicalNotes": notes,
+        "FlowCurve": list(flow_curves), # Satırlar 2B matrisin görünümleridir (kopya yok)
+        "Diagnosis": np.array(DIAGNOSES, dtype=object)[diagnosis_idx],
+    }, columns=DATA_COLUMNS)
+
 # Veri dosyasını global bir değişkende tutalım ki her fonksiyonda tekrar yüklemeyelim.
 # Bu, uygulamanın performansı için daha iyidir.
 _loaded_data_df = None
+# Eğriler bellek eşlemeli arşivde durur; sadece açılan hastaların eğrileri RAM'e okunur.
+_curve_archive = None
+# PatientID -> satır konumu (hash indeksi) ve kayıt nesnelerinin okuduğu sütun dizileri.
+# Yüklemede bir kez kurulur, append_data ile güncel tutulur.
+_patient_index = None
+_record_columns = None
+# Ad/soyad aramaları için küçük harfe çevrilmiş "Ad Soyad" dizisi (ilk aramada kurulur)
+_search_names = None
+
+# get_patient_info_by_id'nin döndürdüğü alanlar (sırası korunur)
+PATIENT_RECORD_FIELDS = ("PatientID", "FirstName", "LastName", "Age", "Gender", "PatientInfo",
+                         "Qmax", "Qave", "Volume", "FlowTime", "ClinicalNotes", "FlowCurve")
+
+class PatientRecord:
+    """
+    Tek bir hastaya hafif, sözlük benzeri erişim.
+    Değerler her seferinde yeni bir dict kurulmadan, doğrudan sütun dizilerinden okunur;
+    FlowCurve ise ilk erişimde arşivden okunup saklanır.
+    record['Qmax'], record.get('PatientID', 'N/A') ve record.to_dict() desteklenir.
+    """
+    __slots__ = ("_columns", "_archive", "_row", "_flow_curve")
+
+    def __init__(self, columns, archive, row):
+        self._columns = columns
+        self._archive = archive
+        self._row = row
+        self._flow_curve = None
+
+    def __getitem__(self, key):
+        if key == "FlowCurve":
+            if self._flow_curve is None:
+                self._flow_curve = self._archive.get_curve(self._row).tolist() # Eğri yalnızca şimdi diskten okunur
+            return self._flow_curve
+        if key not in PATIENT_RECORD_FIELDS:
+            raise KeyError(key)
+        return self._columns[key][self._row]
+
+    def __contains__(self, key):
+        return key in PATIENT_RECORD_FIELDS
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return PATIENT_RECORD_FIELDS
+
+    def to_dict(self):
+        return {key: self[key] for key in PATIENT_RECORD_FIELDS}
+
+    def __repr__(self):
+        return f"PatientRecord({self['PatientID']!r}, satır={self._row})"
+
+def _build_patient_index(df):
+    """
+    PatientID -> satır konumu sözlüğünü ve kayıtların okuyacağı sütun dizilerini kurar.
+    Aynı ID birden fazla kez geçiyorsa, eski davranışla uyumlu olarak ilk satır kazanır.
+    """
+    global _patient_index, _record_columns, _search_names
+    patient_ids = df['PatientID'].to_numpy()
+    # Ters sırayla yazılınca küçük satır numarası en son yazılır, yani ilk eşleşme kalır.
+    _patient_index = dict(zip(patient_ids[::-1], range(len(patient_ids) - 1, -1, -1)))
+    _record_columns = {col: df[col].to_numpy() for col in PATIENT_RECORD_FIELDS if col != "FlowCurve"}
+    _search_names = None
+
+def data_paths(filename):
+    """
+    Veri dosyası adından eski CSV yolunu ve ikili eğri deposunun temel yolunu üretir.
+    Örn: 'simulated_uroflow_data.csv' -> ('.../simulated_uroflow_data.csv', '.../simulated_uroflow_data')
+    """
+    csv_path = os.path.join(os.path.dirname(__file__), filename)
+    return csv_path, os.path.splitext(csv_path)[0]
+
+def is_data_available(filename="simulated_uroflow_data.csv"):
+    """
+    Yüklenebilir bir veri seti olup olmadığını (ikili depo veya aktarılabilir eski CSV) kontrol eder.
+    """
+    csv_path, store_base = data_paths(filename)
+    return curve_store.curve_store_exists(store_base) or os.path.exists(csv_path)
+
+def check_data_header(filename="simulated_uroflow_data.csv"):
+    """
+    Veri setini tamamen yüklemeden, yalnızca başlık/sürüm bilgileriyle doğrular (hızlı başlangıç kontrolü).
+    Eğri deposu varsa manifest, meta tablo başlığı ve .npy başlıkları; yalnızca eski CSV varsa ilk satırı kontrol edilir.
+    (geçerli_mi, açıklama) döndürür.
+    """
+    csv_path, store_base = data_paths(filename)
+    if curve_store.curve_store_exists(store_base):
+        return curve_store.check_store_header(store_base, DATA_COLUMNS)
+    if not os.path.exists(csv_path):
+        return False, "Veri bulunamadı."
+    try:
+        with open(csv_path, "r", encoding="utf-8") as f:
+            header = f.readline().rstrip("\r\n").split(",")
+    except (OSError, UnicodeDecodeError) as e:
+        return False, f"Eski CSV okunamadı ({e})."
+    missing_columns = [col for col in DATA_COLUMNS if col not in header]
+    if missing_columns:
+        return False, f"Eski CSV'de eksik sütunlar: {', '.join(missing_columns)}"
+    return True, "Eski CSV, ilk yüklemede eğri deposuna aktarılacak."
 
 def save_data_to_csv(dataframe, filename="simulated_uroflow_data.csv"):
     """
-    DataFrame'i belirtilen CSV dosyasına kaydeder.
-    FlowCurve listesini string olarak kaydeder.
+    DataFrame'i ikili eğri deposuna kaydeder.
+    FlowCurve listeleri float32 blok + ofset dizisi olarak, diğer sütunlar meta CSV tablosu olarak yazılır.
+    (Fonksiyon adı geriye dönük uyumluluk için korunmuştur.)
     """
-    df_copy = dataframe.copy()
-    df_copy['FlowCurve'] = df_copy['FlowCurve'].apply(lambda x: str(x)) 
-    file_path = os.path.join(os.path.dirname(__file__), filename)
-    df_copy.to_csv(file_path, index=False)
-    print(f"Veri '{filename}' dosyasına kaydedildi.")
+    global _loaded_data_df, _curve_archive
+    _, store_base = data_paths(filename)
+    # Eşlenmiş dosyayı üzerine yazmadan önce bırak (Windows'ta açık eşleme yazmayı engeller)
+    _loaded_data_df = None
+    _curve_archive = None
+    curve_store.write_curve_store(dataframe, store_base)
+    print(f"Veri '{os.path.basename(store_base)}' eğri deposuna kaydedildi.")
 
-def load_data_from_csv(filename="simulated_uroflow_data.csv"):
+def append_data(dataframe, filename="simulated_uroflow_data.csv"):
     """
-    Belirtilen CSV dosyasından veriyi yükler ve DataFrame olarak döndürür.
-    FlowCurve sütununu tekrar listeye çevirir.
+    Yeni kayıtları mevcut depoya ekler (dosyalar yeniden yazılmaz).
+    Veri önceden yüklenmişse, önbellekteki tablo ve PatientID indeksi de yeni satırlarla güncellenir.
     """
-    global _loaded_data_df
-    if _loaded_data_df is not None:
-        return _loaded_data_df # Zaten yüklüyse tekrar yükleme
-
-    file_path = os.path.join(os.path.dirname(__file__), filename)
-    if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        df['FlowCurve'] = df['FlowCurve'].apply(lambda x: eval(x) if isinstance(x, str) else [])
-        _loaded_data_df = df # Yüklenen veriyi sakla
-        return df
-    else:
-        print(f"Uyarı: '{filename}' dosyası bulunamadı. Lütfen önce veri oluşturun.")
-        return None
+    global _loaded_data_df, _curve_archive, _search_names
+    _, store_base = data_paths(filename)
+    previous_df = _loaded_data_df
+    _curve_archive = None # Eşlemeyi bırak; büyüyen dosya yeniden açılacak
+    curve_store.append_to_curve_store(dataframe, store_base)
+    print(f"{len(dataframe)} yeni kayıt '{os.path.basename(store_base)}' eğri deposuna eklendi.")
+
+    if previous_df is None:
+        return
+    opened = curve_store.CurveArchive.open(store_base)
+    if opened is None:
+        _loaded_data_df = None
+        return
+    _, _curve_archive = opened
+    new_rows = dataframe.drop(columns=[curve_store.CURVE_COLUMN])[list(previous_df.columns.drop(curve_store.CURVE_COLUMN, errors="ignore"))]
+    start_row = len(previous_df)
+    _loaded_data_df = pd.concat([previous_df.drop(columns=[curve_store.CURVE_COLUMN], errors="ignore"), new_rows],
+                                ignore_index=True)
+    if curve_store.CURVE_COLUMN in previous_df.columns:
+        _loaded_data_df[curve_store.CURVE_COLUMN] = _curve_archive.curve_views()
+
+    # İndeksi baştan kurmadan yalnızca yeni ID'leri ekle
+    for offset, patient_id in enumerate(new_rows['PatientID'].to_numpy()):
+        _patient_index.setdefault(patient_id, start_row + offset)
+    _record_columns.update({col: _loaded_data_df[col].to_numpy() for col in _record_columns})
+    _search_names = None # Yeni satırlar için bir sonraki aramada yeniden kurulur
+
+def load_data_from_csv(filename="simulated_uroflow_data.csv", archive_mode=False):
+    """
+    Veriyi ikili eğri deposundan yükler ve DataFrame olarak döndürür.
+    Depo yoksa ama eski formatta CSV varsa, önce tek seferlik geçiş (migration) yapılır.
+
+    archive_mode=True: Yalnızca skaler sütunlar (PatientID, ad, Qmax, Qave, Volume, FlowTime, Diagnosis...)
+    döndürülür; eğriler bellek eşlemeli arşivde kalır ve get_patient_info_by_id ile istendikçe okunur.
+    archive_mode=False: Her hasta için arşive bağlı bir FlowCurve görünümü de eklenir (model eğitimi için).
+    """
+    global _loaded_data_df, _curve_archive
+    if _loaded_data_df is None:
+        csv_path, store_base = data_paths(filename)
+        if not curve_store.curve_store_exists(store_base):
+            if not os.path.exists(csv_path):
+                print(f"Uyarı: '{filename}' verisi bulunamadı. Lütfen önce veri oluşturun.")
+                return None
+            try:
+                curve_store.migrate_csv_to_curve_store(csv_path, store_base)
+            except (pd.errors.EmptyDataError, ValueError, KeyError) as e:
+                print(f"Uyarı: '{filename}' eski CSV dosyası aktarılamadı ({e}).")
+                return None
+
+        opened = curve_store.CurveArchive.open(store_base)
+        if opened is None:
+            return None
+        _loaded_data_df, _curve_archive = opened # Yüklenen veriyi sakla
+        _build_patient_index(_loaded_data_df)
+
+    if not archive_mode and curve_store.CURVE_COLUMN not in _loaded_data_df.columns:
+        _loaded_data_df[curve_store.CURVE_COLUMN] = _curve_archive.curve_views()
+    return _loaded_data_df
 
 def get_patient_info_by_id(patient_id):
     """
     Simüle edilmiş veri setinden PatientID'ye göre hasta bilgilerini döndürür.
+    Arama, yüklemede kurulan hash indeksi sayesinde O(1)'dir; dönen değer bir PatientRecord'dur.
     """
-    df = load_data_from_csv()
+    df = load_data_from_csv(archive_mode=True)
     if df is None:
         return None, "Veri seti yüklenemedi."
     
-    # ID'ye göre ilk eşleşen satırı bul
-    patient_row = df[df['PatientID'] == patient_id]
-    
-    if not patient_row.empty:
-        # İlgili hasta için uroflow parametrelerini ve klinik notları da döndürelim
-        info = patient_row.iloc[0] # İlk eşleşen satırı al
-        return {
-            "PatientID": info["PatientID"],
-            "FirstName": info["FirstName"],
-            "LastName": info["LastName"],
-            "Age": info["Age"],
-            "Gender": info["Gender"],
-            "PatientInfo": info["PatientInfo"],
-            "Qmax": info["Qmax"],
-            "Qave": info["Qave"],
-            "Volume": info["Volume"],
-            "FlowTime": info["FlowTime"],
-            "ClinicalNotes": info["ClinicalNotes"],
-            "FlowCurve": info["FlowCurve"]
-        }, None
+    row = _patient_index.get(patient_id)
+    if row is not None:
+        return PatientRecord(_record_columns, _curve_archive, row), None
     else:
         return None, f"'{patient_id}' ID'li hasta bulunamadı."
 
+def get_patients_by_ids(patient_ids):
+    """
+    Toplu rapor işleri için birden fazla hastayı tek seferde döndürür.
+    (kayıtlar, bulunamayan_idler) döndürür; kayıtlar girilen sırayı koruyan {PatientID: PatientRecord} sözlüğüdür.
+    """
+    df = load_data_from_csv(archive_mode=True)
+    if df is None:
+        return {}, list(patient_ids)
+
+    records = {}
+    missing_ids = []
+    for patient_id in patient_ids:
+        row = _patient_index.get(patient_id)
+        if row is None:
+            missing_ids.append(patient_id)
+        else:
+            records[patient_id] = PatientRecord(_record_columns, _curve_archive, row)
+    return records, missing_ids
+
+
+def get_patient_row(patient_id):
+    """PatientID'nin yüklü tablodaki satır konumunu (indeksten, O(1)) döndürür; yoksa None."""
+    if load_data_from_csv(archive_mode=True) is None:
+        return None
+    return _patient_index.get(patient_id)
+
+def _turkish_lower(series):
+    """Türkçe büyük/küçük harf dönüşümü: 'I' -> 'ı', 'İ' -> 'i' (str.lower bunları doğru çevirmez)."""
+    return series.str.replace("I", "ı", regex=False).str.replace("İ", "i", regex=False).str.lower()
+
+def search_patients(name_query="", diagnosis=None, qmax_min=None, qmax_max=None):
+    """
+    Hastaları ad/soyad (büyük/küçük harf duyarsız, alt dizi), tanı ve Qmax aralığına göre süzer.
+    Süzme, yüklü sütun dizileri üzerinde vektörize maskelerle yapılır.
+    (eşleşen satır konumları (artan sıralı), hata) döndürür.
+    """
+    global _search_names
+    df = load_data_from_csv(archive_mode=True)
+    if df is None:
+        return None, "Veri seti yüklenemedi."
+
+    mask = np.ones(len(df), dtype=bool)
+    if name_query and name_query.strip():
+        if _search_names is None:
+            _search_names = _turkish_lower(df['FirstName'].astype(str) + " " + df['LastName'].astype(str))
+        query = _turkish_lower(pd.Series([name_query.strip()]))[0]
+        mask &= _search_names.str.contains(query, regex=False).to_numpy()
+    if diagnosis:
+        mask &= df['Diagnosis'].to_numpy() == diagnosis
+    if qmax_min is not None:
+        mask &= df['Qmax'].to_numpy() >= qmax_min
+    if qmax_max is not None:
+        mask &= df['Qmax'].to_numpy() <= qmax_max
+    return np.flatnonzero(mask), None
+
 
 if __name__ == "__main__":
     # Bu blok, data_handler.py dosyası doğrudan çalıştırıldığında (test amaçlı) çalışır.
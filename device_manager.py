@@ -0,0 +1,135 @@
+import bluetooth_simulator
+import sample_buffer
+import stream_capture
+import stream_ingest
+
+# --- Çoklu Cihaz Oturum Yöneticisi ---
+# Klinikte aynı anda kayıt yapan birden fazla Locum Uroflow ünitesi için her cihaza ayrı bir oturum açılır.
+# Her oturumun kendi simülatörü, halka tamponu (ring buffer), son canlı parametreleri ve bağlı hastası vardır.
+# poll() her akıştan son yoklamadan beri gelen tüm örnekleri tek pakette çeker; arayüz bunu tek bir zamanlayıcıdan
+# (root.after) çağırır. Kayıp örnekler oturumun alıcısında (stream_ingest) interpolasyonla doldurulur.
+# capture_dir verilirse her akış, alınan ham örnekleriyle bir kayıt dosyasına (stream_capture) yazılır.
+# sessions sözlüğü ve kayıt dosyaları yalnızca arayüz iş parçacığında değiştirilir: connect_async/disconnect_async
+# (device_bridge iş parçacığında çalışır) yalnızca simülatörün bağlantısını kurar/keser; oturum, bağlantı
+# sonucu arayüze döndüğünde register_session ile eklenir, kesmeden önce de remove_session ile çıkarılır.
+
+
+class DeviceSession:
+    """Tek bir cihazın bağlantı, akış ve canlı veri durumu."""
+
+    def __init__(self, device_name, buffer_size=None):
+        self.device_name = device_name
+        self.simulator = bluetooth_simulator.BluetoothUroflowSimulator(send_full_curve=False)
+        self.patient_id = None                        # Oturuma bağlı hasta
+        # Halka tampon: yalnızca son buffer_size örnek tutulur (boşluklar doldurulmuş, eşit aralıklı).
+        # Verilmezse cihazın örnekleme hızı x en uzun işeme süresi kadar örnek tutar (tam kayıt kırpılmaz).
+        if buffer_size is None:
+            buffer_size = sample_buffer.capacity_for(self.simulator.sample_rate_hz, self.simulator.max_void_duration_sec)
+        self.ingestor = stream_ingest.SampleIngestor(self.simulator.sample_rate_hz, buffer_size)
+        self.flow_points = self.ingestor.samples
+        self.last_packet = None                       # Son paketteki anlık parametreler
+        self.capture = None                           # Etkin akışın kayıt dosyası (stream_capture.CaptureWriter)
+        self.status = "Bağlı Değil"
+
+    @property
+    def is_streaming(self):
+        return self.simulator.is_streaming
+
+    def ingest(self, packet):
+        """Paketteki yeni örnekleri tampona ekler ve son parametreleri saklar; eklenen örnek sayısını döndürür."""
+        self.last_packet = packet
+        if self.capture is not None:
+            self.capture.write_packet(packet)
+        return self.ingestor.ingest(packet)
+
+    def close_capture(self):
+        """Etkin akışın kayıt dosyasını kapatır."""
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+
+
+class DeviceManager:
+    """Birden fazla cihaz oturumunu aynı anda yönetir."""
+
+    def __init__(self, buffer_size=None, capture_dir=None):
+        self.buffer_size = buffer_size
+        self.capture_dir = capture_dir
+        self.sessions = {} # cihaz adı -> DeviceSession
+
+    def create_session(self, device_name):
+        """Bağlanılacak cihaz için (henüz kaydedilmemiş) yeni bir oturum oluşturur."""
+        return DeviceSession(device_name, self.buffer_size)
+
+    async def connect_async(self, session):
+        """Oturumun cihazına bloklamadan bağlanır; (başarılı_mı, mesaj) döndürür. sessions'a dokunmaz."""
+        return await session.simulator.connect_async(session.device_name)
+
+    def register_session(self, session):
+        """Bağlantısı kurulan oturumu ekler (arayüz iş parçacığından)."""
+        session.status = "Bağlı"
+        self.sessions[session.device_name] = session
+
+    def remove_session(self, device_name):
+        """Oturumu çıkarır ve kayıt dosyasını kapatır (arayüz iş parçacığından); oturumu veya None döndürür."""
+        session = self.sessions.pop(device_name, None)
+        if session is not None:
+            session.close_capture()
+        return session
+
+    async def disconnect_async(self, session):
+        """remove_session ile çıkarılan oturumun cihaz bağlantısını bloklamadan keser."""
+        await session.simulator.disconnect_async()
+        return True, f"'{session.device_name}' bağlantısı kesildi."
+
+    def start_stream(self, device_name, patient_id=None):
+        """Cihazda akışı başlatır; patient_id verilirse oturum o hastaya bağlanır."""
+        session = self.sessions.get(device_name)
+        if session is None:
+            return False, f"'{device_name}' cihazına bağlı değilsiniz."
+        success, message = session.simulator.start_streaming(patient_id=patient_id or None)
+        if success:
+            session.ingestor.reset()
+            session.last_packet = None
+            session.patient_id = session.simulator.current_patient_data.get('PatientID', 'N/A')
+            session.status = "Akış Aktif"
+            session.close_capture()
+            if self.capture_dir:
+                try:
+                    session.capture = stream_capture.CaptureWriter(
+                        stream_capture.capture_path(session.patient_id, device_name, self.capture_dir),
+                        stream_capture.session_metadata(session.simulator, device_name))
+                except OSError as e:
+                    print(f"Uyarı: '{device_name}' oturum kaydı açılamadı ({e}).")
+        return success, message
+
+    def stop_stream(self, device_name):
+        """Cihazdaki akışı durdurur."""
+        session = self.sessions.get(device_name)
+        if session is None:
+            return False
+        session.close_capture()
+        if not session.simulator.stop_streaming():
+            return False
+        session.status = "Durduruldu"
+        return True
+
+    def poll(self):
+        """
+        Akışı aktif tüm cihazlardan bekleyen örnekleri çeker.
+        {cihaz adı: paket veya None (akış bitti)} döndürür; akışı olmayan veya yeni örneği olmayan cihazlar
+        sonuçta yer almaz.
+        """
+        updates = {}
+        for device_name, session in list(self.sessions.items()):
+            if not session.is_streaming:
+                continue
+            packet, status = session.simulator.get_latest_data_packet()
+            if packet:
+                if not session.ingest(packet):
+                    continue
+            else:
+                session.status = status
+                session.close_capture()
+            updates[device_name] = packet
+        return updates
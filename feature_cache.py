@@ -0,0 +1,92 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+# --- Satır Bazlı Özellik Önbelleği ---
+# Model eğitiminde her hasta kaydı için hesaplanan özellikler (eğri + klinik özellik satırı ve ön işlenmiş not),
+# kaydın içeriğinden türetilen bir anahtarla diskte saklanır. Yeni kayıtlar eklendikten sonra yeniden eğitimde
+# yalnızca önbellekte olmayan satırlar hesaplanır.
+#   anahtar = blake2b(FlowTime, ClinicalNotes, FlowCurve baytları)  (16 bayt)
+# Önbellek tek bir .npz dosyasıdır: keys (S16), features (N, F) float64, notes (metin dizisi) ve şema bilgisi.
+# Özellik tanımları veya not normalleştiricisi değişince (şema etiketi farklıysa) önbellek yok sayılır ve baştan
+# kurulur. Kaydederken güncel eğitim setinde olmayan satırlar prune ile atılır; dosya yeniden üretilen kohortlarla
+# sınırsız büyümez.
+
+KEY_SIZE = 16
+
+
+def row_content_keys(flow_times, clinical_notes, flow_curves):
+    """Her kayıt için özelliklerini belirleyen içerikten 16 baytlık bir anahtar üretir; (N,) S16 dizisi döndürür."""
+    keys = np.empty(len(flow_times), dtype=f"S{KEY_SIZE}")
+    for i, (flow_time, note, curve) in enumerate(zip(flow_times, clinical_notes, flow_curves)):
+        digest = hashlib.blake2b(digest_size=KEY_SIZE)
+        digest.update(repr(float(flow_time)).encode())
+        digest.update(b"\0")
+        digest.update(note.encode("utf-8") if isinstance(note, str) else b"\1") # Metin olmayan not ayrı tutulur
+        digest.update(b"\0")
+        digest.update(np.ascontiguousarray(curve, dtype=np.float64).tobytes())
+        keys[i] = digest.digest()
+    return keys
+
+
+class FeatureCache:
+    """İçerik anahtarına göre satır özelliklerini saklayan disk önbelleği."""
+
+    def __init__(self, path, schema_tag, num_features):
+        self.path = path
+        self.schema_tag = schema_tag
+        self.num_features = num_features
+        self.keys = np.empty(0, dtype=f"S{KEY_SIZE}")
+        self.features = np.empty((0, num_features))
+        self.notes = np.empty(0, dtype=str)
+        self._index = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                schema = json.loads(str(stored["schema"]))
+                if schema != {"tag": self.schema_tag, "num_features": self.num_features}:
+                    print("Özellik önbelleği farklı bir özellik tanımıyla oluşturulmuş; yeniden kurulacak.")
+                    return
+                self.keys, self.features, self.notes = stored["keys"], stored["features"], stored["notes"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Uyarı: Özellik önbelleği okunamadı ({e}); yeniden kurulacak.")
+            return
+        self._index = {key: i for i, key in enumerate(self.keys.tolist())}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """Anahtarların önbellekteki satırlarını döndürür; bulunmayanlar için -1."""
+        return np.fromiter((self._index.get(key, -1) for key in keys.tolist()), dtype=np.int64, count=len(keys))
+
+    def add(self, keys, features, notes):
+        """Yeni satırları önbelleğe ekler (diske yazmak için save çağrılmalıdır)."""
+        keys, unique_positions = np.unique(keys, return_index=True) # Aynı içerikli kayıtlar bir kez saklanır
+        start = len(self.keys)
+        self.keys = np.concatenate([self.keys, keys])
+        self.features = np.vstack([self.features, np.asarray(features, dtype=np.float64)[unique_positions]])
+        self.notes = np.concatenate([self.notes, np.asarray(notes, dtype=str)[unique_positions]])
+        self._index.update({key: start + i for i, key in enumerate(keys.tolist())})
+
+    def prune(self, keys):
+        """Yalnızca verilen anahtarların satırlarını tutar; atılan satır sayısını döndürür."""
+        keep = np.isin(self.keys, keys)
+        removed = int(len(keep) - keep.sum())
+        if removed:
+            self.keys, self.features, self.notes = self.keys[keep], self.features[keep], self.notes[keep]
+            self._index = {key: i for i, key in enumerate(self.keys.tolist())}
+        return removed
+
+    def save(self):
+        """Önbelleği geçici dosya üzerinden atomik olarak yazar."""
+        tmp_path = self.path + ".tmp.npz"
+        schema = json.dumps({"tag": self.schema_tag, "num_features": self.num_features})
+        np.savez(tmp_path, keys=self.keys, features=self.features, notes=self.notes, schema=np.array(schema))
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,154 @@
+import time
+import argparse
+
+import numpy as np
+from scipy import sparse
+
+# --- Düz Dizi Tabanlı RandomForest Çıkarımı ---
+# Eğitilmiş bir scikit-learn RandomForestClassifier'ın tüm ağaçları tek bir düğüm tablosunda birleştirilir:
+#   feature[n], threshold[n], left[n], right[n], missing_left[n] -> düğüm n'nin bölme kuralı ve çocukları
+#   value[n]                                                     -> yaprak n'nin sınıf olasılıkları
+#   roots[t]                                                     -> ağaç t'nin kök düğümünün tablodaki konumu
+# Yapraklar kendilerine döner (left = right = kendisi); böylece tüm (satır, ağaç) çiftleri en büyük derinlik kadar
+# adımda, maske gerekmeden, vektörel olarak yapraklara iner.
+# Sonuçlar scikit-learn ile bit düzeyinde aynıdır: girdi, scikit-learn gibi float32'ye çevrilir ve eşiklerle
+# float64'te karşılaştırılır; ağaç olasılıkları scikit-learn ile aynı sırayla (ağaç ağaç) toplanıp ağaç sayısına bölünür.
+# Diziler model paketinde düz NumPy dizileri olarak saklandığı için joblib mmap ile süreçler arasında paylaşılır.
+
+FOREST_ARRAY_KEYS = ("feature", "threshold", "left", "right", "missing_left", "value", "roots")
+INPUT_DTYPE = np.float32 # scikit-learn ağaçlarının girdi tipi
+
+
+def export_forest(forest):
+    """Eğitilmiş RandomForestClassifier'ı düz düğüm dizilerinden oluşan bir sözlüğe çevirir."""
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("Yalnızca tek çıktılı sınıflandırıcılar destekleniyor.")
+    features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(tree.threshold)
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+        missing_lefts.append(np.asarray(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count)), dtype=bool))
+        values.append(tree.value[:, 0, :forest.n_classes_]) # DecisionTreeClassifier.predict_proba ile aynı dilim
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+    return {
+        "feature": np.concatenate(features).astype(np.int32),
+        "threshold": np.concatenate(thresholds).astype(np.float64),
+        "left": np.concatenate(lefts).astype(np.int32),
+        "right": np.concatenate(rights).astype(np.int32),
+        "missing_left": np.concatenate(missing_lefts),
+        "value": np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        "roots": np.asarray(roots, dtype=np.int32),
+        "max_depth": int(max_depth),
+        "n_features": int(forest.n_features_in_),
+    }
+
+
+class FlatForest:
+    """export_forest dizileri üzerinde, scikit-learn çağırmadan predict_proba hesaplayan çıkarım motoru."""
+
+    def __init__(self, arrays):
+        missing_keys = [key for key in FOREST_ARRAY_KEYS + ("max_depth", "n_features") if key not in arrays]
+        if missing_keys:
+            raise ValueError(f"Orman dizilerinde eksik anahtarlar: {', '.join(missing_keys)}")
+        for key in FOREST_ARRAY_KEYS:
+            setattr(self, key, arrays[key])
+        self.max_depth = int(arrays["max_depth"])
+        self.n_features = int(arrays["n_features"])
+        self.n_trees = len(self.roots)
+        self.n_classes = self.value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, forest):
+        return cls(export_forest(forest))
+
+    def apply(self, X):
+        """Her (satır, ağaç) çifti için ulaşılan yaprağın düğüm tablosundaki konumunu döndürür: (N, ağaç sayısı)."""
+        num_rows = len(X)
+        X_flat = X.reshape(-1)
+        row_starts = np.repeat(np.arange(num_rows, dtype=np.int64) * X.shape[1], self.n_trees)
+        nodes = np.tile(self.roots, num_rows)
+        has_missing = bool(np.isnan(X_flat).any()) # NaN yoksa eksik değer kuralı her adımda hesaplanmaz
+        for _ in range(self.max_depth):
+            x = X_flat.take(row_starts + self.feature.take(nodes))
+            go_left = x <= self.threshold.take(nodes)
+            if has_missing:
+                go_left |= np.isnan(x) & self.missing_left.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes.reshape(num_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        """
+        X: (N, özellik) yoğun dizi veya seyrek matris (modelin sütun sırasıyla). (N, sınıf) olasılık dizisi döndürür.
+        """
+        X = X.toarray() if sparse.issparse(X) else X
+        X = np.ascontiguousarray(X, dtype=INPUT_DTYPE)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Özellik sayısı uyuşmuyor: {X.shape[1]} (beklenen {self.n_features}).")
+        leaf_values = self.value[self.apply(X)] # (N, ağaç, sınıf)
+        # scikit-learn ağaç olasılıklarını sırayla toplar; cumsum da aynı sırayla toplar (ikili toplama yapmaz)
+        return np.cumsum(leaf_values, axis=1)[:, -1] / self.n_trees
+
+
+def _time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def benchmark(num_rows=500, repeat=200):
+    """
+    Kayıtlı model paketi ve veri seti üzerinde düz dizi motorunu scikit-learn ile karşılaştırır:
+    olasılıkların birebir aynı olduğunu doğrular ve tek satır / toplu tahmin gecikmelerini ölçer.
+    """
+    import warnings
+    import data_handler
+    import ml_model_handler
+
+    if not ml_model_handler.load_models():
+        return
+    df = data_handler.load_data_from_csv().head(num_rows)
+    processed_notes = ml_model_handler.preprocess_texts(df["ClinicalNotes"])
+    curve_features = ml_model_handler.extract_curve_feature_blocks(df["FlowCurve"].tolist(), df["FlowTime"])
+    X_input = ml_model_handler._build_feature_matrix(df[ml_model_handler.NUMERIC_FEATURES].to_numpy(),
+                                                     curve_features, processed_notes)
+    classifier = ml_model_handler.combined_classifier
+    flat_forest = ml_model_handler.flat_forest
+
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected = classifier.predict_proba(X_input)
+        actual = flat_forest.predict_proba(X_input)
+        print(f"{len(df)} satır, {flat_forest.n_trees} ağaç, {len(flat_forest.feature)} düğüm, "
+              f"en büyük derinlik {flat_forest.max_depth}")
+        print(f"scikit-learn ile birebir aynı: {np.array_equal(expected, actual)} "
+              f"(en büyük fark {np.abs(expected - actual).max():.3g})")
+
+        single_row = X_input[:1]
+        sklearn_single = _time_per_call(lambda: classifier.predict_proba(single_row), repeat)
+        flat_single = _time_per_call(lambda: flat_forest.predict_proba(single_row), repeat)
+        sklearn_batch = _time_per_call(lambda: classifier.predict_proba(X_input), max(repeat // 10, 1))
+        flat_batch = _time_per_call(lambda: flat_forest.predict_proba(X_input), max(repeat // 10, 1))
+    print(f"Tek satır : scikit-learn {sklearn_single * 1e3:.3f} ms | düz dizi {flat_single * 1e3:.3f} ms "
+          f"({sklearn_single / flat_single:.1f}x)")
+    print(f"{len(df)} satır: scikit-learn {sklearn_batch * 1e3:.3f} ms | düz dizi {flat_batch * 1e3:.3f} ms "
+          f"({sklearn_batch / flat_batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Düz dizi orman çıkarımını scikit-learn ile doğrular ve karşılaştırır.")
+    parser.add_argument("--rows", type=int, default=500, help="Karşılaştırmada kullanılacak kayıt sayısı")
+    parser.add_argument("--repeat", type=int, default=200, help="Tek satır ölçümünde tekrar sayısı")
+    args = parser.parse_args()
+    benchmark(args.rows, args.repeat)
@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+from collections import deque, Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+import ml_model_handler
+
+# --- Arayüzsüz (Headless) Tahmin Sunucusu ---
+# Modeller süreç başında bir kez yüklenir (load_models). İstekler HTTP üzerinden (TCP veya Unix soketi) gelir:
+#   POST /predict  -> tek kayıt (JSON nesnesi) veya kayıt listesi; alanlar: Qmax, Qave, Volume, FlowTime,
+#                     ClinicalNotes, FlowCurve
+#   GET  /metrics  -> istek gecikmesi ve mikro-toplu (micro-batch) boyutu ölçümleri
+#   GET  /health   -> model paketi bilgisi
+# Eşzamanlı istekler tek bir tahmin iş parçacığında mikro-toplulara birleştirilir: ilk kayıt geldikten sonra
+# en fazla max_wait_ms beklenir (gecikme bütçesi) veya max_batch_size kayda ulaşılınca toplu tahmin
+# (predict_uroflow_diagnosis_batch) tek seferde yapılır. ml_model_handler'ın genel değişkenlerine yalnızca
+# bu iş parçacığı eriştiği için istek iş parçacıkları arasında kilit gerekmez.
+
+DEFAULT_MAX_BATCH_SIZE = 64
+DEFAULT_MAX_WAIT_MS = 5.0
+LATENCY_WINDOW = 2000 # Yüzdelikler son bu kadar isteğin gecikmesinden hesaplanır
+REQUIRED_FIELDS = ml_model_handler.NUMERIC_FEATURES + ["ClinicalNotes", "FlowCurve"]
+
+
+class _PendingRecord:
+    """Kuyrukta bekleyen tek bir kayıt ve sonucunu bekleyen istek için olay."""
+    __slots__ = ("record", "request_id", "enqueued_at", "done", "result", "error")
+
+    def __init__(self, record, request_id):
+        self.record = record
+        self.request_id = request_id # Aynı istekten gelen kayıtlar aynı kimliği taşır
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceMetrics:
+    """İstek gecikmesi, kuyruk bekleme süresi ve mikro-toplu boyutu ölçümleri (iş parçacığı güvenli)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.requests = 0
+        self.records = 0
+        self.errors = 0
+        self.batches = 0
+        self.batch_sizes = Counter()
+        self.request_latencies = deque(maxlen=LATENCY_WINDOW) # saniye
+        self.batch_latencies = deque(maxlen=LATENCY_WINDOW)   # toplu tahmin süresi (saniye)
+
+    def record_batch(self, size, seconds):
+        with self._lock:
+            self.batches += 1
+            self.batch_sizes[size] += 1
+            self.batch_latencies.append(seconds)
+
+    def record_request(self, num_records, seconds, failed=False):
+        with self._lock:
+            self.requests += 1
+            self.records += num_records
+            self.errors += int(failed)
+            self.request_latencies.append(seconds)
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+        ordered = sorted(values)
+        pick = lambda q: ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1e3
+        return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": ordered[-1] * 1e3}
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime_s": time.time() - self.started_at,
+                "requests": self.requests,
+                "records": self.records,
+                "errors": self.errors,
+                "batches": self.batches,
+                "mean_batch_size": (sum(size * count for size, count in self.batch_sizes.items()) / self.batches
+                                    if self.batches else None),
+                "batch_size_histogram": {str(size): count for size, count in sorted(self.batch_sizes.items())},
+                "request_latency": self._percentiles(self.request_latencies),
+                "batch_inference_latency": self._percentiles(self.batch_latencies),
+            }
+
+
+class MicroBatcher:
+    """Gelen kayıtları gecikme bütçesi içinde toplayıp tek bir toplu tahminle puanlayan iş parçacığı."""
+
+    def __init__(self, metrics, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.metrics = metrics
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """Kayıtları kuyruğa ekler ve sonuçlarını bekler; (sonuç listesi, hata) döndürür."""
+        request_id = object()
+        pending = [_PendingRecord(record, request_id) for record in records]
+        for item in pending:
+            self._queue.put(item)
+        for item in pending:
+            item.done.wait()
+        errors = [item.error for item in pending if item.error]
+        if errors:
+            return None, errors[0]
+        return [item.result for item in pending], None
+
+    def _collect_batch(self):
+        """İlk kaydı bekler; sonra bütçe dolana veya toplu boyut sınırına ulaşılana kadar kayıt toplar."""
+        batch = [self._queue.get()]
+        deadline = batch[0].enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _score(items):
+        """Kayıtları tek bir toplu tahminle puanlar ve sonuçları/hatayı kayıtlara yazar."""
+        try:
+            results, error = predict_records([item.record for item in items])
+        except Exception as e: # Beklenmeyen hata bekleyen istekleri serbest bırakmalı
+            results, error = None, str(e)
+        for i, item in enumerate(items):
+            item.result = results[i] if results is not None else None
+            item.error = error
+        return error
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            start = time.perf_counter()
+            if self._score(batch) is not None and len({id(item.request_id) for item in batch}) > 1:
+                # Toplu tahmin başarısızsa her istek ayrı puanlanır; hata yalnızca ona yol açan isteğe döner
+                requests = {}
+                for item in batch:
+                    requests.setdefault(id(item.request_id), []).append(item)
+                for items in requests.values():
+                    self._score(items)
+            self.metrics.record_batch(len(batch), time.perf_counter() - start)
+            for item in batch:
+                item.done.set()
+
+
+def predict_records(records):
+    """Kayıt sözlüklerini toplu olarak puanlar; predict_uroflow_diagnosis ile aynı alanları içeren sonuçlar döndürür."""
+    results, error = ml_model_handler.predict_uroflow_diagnosis_batch(pd.DataFrame.from_records(records))
+    if error:
+        return None, error
+    return [
+        {
+            "predicted_diagnosis": str(results["predicted_diagnosis"][i]),
+            "text_analysis_info": results["text_analysis_info"][i],
+            "probabilities": {label: float(p) for label, p in zip(results["classes"], results["probabilities"][i])},
+        }
+        for i in range(len(records))
+    ], None
+
+
+def validate_records(payload):
+    """
+    İstek gövdesini kayıt listesine çevirir; (kayıtlar, hata) döndürür.
+    Sayısal alanlar ve FlowCurve değerleri float'a çevrilir; çevrilemeyen değer içeren istek mikro-topluya
+    girmeden reddedilir (böylece aynı topludaki diğer isteklerin tahmini bozulmaz).
+    """
+    records = payload if isinstance(payload, list) else [payload]
+    if not records:
+        return None, "Boş istek."
+    validated = []
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            return None, f"Kayıt {i} bir JSON nesnesi değil."
+        missing = [field for field in REQUIRED_FIELDS if field not in record]
+        if missing:
+            return None, f"Kayıt {i} için eksik alanlar: {', '.join(missing)}"
+        if not isinstance(record["FlowCurve"], list):
+            return None, f"Kayıt {i} için FlowCurve bir sayı listesi olmalıdır."
+        if not isinstance(record["ClinicalNotes"], str):
+            return None, f"Kayıt {i} için ClinicalNotes bir metin olmalıdır."
+        record = dict(record)
+        try:
+            for field in ml_model_handler.NUMERIC_FEATURES:
+                record[field] = float(record[field])
+        except (TypeError, ValueError):
+            return None, f"Kayıt {i} için {field} bir sayı olmalıdır."
+        try:
+            record["FlowCurve"] = [float(value) for value in record["FlowCurve"]]
+        except (TypeError, ValueError):
+            return None, f"Kayıt {i} için FlowCurve bir sayı listesi olmalıdır."
+        validated.append(record)
+    return validated, None
+
+
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "UroflowInference/1.0"
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._send_json(200, self.server.metrics.snapshot())
+        elif self.path == "/health":
+            self._send_json(200, {"status": "ok", "model": ml_model_handler.model_metadata})
+        else:
+            self._send_json(404, {"error": "Bilinmeyen adres."})
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self._send_json(404, {"error": "Bilinmeyen adres."})
+            return
+        start = time.perf_counter()
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        except ValueError:
+            self.server.metrics.record_request(0, time.perf_counter() - start, failed=True)
+            self._send_json(400, {"error": "Geçersiz JSON."})
+            return
+        records, error = validate_records(payload)
+        if error:
+            self.server.metrics.record_request(0, time.perf_counter() - start, failed=True)
+            self._send_json(400, {"error": error})
+            return
+
+        results, error = self.server.batcher.submit(records)
+        latency = time.perf_counter() - start
+        self.server.metrics.record_request(len(records), latency, failed=error is not None)
+        if error:
+            self._send_json(500, {"error": error})
+            return
+        self._send_json(200, {"results": results if isinstance(payload, list) else results[0],
+                              "latency_ms": latency * 1e3})
+
+    def address_string(self):
+        # Unix soketinde istemci adresi yoktur
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _ServerMixin:
+    """Sunucuya ölçüm ve mikro-toplu nesnelerini bağlar."""
+    daemon_threads = True
+
+    def attach(self, batcher, metrics, verbose):
+        self.batcher = batcher
+        self.metrics = metrics
+        self.verbose = verbose
+        return self
+
+
+class InferenceHTTPServer(_ServerMixin, ThreadingHTTPServer):
+    pass
+
+
+class InferenceUnixServer(_ServerMixin, ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind (host, port) bekler; Unix soket yolu için doğrudan soket bağlanır
+        socketserver.TCPServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def create_server(host="127.0.0.1", port=8765, unix_socket=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                  max_wait_ms=DEFAULT_MAX_WAIT_MS, verbose=False):
+    """Modelleri yükler ve sunucuyu oluşturur (henüz istek dinlemez); (sunucu, hata) döndürür."""
+    if not ml_model_handler.load_models():
+        return None, "Modeller yüklenemedi. Lütfen önce modelleri eğitin."
+    metrics = InferenceMetrics()
+    batcher = MicroBatcher(metrics, max_batch_size, max_wait_ms)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket) # Önceki çalıştırmadan kalan soket dosyası
+        server = InferenceUnixServer(unix_socket, InferenceRequestHandler)
+    else:
+        server = InferenceHTTPServer((host, port), InferenceRequestHandler)
+    return server.attach(batcher, metrics, verbose), None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üroflowmetri tanı tahmini için arayüzsüz HTTP sunucusu (mikro-toplu).")
+    parser.add_argument("--host", default="127.0.0.1", help="Dinlenecek adres")
+    parser.add_argument("--port", type=int, default=8765, help="Dinlenecek port")
+    parser.add_argument("--unix-socket", help="TCP yerine bu Unix soket yolunda dinle")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE, help="Mikro-toplu başına en fazla kayıt")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="İlk kayıttan sonra toplu tahmine kadar en fazla bekleme (gecikme bütçesi, ms)")
+    parser.add_argument("--verbose", action="store_true", help="Her isteği günlüğe yaz")
+    args = parser.parse_args()
+
+    inference_server, error = create_server(args.host, args.port, args.unix_socket, args.max_batch_size,
+                                            args.max_wait_ms, args.verbose)
+    if error:
+        print(f"Hata: {error}")
+    else:
+        address = args.unix_socket or f"http://{args.host}:{args.port}"
+        print(f"Tahmin sunucusu {address} adresinde dinliyor (toplu boyut <= {args.max_batch_size}, "
+              f"bütçe {args.max_wait_ms} ms). Durdurmak için Ctrl+C.")
+        try:
+            inference_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            inference_server.server_close()
+            if args.unix_socket and os.path.exists(args.unix_socket):
+                os.remove(args.unix_socket)
@@ -0,0 +1,51 @@
+import numpy as np
+
+# --- Blit ile Hızlı Çizgi Güncelleme ---
+# Her karede tüm figürü (eksenler, ızgara, başlık, etiketler) yeniden çizmek yerine
+# statik arka plan bir kez önbelleğe alınır; sonraki karelerde yalnızca çizgi sanatçısı (artist)
+# bu arka planın üzerine çizilir ve ekrana kopyalanır (blit).
+# Figür yeniden çizildiğinde (pencere boyutu değişimi, eksen sınırı değişimi) arka plan yeniden yakalanır.
+
+
+class BlitLineRenderer:
+    """Tek bir Line2D'yi, önbelleğe alınmış arka plan üzerine blit ile güncelleyen çizici."""
+
+    def __init__(self, canvas, ax, line):
+        self.canvas = canvas
+        self.ax = ax
+        self.line = line
+        self.background = None
+        self.line.set_animated(True) # Normal draw() çizgiyi çizmez; yalnızca blit ile çizilir
+        self._draw_cid = self.canvas.mpl_connect("draw_event", self._on_draw)
+
+    def _on_draw(self, event):
+        """Tam çizimden sonra statik arka planı yakalar ve çizgiyi üzerine yeniden koyar."""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.ax.draw_artist(self.line)
+
+    def update(self, x_data, y_data):
+        """Çizgi verisini değiştirir ve yalnızca çizgiyi yeniden çizer."""
+        self.line.set_data(x_data, y_data)
+        if self.background is None:
+            self.canvas.draw() # İlk karede arka plan henüz yok; tam çizim _on_draw'ı tetikler
+            return
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.line)
+        self.canvas.blit(self.ax.bbox)
+
+    def extend_xlim(self, x_max):
+        """Veri x ekseni sınırını aşarsa sınırı genişletir; arka plan tam çizimle yenilenir (seyrek)."""
+        left, right = self.ax.get_xlim()
+        if x_max <= right:
+            return False
+        self.ax.set_xlim(left, x_max * 1.05)
+        self.canvas.draw()
+        return True
+
+    def disconnect(self):
+        self.canvas.mpl_disconnect(self._draw_cid)
+
+
+def sample_time_axis(num_samples, sample_interval):
+    """Eşit aralıklı örnekler için zaman ekseni: i * sample_interval (bir kez hesaplanıp dilimlenir)."""
+    return np.arange(num_samples, dtype=float) * sample_interval
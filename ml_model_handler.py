@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import time
+import joblib
+import sklearn
+from functools import lru_cache
+from scipy import sparse
 
 # Makine Öğrenmesi için
 from sklearn.model_selection import train_test_split
@@ -10,260 +15,497 @@ from sklearn.metrics import accuracy_score, classification_report
 from sklearn.preprocessing import LabelEncoder # Tanı etiketlerini sayıya çevirmek için
 
 # NLP için
-import nltk
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
 from sklearn.feature_extraction.text import TfidfVectorizer
 
 # Kendi modülümüzü içe aktarıyoruz
 import data_handler
+import clinical_features
+import turkish_text
+import forest_inference
+import feature_cache
 
 # Modelleri kaydedeceğimiz/yükleyeceğimiz dizin
 MODEL_DIR = os.path.join(os.path.dirname(__file__), "models")
 os.makedirs(MODEL_DIR, exist_ok=True)
 
-# NLTK veri setlerini indir (eğer daha önce indirilmediyse)
-try:
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/wordnet')
-    nltk.data.find('tokenizers/punkt_tab')
-except LookupError:
-    print("NLTK veri setleri indiriliyor...")
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('wordnet')
-    nltk.download('punkt_tab')
-    print("NLTK veri setleri indirildi.")
-
-
 # --- NLP Ön İşleme Fonksiyonları ---
-nltk_stopwords = set(stopwords.words('english'))
-lemmatizer = WordNetLemmatizer()
+# Notlar Türkçedir: normalleştirme turkish_text modülündeki yerleşik durma kelimeleri, Türkçe büyük/küçük harf
+# dönüşümü ve ek atma ile yapılır; harici veri seti indirilmez veya okunmaz.
+# Klinik notlar birkaç düzine şablondan geldiği için çok tekrarlıdır:
+# not metni -> işlenmiş metin ve kelime -> kök sonuçları önbellekte tutulur.
+PREPROCESS_CACHE_SIZE = 4096
+TOKEN_CACHE_SIZE = 16384
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _normalize_token(token):
+    """Tek bir kelimenin kökünü döndürür; durma kelimesiyse None döndürür (sonuç önbelleğe alınır)."""
+    return turkish_text.normalize_token(token)
+
+@lru_cache(maxsize=PREPROCESS_CACHE_SIZE)
+def _preprocess_text_cached(text):
+    tokens = turkish_text.tokenize(text) # Türkçe küçük harf, ASCII katlama, noktalama kaldırma ve tokenizasyon
+    # Durma kelimelerini çıkar ve ekleri at
+    processed_tokens = [stem for stem in map(_normalize_token, tokens) if stem is not None]
+    return " ".join(processed_tokens) # Yeniden birleştir
 
 def preprocess_text(text):
     """
-    Klinik notları NLP için ön işler: küçük harfe çevirme, noktalama kaldırma, tokenizasyon,
-    durma kelimelerini çıkarma ve lemmatizasyon.
+    Klinik notları NLP için ön işler: Türkçe küçük harfe çevirme (I/İ), ASCII katlama, noktalama kaldırma,
+    tokenizasyon, durma kelimelerini çıkarma ve ek atma (bkz. turkish_text).
+    Sonuçlar not metnine göre sınırlı bir LRU önbellekte tutulur.
     """
-    if not isinstance(text, str): # Metin olmayan girdileri stringe çevir
+    if not isinstance(text, str): # Metin olmayan girdiler boş metin sayılır
         return ""
-        
-    text = text.lower() # Küçük harfe çevir
-    text = "".join([char for char in text if char.isalnum() or char.isspace()]) # Noktalama işaretlerini kaldır
-    tokens = nltk.word_tokenize(text) # Kelimelere ayır (tokenizasyon)
-    
-    # Durma kelimelerini çıkar ve lemmatizasyon yap
-    processed_tokens = [
-        lemmatizer.lemmatize(word) for word in tokens if word not in nltk_stopwords
-    ]
-    return " ".join(processed_tokens) # Yeniden birleştir
+    return _preprocess_text_cached(text)
+
+def preprocess_texts(texts):
+    """
+    Birden fazla notu ön işler (eğitim ve toplu tahmin için); aynı notlar yalnızca bir kez işlenir.
+    İşlenmiş metinlerin listesini girilen sırayla döndürür.
+    """
+    return [preprocess_text(text) for text in texts]
 
 # --- Akış Eğrisi Özellik Çıkarımı Fonksiyonları ---
+CURVE_FEATURES = ["PeakFlow_Curve", "MeanFlow_Curve", "StdDevFlow_Curve", "SkewnessFlow_Curve", "HasMultiplePeaks_Curve"]
+
+def pad_flow_curves(flow_curves):
+    """
+    Eğri listesini (N, T) matrisine ve uzunluk dizisine çevirir; kısa eğrilerin sonu 0 ile doldurulur.
+    Zaten 2B bir dizi verilirse kopyalanmadan (float64 ise) kullanılır.
+    """
+    if isinstance(flow_curves, np.ndarray) and flow_curves.ndim == 2:
+        return np.asarray(flow_curves, dtype=np.float64), np.full(len(flow_curves), flow_curves.shape[1], dtype=np.int64)
+
+    curves = [np.asarray(c if c is not None else [], dtype=np.float64).reshape(-1) for c in flow_curves]
+    lengths = np.fromiter((len(c) for c in curves), dtype=np.int64, count=len(curves))
+    max_len = int(lengths.max()) if len(lengths) else 0
+    if len(curves) and (lengths == max_len).all():
+        return np.vstack(curves), lengths # Eşit uzunluklu eğriler (en yaygın durum)
+    matrix = np.zeros((len(curves), max_len))
+    for i, curve in enumerate(curves):
+        matrix[i, :len(curve)] = curve
+    return matrix, lengths
+
+def extract_flow_curve_features_batch(flow_curves, lengths=None):
+    """
+    Çok sayıda akış eğrisinin özelliklerini tek seferde, satır boyunca NumPy indirgemeleriyle çıkarır.
+    flow_curves: (N, T) matris veya eğri listesi. lengths verilirse her satırın yalnızca ilk lengths[i] noktası
+    kullanılır (farklı uzunluktaki eğriler maskelenir).
+    (N, 5) dizi döndürür; sütunlar CURVE_FEATURES ve extract_flow_curve_features ile aynıdır.
+    """
+    if lengths is None:
+        matrix, lengths = pad_flow_curves(flow_curves)
+    else:
+        matrix, lengths = np.asarray(flow_curves, dtype=np.float64), np.asarray(lengths, dtype=np.int64)
+    num_curves, num_points = matrix.shape if matrix.ndim == 2 else (len(lengths), 0)
+    features = np.zeros((num_curves, len(CURVE_FEATURES)))
+    if num_points == 0:
+        return features
+
+    valid = np.arange(num_points) < lengths[:, None]
+    has_data = lengths > 0
+    safe_lengths = np.maximum(lengths, 1).astype(np.float64)
+
+    peak_flow = np.where(valid, matrix, -np.inf).max(axis=1)
+    masked = np.where(valid, matrix, 0.0)
+    mean_flow = masked.sum(axis=1) / safe_lengths
+    centered = np.where(valid, matrix - mean_flow[:, None], 0.0)
+    m2 = (centered ** 2).sum(axis=1)
+    m3 = (centered ** 3).sum(axis=1)
+    std_dev_flow = np.sqrt(m2 / safe_lengths)
+
+    # pandas Series.skew ile aynı düzeltilmiş Fisher-Pearson katsayısı (n < 3 ise NaN, sabit eğride 0)
+    m2 = np.where(np.abs(m2) < 1e-14, 0.0, m2)
+    m3 = np.where(np.abs(m3) < 1e-14, 0.0, m3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        skewness_flow = (lengths * np.sqrt(lengths - 1.0) / (lengths - 2.0)) * (m3 / m2 ** 1.5)
+    skewness_flow = np.where(m2 == 0, 0.0, skewness_flow)
+    skewness_flow = np.where(lengths < 3, np.nan, skewness_flow)
+
+    # Tepe sayısı: eğim işaretinin +'dan -'ye döndüğü noktalar (yalnızca geçerli aralıkta)
+    slope_sign = np.sign(np.diff(matrix, axis=1))
+    turning_down = np.diff(slope_sign, axis=1) < 0
+    turning_down &= np.arange(max(num_points - 2, 0)) < (lengths - 2)[:, None]
+    has_multiple_peaks = turning_down.sum(axis=1) > 1
+
+    features[:, 0] = peak_flow
+    features[:, 1] = mean_flow
+    features[:, 2] = std_dev_flow
+    features[:, 3] = skewness_flow
+    features[:, 4] = has_multiple_peaks
+    features[~has_data] = 0 # Boş eğriler için varsayılan değerler
+    return features
+
+def extract_curve_feature_blocks(flow_curves, flow_times):
+    """
+    Eğrileri bir kez (N, T) matrisine çevirip hem temel eğri özelliklerini (CURVE_FEATURES) hem de
+    klinik üroflowmetri özelliklerini (clinical_features.CLINICAL_FEATURES) hesaplar.
+    Örnek aralığı, veri üretimindeki gibi FlowTime / (nokta sayısı - 1) alınır.
+    (N, 5 + klinik özellik sayısı) dizi döndürür.
+    """
+    matrix, lengths = pad_flow_curves(flow_curves)
+    sample_intervals = _ratio_or_zero(np.asarray(flow_times, dtype=np.float64), lengths - 1)
+    return np.hstack([extract_flow_curve_features_batch(matrix, lengths),
+                      clinical_features.compute_clinical_features_batch(matrix, lengths, sample_intervals)])
+
+def _ratio_or_zero(numerator, denominator):
+    """Paydası pozitif olmayan yerlerde 0 veren bölme."""
+    denominator = np.asarray(denominator, dtype=np.float64)
+    return np.divide(numerator, denominator, out=np.zeros(len(denominator)), where=denominator > 0)
+
 def extract_flow_curve_features(flow_curve_data):
     """
     Uroflow akış eğrisinden önemli özellikleri çıkarır.
     Bu özellikler ML modeline girdi olarak kullanılacaktır.
+    (Tek eğri için extract_flow_curve_features_batch'in kısayoludur.)
     """
-    if not flow_curve_data:
+    if flow_curve_data is None or len(flow_curve_data) == 0:
         return [0] * 5 # Boş ise varsayılan değerler döndür
 
-    flow_curve_arr = np.array(flow_curve_data)
-    
-    peak_flow = np.max(flow_curve_arr)
-    mean_flow = np.mean(flow_curve_arr)
-    std_dev_flow = np.std(flow_curve_arr) 
-    skewness_flow = pd.Series(flow_curve_arr).skew() 
-
-    has_multiple_peaks = len(np.where(np.diff(np.sign(np.diff(flow_curve_arr))) < 0)[0]) > 1
-
+    peak_flow, mean_flow, std_dev_flow, skewness_flow, has_multiple_peaks = extract_flow_curve_features_batch([flow_curve_data])[0]
     return [peak_flow, mean_flow, std_dev_flow, skewness_flow, int(has_multiple_peaks)]
 
 
+# --- Model Paketi (Bundle) ---
+# Sınıflandırıcı, TF-IDF vektörleyici, Label Encoder, özellik sütun listesi ve eğitim bilgileri
+# tek bir sürümlü joblib dosyasında saklanır. Dosya sıkıştırılmadan yazılır; böylece içindeki NumPy
+# dizileri joblib'in mmap modunda diskten eşlenir ve aynı paketi yükleyen işçi süreçler bu sayfaları paylaşır.
+# Yüklemede paket, bu modülün ürettiği güncel özellik şemasına karşı doğrulanır.
+MODEL_BUNDLE_FORMAT = "uroflow-model-bundle"
+MODEL_BUNDLE_VERSION = 1
+MODEL_BUNDLE_FILENAME = "uroflow_model_bundle.joblib"
+# Paketten önceki, üç ayrı pickle dosyasından oluşan model biçimi (ilk yüklemede pakete aktarılır)
+LEGACY_MODEL_FILES = {"classifier": "combined_classifier.pkl", "vectorizer": "tfidf_vectorizer.pkl",
+                      "label_encoder": "label_encoder.pkl"}
+
 # --- Global Model ve Vektörleyici Değişkenleri ---
 combined_classifier = None # Hem sayısal hem metinsel hem de eğri özelliklerini kullanacak model
 tfidf_vectorizer = None
 label_encoder = None # Tanı etiketlerini sayıya çevirmek için
+model_feature_columns = None # Modelin beklediği özellik sütunları (eğitimdeki sırayla)
+model_metadata = None # Eğitim bilgileri (tarih, kayıt sayısı, doğruluk, sürümler)
+_model_column_positions = None # Üretilen tam özellik matrisinde model sütunlarının konumları
+flat_forest = None # Sınıflandırıcının düz dizi kopyası; tahmin scikit-learn çağırmadan bununla yapılır
+
+def model_bundle_path():
+    return os.path.join(MODEL_DIR, MODEL_BUNDLE_FILENAME)
 
-def train_and_save_models():
+def feature_schema(num_tfidf_features):
+    """Bu modülün ürettiği tam özellik matrisinin sütun adları (sayısal, eğri, klinik, tfidf_*)."""
+    return NUMERIC_FEATURES + CURVE_FEATURES + clinical_features.CLINICAL_FEATURES + \
+           [f"tfidf_{i}" for i in range(num_tfidf_features)]
+
+def save_model_bundle(classifier, vectorizer, encoder, feature_columns, metadata, path=None):
     """
-    Sentetik veriyi kullanarak birleşik sınıflandırma modelini,
-    TF-IDF vektörleyiciyi ve Label Encoder'ı eğitir ve diske kaydeder.
+    Modelleri ve şemayı tek bir sürümlü paket olarak (sıkıştırmasız, mmap ile yüklenebilir) kaydeder.
+    Sınıflandırıcının düz düğüm dizileri (forest_inference.export_forest) de pakete yazılır.
     """
-    global combined_classifier, tfidf_vectorizer, label_encoder
+    bundle = {
+        "format": MODEL_BUNDLE_FORMAT,
+        "version": MODEL_BUNDLE_VERSION,
+        "classifier": classifier,
+        "vectorizer": vectorizer,
+        "label_encoder": encoder,
+        "feature_columns": list(feature_columns),
+        "metadata": dict(metadata),
+        "forest_arrays": forest_inference.export_forest(classifier),
+    }
+    path = path or model_bundle_path()
+    tmp_path = path + ".tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, path) # Yarım kalan yazma mevcut paketi bozmasın
+    return path
 
+def validate_model_bundle(bundle):
+    """
+    Paketi güncel özellik şemasına karşı doğrular. Sorun yoksa None, varsa açıklama döndürür:
+    biçim/sürüm, eksik parçalar, sınıflandırıcının sütunları ile paketteki sütun listesinin uyumu,
+    sütunların bu modülün ürettiği şemada bulunması ve sınıf etiketlerinin uyumu kontrol edilir.
+    """
+    if not isinstance(bundle, dict) or bundle.get("format") != MODEL_BUNDLE_FORMAT:
+        return "Dosya bir model paketi değil."
+    if bundle.get("version") != MODEL_BUNDLE_VERSION:
+        return f"Paket sürümü desteklenmiyor ({bundle.get('version')}, beklenen {MODEL_BUNDLE_VERSION})."
+    missing_parts = [key for key in ("classifier", "vectorizer", "label_encoder", "feature_columns", "metadata")
+                     if bundle.get(key) is None]
+    if missing_parts:
+        return f"Pakette eksik parçalar: {', '.join(missing_parts)}"
+
+    feature_columns = list(bundle["feature_columns"])
+    classifier_columns = getattr(bundle["classifier"], "feature_names_in_", None)
+    if classifier_columns is not None and list(classifier_columns) != feature_columns:
+        return "Sınıflandırıcının sütunları paketteki sütun listesiyle uyuşmuyor."
+    if getattr(bundle["classifier"], "n_features_in_", len(feature_columns)) != len(feature_columns):
+        return "Sınıflandırıcının özellik sayısı paketteki sütun listesiyle uyuşmuyor."
+    unknown_columns = set(feature_columns) - set(feature_schema(len(bundle["vectorizer"].vocabulary_)))
+    if unknown_columns:
+        return f"Güncel özellik şemasında olmayan sütunlar: {', '.join(sorted(unknown_columns))}"
+    if len(bundle["label_encoder"].classes_) != len(bundle["classifier"].classes_):
+        return "Label Encoder sınıfları sınıflandırıcıyla uyuşmuyor."
+    forest_arrays = bundle.get("forest_arrays")
+    if forest_arrays is not None and (forest_arrays.get("n_features") != len(feature_columns) or
+                                      forest_arrays["value"].shape[1] != len(bundle["classifier"].classes_)):
+        return "Düz orman dizileri sınıflandırıcıyla uyuşmuyor."
+    return None
+
+def _set_active_models(bundle):
+    """Doğrulanmış paketi modülün etkin modelleri yapar ve sütun konumlarını bir kez hesaplar."""
+    global combined_classifier, tfidf_vectorizer, label_encoder, model_feature_columns, model_metadata, \
+        _model_column_positions, flat_forest
+    combined_classifier = bundle["classifier"]
+    tfidf_vectorizer = bundle["vectorizer"]
+    label_encoder = bundle["label_encoder"]
+    model_feature_columns = list(bundle["feature_columns"])
+    model_metadata = bundle["metadata"]
+    positions = {name: i for i, name in enumerate(feature_schema(len(tfidf_vectorizer.vocabulary_)))}
+    _model_column_positions = np.array([positions[name] for name in model_feature_columns], dtype=np.int64)
+    # Eski paketlerde düz diziler yoksa sınıflandırıcıdan bir kez üretilir
+    forest_arrays = bundle.get("forest_arrays")
+    flat_forest = forest_inference.FlatForest(forest_arrays) if forest_arrays is not None \
+        else forest_inference.FlatForest.from_sklearn(combined_classifier)
+
+def _migrate_legacy_models():
+    """
+    Eski üç ayrı pickle dosyasını (varsa) tek seferlik olarak model paketine aktarır.
+    Sütun listesi sınıflandırıcının feature_names_in_ bilgisinden alınır. Paket yolunu veya None döndürür.
+    """
+    legacy_paths = {key: os.path.join(MODEL_DIR, name) for key, name in LEGACY_MODEL_FILES.items()}
+    if not all(os.path.exists(path) for path in legacy_paths.values()):
+        return None
+    loaded = {}
+    for key, path in legacy_paths.items():
+        with open(path, 'rb') as f:
+            loaded[key] = pickle.load(f)
+    feature_columns = getattr(loaded["classifier"], "feature_names_in_", None)
+    if feature_columns is None:
+        print("Uyarı: Eski model sütun adlarını içermiyor; pakete aktarılamadı.")
+        return None
+    metadata = {"migrated_from": sorted(LEGACY_MODEL_FILES.values()), "sklearn_version": sklearn.__version__,
+                "classes": list(loaded["label_encoder"].classes_)}
+    path = save_model_bundle(loaded["classifier"], loaded["vectorizer"], loaded["label_encoder"],
+                             feature_columns, metadata)
+    print(f"Eski model dosyaları '{MODEL_BUNDLE_FILENAME}' paketine aktarıldı.")
+    return path
+
+# --- Eğitim Özellik Önbelleği ---
+# Her kayıt için eğri + klinik özellik satırı ve ön işlenmiş not, kayıt içeriğinin özetine (hash) göre diskte saklanır;
+# yeniden eğitimde yalnızca yeni veya değişmiş kayıtlar hesaplanır. TF-IDF sözlüğü tüm notlara bağlı olduğu için
+# önbelleğe alınmaz, her eğitimde (ucuz olan) işlenmiş notlardan yeniden kurulur.
+FEATURE_CACHE_FILENAME = "feature_cache.npz"
+# Eğri/klinik özellik hesaplaması değişince artırılmalıdır (eski önbellek otomatik olarak yok sayılır).
+# Not normalleştiricisinin (turkish_text) ayarları etikete özet olarak zaten katılır.
+FEATURE_CACHE_VERSION = 1
+
+def _feature_cache_tag():
+    return (f"v{FEATURE_CACHE_VERSION}:text-{turkish_text.config_digest()}:"
+            + ",".join(CURVE_FEATURES + clinical_features.CLINICAL_FEATURES))
+
+def featurize_records(df, use_cache=True):
+    """
+    Kayıtların eğri + klinik özellik bloğunu (N, 15) ve ön işlenmiş notlarını döndürür:
+    (özellik_bloğu, işlenmiş_notlar, yeniden_hesaplanan_satır_sayısı).
+    use_cache=True ise önbellekte bulunan satırlar diskten okunur, yalnızca kalanlar hesaplanıp önbelleğe eklenir.
+    """
+    flow_curves = df["FlowCurve"].tolist()
+    if not use_cache:
+        return (extract_curve_feature_blocks(flow_curves, df["FlowTime"]),
+                preprocess_texts(df["ClinicalNotes"]), len(df))
+
+    num_features = len(CURVE_FEATURES) + len(clinical_features.CLINICAL_FEATURES)
+    cache = feature_cache.FeatureCache(os.path.join(MODEL_DIR, FEATURE_CACHE_FILENAME), _feature_cache_tag(), num_features)
+    keys = feature_cache.row_content_keys(df["FlowTime"].to_numpy(), df["ClinicalNotes"].tolist(), flow_curves)
+    pruned = cache.prune(keys) # Güncel veri setinde olmayan eski satırlar atılır
+    cached_rows = cache.lookup(keys)
+    missing = np.flatnonzero(cached_rows < 0)
+    if len(missing):
+        missing_df = df.iloc[missing]
+        cache.add(keys[missing],
+                  extract_curve_feature_blocks([flow_curves[i] for i in missing], missing_df["FlowTime"]),
+                  preprocess_texts(missing_df["ClinicalNotes"]))
+    if len(missing) or pruned:
+        cache.save()
+        cached_rows = cache.lookup(keys)
+    return cache.features[cached_rows], cache.notes[cached_rows].tolist(), len(missing)
+
+def train_and_save_models(use_cache=True):
+    """
+    Sentetik veriyi kullanarak birleşik sınıflandırma modelini,
+    TF-IDF vektörleyiciyi ve Label Encoder'ı eğitir; sütun listesi ve eğitim bilgileriyle birlikte
+    tek bir model paketi olarak diske kaydeder ve etkin model yapar.
+    Kayıt özellikleri önbellekten okunur (yalnızca yeni kayıtlar hesaplanır); TF-IDF matrisi seyrek kalır
+    ve orman tüm çekirdeklerde (n_jobs=-1) eğitilir.
+    """
     df = data_handler.load_data_from_csv()
     if df is None:
         print("Model eğitimi için veri bulunamadı. Lütfen önce veri oluşturun.")
         return False
 
     print("Modeller eğitiliyor...")
+    start_time = time.perf_counter()
 
     # --- Özellik Mühendisliği ---
-    # 1. Sayısal Özellikler
-    numeric_features = ["Qmax", "Qave", "Volume", "FlowTime"]
-    X_numeric = df[numeric_features] # X_numeric burada tanımlanıyor
-    
-    # 2. Metin Özellikleri (NLP Ön İşleme)
-    df['ProcessedNotes'] = df['ClinicalNotes'].apply(preprocess_text)
-    X_text = df['ProcessedNotes'] # X_text burada tanımlanıyor
-    
-    # 3. Akış Eğrisi Özellikleri
-    flow_curve_features_df = pd.DataFrame(df['FlowCurve'].apply(extract_flow_curve_features).tolist(),
-                                         columns=["PeakFlow_Curve", "MeanFlow_Curve", 
-                                                  "StdDevFlow_Curve", "SkewnessFlow_Curve", "HasMultiplePeaks_Curve"])
-    # Orijinal DataFrame ile birleştir (df'i güncelleyerek)
-    df_combined_features = pd.concat([df, flow_curve_features_df], axis=1) # Yeni bir DataFrame oluşturmak daha güvenli
+    # 1-2. Akış eğrisi (temel + klinik) özellikleri ve ön işlenmiş notlar (satır önbelleğiyle)
+    curve_block, processed_notes, num_featurized = featurize_records(df, use_cache)
+    print(f"Özellikler: {len(df) - num_featurized} kayıt önbellekten okundu, {num_featurized} kayıt hesaplandı "
+          f"({time.perf_counter() - start_time:.2f} sn).")
 
+    # 3. TF-IDF vektörleyiciyi eğit; metin özellikleri seyrek (sparse) matris olarak kalır
+    vectorizer = TfidfVectorizer(max_features=500)
+    X_text_tfidf = vectorizer.fit_transform(processed_notes)
 
-    # Tüm özellikleri birleştiriyoruz
-    # X_features_for_combined: Sayısal ve eğri özelliklerini içeren DataFrame
-    X_features_for_combined = df_combined_features[numeric_features + list(flow_curve_features_df.columns)] 
-    
-    # TF-IDF vektörleyiciyi eğit ve metin özelliklerini sayısal hale getir
-    tfidf_vectorizer = TfidfVectorizer(max_features=500) 
-    tfidf_vectorizer.fit(X_text) 
-    X_text_tfidf = tfidf_vectorizer.transform(X_text) # Sparse matris
-    
-    # Sparse matrisi Dense DataFrame'e çevir
-    X_text_tfidf_df = pd.DataFrame(X_text_tfidf.toarray(), 
-                                   columns=[f"tfidf_{i}" for i in range(X_text_tfidf.shape[1])])
-    
-    # Sayısal ve metinsel özellikleri yatay olarak birleştir
-    X_combined = pd.concat([X_features_for_combined, X_text_tfidf_df], axis=1) # X_combined burada tanımlanıyor
+    # Sayısal, eğri/klinik ve TF-IDF özelliklerini şema sırasıyla tek bir seyrek (CSR) matriste birleştir
+    dense_part = np.hstack([df[NUMERIC_FEATURES].to_numpy(dtype=float), curve_block])
+    X_combined = sparse.hstack([sparse.csr_matrix(dense_part), X_text_tfidf], format="csr")
+    feature_columns = feature_schema(X_text_tfidf.shape[1])
 
     # Hedef değişkeni (Diagnosis) sayısal etiketlere çevir
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(df["Diagnosis"]) # Diagnosis sütunu df içinde olmalı
+    encoder = LabelEncoder()
+    y_encoded = encoder.fit_transform(df["Diagnosis"]) # Diagnosis sütunu df içinde olmalı
     
     # Veriyi eğitim ve test setlerine ayır
     X_train, X_test, y_train, y_test = train_test_split(
         X_combined, y_encoded, test_size=0.3, random_state=42, stratify=y_encoded
     )
 
-    # --- Birleşik Sınıflandırıcı Eğitimi ---
-    combined_classifier = RandomForestClassifier(n_estimators=100, random_state=42)
-    combined_classifier.fit(X_train, y_train)
+    # --- Birleşik Sınıflandırıcı Eğitimi (tüm çekirdeklerde) ---
+    classifier = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1)
+    classifier.fit(X_train, y_train)
+    # Kayıtlı model tahminde iş parçacığı havuzu açmasın; ağaç olasılıkları da her zaman aynı sırayla toplanır
+    classifier.set_params(n_jobs=None)
 
     # Model performansını değerlendir (sadece bilgi amaçlı)
-    y_pred = combined_classifier.predict(X_test)
-    print(f"Birleşik Model Doğruluğu: {accuracy_score(y_test, y_pred):.2f}")
-
-    # Modelleri ve LabelEncoder'ı kaydet
-    model_path = os.path.join(MODEL_DIR, "combined_classifier.pkl")
-    vectorizer_path = os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl")
-    encoder_path = os.path.join(MODEL_DIR, "label_encoder.pkl")
-
-    with open(model_path, 'wb') as f:
-        pickle.dump(combined_classifier, f)
-    with open(vectorizer_path, 'wb') as f:
-        pickle.dump(tfidf_vectorizer, f)
-    with open(encoder_path, 'wb') as f:
-        pickle.dump(label_encoder, f)
-
-    print(f"Modeller ve Label Encoder '{MODEL_DIR}' konumuna kaydedildi.")
+    y_pred = classifier.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
+    print(f"Birleşik Model Doğruluğu: {accuracy:.2f} (toplam eğitim süresi {time.perf_counter() - start_time:.2f} sn)")
+
+    # Modelleri, sütun listesini ve eğitim bilgilerini tek pakette kaydet
+    metadata = {
+        "trained_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "num_records": int(len(df)),
+        "num_features": int(X_combined.shape[1]),
+        "test_accuracy": float(accuracy),
+        "classes": list(encoder.classes_),
+        "sklearn_version": sklearn.__version__,
+        "text_preprocessing": "turkish_text",
+    }
+    bundle_path = save_model_bundle(classifier, vectorizer, encoder, feature_columns, metadata)
+    _set_active_models(joblib.load(bundle_path, mmap_mode="r"))
+
+    print(f"Model paketi '{bundle_path}' konumuna kaydedildi.")
     return True
 
 def load_models():
     """
-    Diskteki kayıtlı modelleri (birleşik sınıflandırıcı, TF-IDF vektörleyici, Label Encoder) yükler.
+    Model paketini (birleşik sınıflandırıcı, TF-IDF vektörleyici, Label Encoder, sütun listesi) joblib mmap
+    moduyla yükler ve güncel özellik şemasına karşı doğrular. Paket yoksa eski pickle dosyaları pakete aktarılır.
     """
-    global combined_classifier, tfidf_vectorizer, label_encoder
-    
-    model_path = os.path.join(MODEL_DIR, "combined_classifier.pkl")
-    vectorizer_path = os.path.join(MODEL_DIR, "tfidf_vectorizer.pkl")
-    encoder_path = os.path.join(MODEL_DIR, "label_encoder.pkl")
-
-    if (os.path.exists(model_path) and 
-        os.path.exists(vectorizer_path) and 
-        os.path.exists(encoder_path)):
-        with open(model_path, 'rb') as f:
-            combined_classifier = pickle.load(f)
-        with open(vectorizer_path, 'rb') as f:
-            tfidf_vectorizer = pickle.load(f)
-        with open(encoder_path, 'rb') as f:
-            label_encoder = pickle.load(f)
-        print("Modeller başarıyla yüklendi.")
-        return True
-    else:
+    path = model_bundle_path()
+    if not os.path.exists(path) and _migrate_legacy_models() is None:
         print("Model dosyaları bulunamadı. Lütfen önce modelleri eğitin.")
         return False
 
-def predict_uroflow_diagnosis(qmax, qave, volume, flow_time, clinical_notes, flow_curve_data):
+    try:
+        bundle = joblib.load(path, mmap_mode="r")
+    except Exception as e: # Bozuk veya farklı kütüphane sürümüyle yazılmış paket
+        print(f"Uyarı: Model paketi okunamadı ({e}). Lütfen modelleri yeniden eğitin.")
+        return False
+    error = validate_model_bundle(bundle)
+    if error:
+        print(f"Uyarı: Model paketi geçersiz ({error}). Lütfen modelleri yeniden eğitin.")
+        return False
+
+    _set_active_models(bundle)
+    print("Modeller başarıyla yüklendi.")
+    return True
+
+NUMERIC_FEATURES = ["Qmax", "Qave", "Volume", "FlowTime"]
+
+# Metin analizi anahtar kelimeleri; notlarla aynı ön işlemeden geçirilerek köklerine indirilir
+# (örn. "zorlanma" ve "zorlanıyor" -> "zorlan", "Sıkışma" -> "sikis").
+TEXT_ANALYSIS_KEYWORDS = [
+    ("Klinik Notlar Obstrüktif Belirtiler İçeriyor.", ["zorlanma", "zayıf", "kesik"]),
+    ("Klinik Notlar Disfonksiyonel Belirtiler İçeriyor.", ["ani", "sıkışma", "tutamama"]),
+    ("Klinik Notlar Normal Belirtiler İçeriyor.", ["normal", "şikayet yok", "iyi"]),
+]
+_TEXT_ANALYSIS_PATTERNS = [(message, [f" {preprocess_text(keyword)} " for keyword in keywords])
+                           for message, keywords in TEXT_ANALYSIS_KEYWORDS]
+
+def _text_analysis_info(processed_note):
+    """Ön işlenmiş klinik nottaki anahtar kelimelere göre kısa bir metin analizi açıklaması döndürür (manuel kontrol)."""
+    if processed_note.strip() == "":
+        return "Klinik Not Girilmedi."
+    padded_note = f" {processed_note} " # Anahtar kelimeler tam kelime (kök) olarak aranır
+    for message, patterns in _TEXT_ANALYSIS_PATTERNS:
+        if any(pattern in padded_note for pattern in patterns):
+            return message
+    return "Klinik Notlar Analiz Edildi."
+
+def _build_feature_matrix(numeric_values, curve_features, processed_notes):
     """
-    Yeni bir hasta verisi için uroflow tanısını tahmin eder.
-    Tüm veri türlerini (sayısal, metinsel, eğri) kullanır.
+    Sayısal, eğri ve TF-IDF özelliklerini tam şema sırasıyla (sayısal, eğri, klinik, tfidf_*) tek bir seyrek (CSR)
+    matriste birleştirir ve model paketindeki sütun listesine göre seçip sıralar; böylece yeni özellikler
+    eklenmeden önce eğitilmiş modeller de çalışmaya devam eder. TF-IDF kısmı yoğun (dense) hale getirilmez.
     """
-    global combined_classifier, tfidf_vectorizer, label_encoder
+    dense_part = np.hstack([np.asarray(numeric_values, dtype=float), np.asarray(curve_features, dtype=float)])
+    text_part = tfidf_vectorizer.transform(processed_notes)
+    X_input = sparse.hstack([sparse.csr_matrix(dense_part), text_part], format="csr")
+    return X_input[:, _model_column_positions]
 
+def predict_uroflow_diagnosis_batch(patients):
+    """
+    Birden fazla hasta için tanıyı tek seferde tahmin eder.
+    patients: Qmax, Qave, Volume, FlowTime, ClinicalNotes ve FlowCurve sütunlarını içeren bir DataFrame
+    (veya aynı anahtarlara sahip dizi sözlüğü).
+    Tüm hastalar için tek bir özellik matrisi kurulur ve olasılıklar ormanın düz dizi kopyasıyla (forest_inference)
+    tek seferde hesaplanır; sonuçlar scikit-learn predict_proba ile aynıdır. Etiket argmax'tan türetilir.
+    (sonuçlar, hata) döndürür; sonuçlar şu vektörel alanları içerir:
+        predicted_diagnosis (N,), probabilities (N, sınıf), classes, text_analysis_info (N,)
+    """
     if combined_classifier is None or tfidf_vectorizer is None or label_encoder is None:
         print("Modeller yüklenmedi. Tahmin yapılamıyor.")
+        return None, "Modeller Yüklü Değil"
+
+    patients = pd.DataFrame(patients)
+    missing_columns = [col for col in NUMERIC_FEATURES + ["ClinicalNotes", "FlowCurve"] if col not in patients.columns]
+    if missing_columns:
+        return None, f"Eksik sütunlar: {', '.join(missing_columns)}"
+
+    processed_notes = preprocess_texts(patients["ClinicalNotes"])
+    curve_features = extract_curve_feature_blocks(patients["FlowCurve"].tolist(), patients["FlowTime"])
+    X_input = _build_feature_matrix(patients[NUMERIC_FEATURES].to_numpy(), curve_features, processed_notes)
+
+    probabilities = flat_forest.predict_proba(X_input)
+
+    predicted_encoded = combined_classifier.classes_[np.argmax(probabilities, axis=1)]
+    return {
+        "predicted_diagnosis": label_encoder.inverse_transform(predicted_encoded),
+        "probabilities": probabilities,
+        "classes": list(label_encoder.classes_),
+        "text_analysis_info": np.array([_text_analysis_info(note) for note in processed_notes], dtype=object),
+    }, None
+
+def predict_uroflow_diagnosis(qmax, qave, volume, flow_time, clinical_notes, flow_curve_data):
+    """
+    Yeni bir hasta verisi için uroflow tanısını tahmin eder.
+    Tüm veri türlerini (sayısal, metinsel, eğri) kullanır; tek satırlık bir toplu tahmindir.
+    """
+    results, error = predict_uroflow_diagnosis_batch({
+        "Qmax": [qmax], "Qave": [qave], "Volume": [volume], "FlowTime": [flow_time],
+        "ClinicalNotes": [clinical_notes], "FlowCurve": [flow_curve_data],
+    })
+    if error:
         return {
-            "predicted_diagnosis": "Model Hatası: Modeller Yüklü Değil",
+            "predicted_diagnosis": f"Model Hatası: {error}",
             "text_analysis_info": "Model Hatası",
             "probabilities": {}
         }
 
-    # --- 1. Yeni veriden özellik çıkarma ---
-    # Sayısal özellikler
-    numeric_input_df = pd.DataFrame([[qmax, qave, volume, flow_time]], 
-                                 columns=["Qmax", "Qave", "Volume", "FlowTime"])
-    
-    # Metinsel özellikler (NLP ön işleme)
-    processed_note = preprocess_text(clinical_notes)
-    text_vector = tfidf_vectorizer.transform([processed_note])
-    text_input_df = pd.DataFrame(text_vector.toarray(), 
-                                 columns=[f"tfidf_{i}" for i in range(text_vector.shape[1])])
-
-    # Akış eğrisi özellikleri
-    flow_curve_features = extract_flow_curve_features(flow_curve_data)
-    flow_curve_input_df = pd.DataFrame([flow_curve_features],
-                                       columns=["PeakFlow_Curve", "MeanFlow_Curve", 
-                                                "StdDevFlow_Curve", "SkewnessFlow_Curve", "HasMultiplePeaks_Curve"])
-
-    # Tüm özellikleri birleştir
-    # predict_uroflow_diagnosis çağrılırken, tfidf_vectorizer'ın fit olduğu sütunları bekler.
-    # Eğer tfidf_vectorizer 500 kelimeyle eğitildiyse, text_input_df'in de 500 sütunu olmalı.
-    # Bunu sağlamanın en güvenli yolu, eğitilmiş tfidf_vectorizer'dan feature_names_in_ özelliğini kullanmaktır.
-    
-    # Tüm özellik sütunlarını oluşturmak için birleştirilmiş DataFrame'in sütunlarını al
-    # Bu, eğitim setindeki sütun sıralamasına ve sayısına uyumu sağlar.
-    
-    # İlk olarak, tahmin için girdi olacak DataFrame'i manuel olarak oluşturalım,
-    # ve eğitim setindeki sütunlara uygun hale getirelim.
-    # Bu, train_and_save_models içinde X_combined'ın sütun adlarını bir yere kaydetmeyi gerektirebilir.
-    # Şimdilik, sadece sırayı koruyarak birleştirme yapıyoruz.
-    X_input_combined = pd.concat([numeric_input_df, flow_curve_input_df, text_input_df], axis=1)
-
-    # ÖNEMLİ NOT: Tahmin yaparken, girdi DataFrame'inin sütunları, modelin eğitildiği
-    # DataFrame'in sütunları ve sıralaması ile birebir aynı olmalıdır.
-    # Bu projede, sütunların her zaman aynı sırayla eklendiğini varsaydık.
-    # Daha sağlam bir sistemde, eğitilmiş modelle birlikte sütun adları da kaydedilip yüklenmelidir.
-
-    # --- 2. Tahmin yapma ---
-    predicted_encoded = combined_classifier.predict(X_input_combined)[0]
-    predicted_diagnosis = label_encoder.inverse_transform([predicted_encoded])[0]
-
-    # --- 3. Klinik not analizi için ek bilgi (manuel kontrol) ---
-    text_analysis_info = ""
-    if processed_note.strip() == "":
-        text_analysis_info = "Klinik Not Girilmedi."
-    elif "zorlanma" in processed_note or "zayif" in processed_note or "kesik" in processed_note:
-        text_analysis_info = "Klinik Notlar Obstrüktif Belirtiler İçeriyor."
-    elif "ani" in processed_note or "sikisma" in processed_note or "tutamama" in processed_note:
-        text_analysis_info = "Klinik Notlar Disfonksiyonel Belirtiler İçeriyor."
-    elif "normal" in processed_note or "sikayet yok" in processed_note or "iyi" in processed_note:
-        text_analysis_info = "Klinik Notlar Normal Belirtiler İçeriyor."
-    else:
-        text_analysis_info = "Klinik Notlar Analiz Edildi."
-
     # Modelin güven skorunu da ekleyebiliriz (olasılıklar)
-    prediction_probabilities = combined_classifier.predict_proba(X_input_combined)[0]
-    prob_dict = {label: f"{prob:.2f}" for label, prob in zip(label_encoder.classes_, prediction_probabilities)}
+    prob_dict = {label: f"{prob:.2f}" for label, prob in zip(results["classes"], results["probabilities"][0])}
     
     return {
-        "predicted_diagnosis": predicted_diagnosis,
-        "text_analysis_info": text_analysis_info,
+        "predicted_diagnosis": results["predicted_diagnosis"][0],
+        "text_analysis_info": results["text_analysis_info"][0],
         "probabilities": prob_dict
     }
 
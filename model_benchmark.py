@@ -0,0 +1,186 @@
+import time
+import json
+import pickle
+import operator
+import argparse
+
+import numpy as np
+from scipy import sparse
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, MaxAbsScaler, FunctionTransformer
+from sklearn.pipeline import make_pipeline
+from sklearn.metrics import accuracy_score, precision_recall_fscore_support
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import data_handler
+import ml_model_handler
+import forest_inference
+
+# --- Çapraz Doğrulamalı Model Karşılaştırması ---
+# Birleşik özellik seti (sayısal + eğri/klinik + TF-IDF) üzerinde k katlı tabakalı çapraz doğrulama yapılır.
+# Her (model çeşidi, kat) çifti ayrı bir iş olarak paralel çalışır; TF-IDF her katta yalnızca eğitim notlarından
+# kurulur (test notları sözlüğe sızmaz). Her çeşit için tanı başına doğruluk/F1, eğitim süresi,
+# model boyutu (pickle baytı) ve tek satır / toplu tahmin gecikmesi raporlanır.
+# RandomForest çeşitlerinde düz dizi motorunun (forest_inference) tek satır gecikmesi de ölçülür.
+
+LATENCY_REPEAT = 50 # Tek satır gecikmesi bu kadar tekrarın ortancasıdır
+
+
+# Çeşit adı -> tahminci üreten fonksiyon. Tüm çeşitler aynı seyrek (CSR) özellik matrisini alır.
+# Boru hattı adımları modül içi fonksiyon kullanmaz: model boyutu işçi süreçte pickle ile ölçülür ve orada
+# __main__ bu modül değildir (operator.methodcaller her yerden içe aktarılabilir).
+MODEL_VARIANTS = {
+    "rf_50": lambda: RandomForestClassifier(n_estimators=50, random_state=42),
+    "rf_100": lambda: RandomForestClassifier(n_estimators=100, random_state=42),
+    "rf_300": lambda: RandomForestClassifier(n_estimators=300, random_state=42),
+    "gradient_boosting": lambda: make_pipeline(
+        FunctionTransformer(operator.methodcaller("toarray"), accept_sparse=True),
+        HistGradientBoostingClassifier(random_state=42)),
+    "linear_tfidf": lambda: make_pipeline(MaxAbsScaler(), LogisticRegression(max_iter=2000)),
+}
+
+
+def load_benchmark_data():
+    """Veri setini yükler; (sayısal+eğri yoğun blok, işlenmiş notlar, kodlanmış etiketler, sınıf adları) döndürür."""
+    df = data_handler.load_data_from_csv()
+    if df is None:
+        return None
+    curve_block, processed_notes, _ = ml_model_handler.featurize_records(df)
+    dense_part = np.hstack([df[ml_model_handler.NUMERIC_FEATURES].to_numpy(dtype=float), curve_block])
+    encoder = LabelEncoder()
+    labels = encoder.fit_transform(df["Diagnosis"])
+    return dense_part, np.asarray(processed_notes, dtype=object), labels, list(encoder.classes_)
+
+
+def _fold_matrices(dense_part, notes, train_idx, test_idx):
+    """TF-IDF'i yalnızca eğitim katından kurar; (X_train, X_test) seyrek matrislerini döndürür."""
+    vectorizer = TfidfVectorizer(max_features=500)
+    text_train = vectorizer.fit_transform(notes[train_idx])
+    text_test = vectorizer.transform(notes[test_idx])
+    X_train = sparse.hstack([sparse.csr_matrix(dense_part[train_idx]), text_train], format="csr")
+    X_test = sparse.hstack([sparse.csr_matrix(dense_part[test_idx]), text_test], format="csr")
+    return X_train, X_test
+
+
+def _median_latency(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def evaluate_fold(variant, fold, dense_part, notes, labels, train_idx, test_idx, num_classes):
+    """Tek bir (çeşit, kat) işini çalıştırır ve ölçümleri sözlük olarak döndürür."""
+    X_train, X_test = _fold_matrices(dense_part, notes, train_idx, test_idx)
+    model = MODEL_VARIANTS[variant]()
+
+    start = time.perf_counter()
+    model.fit(X_train, labels[train_idx])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = model.predict_proba(X_test).argmax(axis=1)
+    batch_time = time.perf_counter() - start
+
+    precision, recall, f1, support = precision_recall_fscore_support(
+        labels[test_idx], predicted, labels=np.arange(num_classes), zero_division=0)
+    result = {
+        "variant": variant,
+        "fold": fold,
+        "accuracy": float(accuracy_score(labels[test_idx], predicted)),
+        "class_recall": recall.tolist(), # Tanı başına doğruluk (o tanıdaki kayıtların doğru bilinme oranı)
+        "class_f1": f1.tolist(),
+        "fit_time_s": fit_time,
+        "model_size_kb": len(pickle.dumps(model)) / 1024,
+        "batch_latency_ms": batch_time * 1e3,
+        "batch_rows": int(len(test_idx)),
+        "single_latency_ms": _median_latency(lambda: model.predict_proba(X_test[:1]), LATENCY_REPEAT) * 1e3,
+        "flat_single_latency_ms": None,
+    }
+    if isinstance(model, RandomForestClassifier):
+        flat_forest = forest_inference.FlatForest.from_sklearn(model)
+        result["flat_single_latency_ms"] = _median_latency(lambda: flat_forest.predict_proba(X_test[:1]),
+                                                           LATENCY_REPEAT) * 1e3
+    return result
+
+
+def run_benchmark(variants=None, folds=5, n_jobs=-1, seed=42):
+    """
+    Seçilen çeşitleri k katlı tabakalı çapraz doğrulamayla paralel olarak değerlendirir.
+    (kat sonuçlarının listesi, sınıf adları) döndürür; veri yoksa (None, None).
+    """
+    loaded = load_benchmark_data()
+    if loaded is None:
+        print("Karşılaştırma için veri bulunamadı. Lütfen önce veri oluşturun.")
+        return None, None
+    dense_part, notes, labels, class_names = loaded
+    variants = variants or list(MODEL_VARIANTS)
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=seed).split(dense_part, labels))
+
+    print(f"{len(labels)} kayıt, {folds} kat, {len(variants)} çeşit ({len(variants) * folds} iş) değerlendiriliyor...")
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(variant, fold, dense_part, notes, labels, train_idx, test_idx, len(class_names))
+        for variant in variants for fold, (train_idx, test_idx) in enumerate(splits))
+    return results, class_names
+
+
+def summarize(results, class_names):
+    """Kat sonuçlarını çeşit başına ortalama (± standart sapma) olarak toplar."""
+    summary = {}
+    for variant in dict.fromkeys(r["variant"] for r in results):
+        rows = [r for r in results if r["variant"] == variant]
+        mean = lambda key: float(np.mean([r[key] for r in rows]))
+        flat_latencies = [r["flat_single_latency_ms"] for r in rows if r["flat_single_latency_ms"] is not None]
+        summary[variant] = {
+            "accuracy": mean("accuracy"),
+            "accuracy_std": float(np.std([r["accuracy"] for r in rows])),
+            "class_accuracy": dict(zip(class_names, np.mean([r["class_recall"] for r in rows], axis=0).tolist())),
+            "class_f1": dict(zip(class_names, np.mean([r["class_f1"] for r in rows], axis=0).tolist())),
+            "fit_time_s": mean("fit_time_s"),
+            "model_size_kb": mean("model_size_kb"),
+            "single_latency_ms": mean("single_latency_ms"),
+            "batch_latency_ms": mean("batch_latency_ms"),
+            "batch_rows": int(np.mean([r["batch_rows"] for r in rows])),
+            "flat_single_latency_ms": float(np.mean(flat_latencies)) if flat_latencies else None,
+        }
+    return summary
+
+
+def print_summary(summary, class_names):
+    header = (f"{'Çeşit':<18}{'Doğruluk':>16}" + "".join(f"{'F1 ' + name[:10]:>16}" for name in class_names) +
+              f"{'Eğitim (sn)':>13}{'Boyut (KB)':>12}{'Tek (ms)':>10}{'Düz (ms)':>10}{'Toplu (ms)':>12}")
+    print(header)
+    print("-" * len(header))
+    for variant, row in summary.items():
+        flat = f"{row['flat_single_latency_ms']:.3f}" if row["flat_single_latency_ms"] is not None else "-"
+        print(f"{variant:<18}{row['accuracy']:>10.3f} ±{row['accuracy_std']:.3f}" +
+              "".join(f"{row['class_f1'][name]:>16.3f}" for name in class_names) +
+              f"{row['fit_time_s']:>13.2f}{row['model_size_kb']:>12.0f}{row['single_latency_ms']:>10.3f}"
+              f"{flat:>10}{row['batch_latency_ms']:>12.2f}")
+    any_row = next(iter(summary.values()), None)
+    if any_row:
+        print(f"Toplu gecikme, bir test katının tamamı (~{any_row['batch_rows']} satır) içindir. "
+              f"Tanı başına doğruluk (duyarlılık) --output ile yazılan JSON'dadır.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model çeşitlerini çapraz doğrulamayla karşılaştırır (kalite ve hız).")
+    parser.add_argument("--variants", nargs="+", choices=list(MODEL_VARIANTS), help="Değerlendirilecek çeşitler (varsayılan: hepsi)")
+    parser.add_argument("--folds", type=int, default=5, help="Kat sayısı")
+    parser.add_argument("--jobs", type=int, default=-1, help="Paralel iş sayısı (varsayılan: tüm çekirdekler)")
+    parser.add_argument("--output", help="Özet ve kat sonuçlarının yazılacağı JSON dosyası")
+    args = parser.parse_args()
+
+    fold_results, classes = run_benchmark(args.variants, args.folds, args.jobs)
+    if fold_results is not None:
+        benchmark_summary = summarize(fold_results, classes)
+        print_summary(benchmark_summary, classes)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"summary": benchmark_summary, "folds": fold_results}, f, ensure_ascii=False, indent=2)
+            print(f"Sonuçlar '{args.output}' dosyasına yazıldı.")
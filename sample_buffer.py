@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+
+# --- Önceden Ayrılmış Örnek Halka Tamponu ---
+# Canlı akış örnekleri, akış başında bir kez ayrılan float32 bir NumPy dizisinde tutulur; örnek ekleme bellek
+# ayırmaz ve Python listesine kopyalama gerektirmez.
+# Tampon "aynalı" tutulur: kapasite C ise dizi 2C uzunluğundadır ve her örnek hem i hem i + C konumuna yazılır.
+# Böylece son N örnek, halka başa sarmış olsa bile her zaman tek parça (contiguous) bir dilimdir ve view()
+# kopya üretmeden döndürülebilir (çizim ve özellik hesabı doğrudan bu görünümü kullanır).
+# Kapasite dolduktan sonra gelen her örnek en eskisinin üzerine yazılır ve overflow_count ile sayılır;
+# böylece kırpılmış bir kayıt sessizce değil, açıkça fark edilir.
+
+SAMPLE_DTYPE = np.float32
+
+
+def capacity_for(sample_rate_hz, max_duration_sec):
+    """Örnekleme hızı ve en uzun kayıt süresi için gereken tampon kapasitesi (örnek sayısı)."""
+    return max(int(math.ceil(sample_rate_hz * max_duration_sec)), 1)
+
+
+class SampleRingBuffer:
+    """Sabit kapasiteli, kopyasız tek parça görünüm veren float32 örnek tamponu."""
+
+    def __init__(self, capacity, dtype=SAMPLE_DTYPE):
+        if capacity <= 0:
+            raise ValueError("Tampon kapasitesi pozitif olmalıdır.")
+        self.capacity = int(capacity)
+        self._data = np.zeros(2 * self.capacity, dtype=dtype) # Aynalı depolama (bkz. modül açıklaması)
+        self._end = 0                # Bir sonraki örneğin yazılacağı konum, [0, capacity)
+        self._size = 0               # Tampondaki örnek sayısı
+        self.total_samples = 0       # Son temizlemeden beri eklenen tüm örnekler
+        self.overflow_count = 0      # Kapasite aşıldığı için üzerine yazılan (atılan) örnekler
+
+    @classmethod
+    def for_duration(cls, sample_rate_hz, max_duration_sec, dtype=SAMPLE_DTYPE):
+        """Örnekleme hızı x en uzun kayıt süresi kadar örnek tutan bir tampon oluşturur."""
+        return cls(capacity_for(sample_rate_hz, max_duration_sec), dtype)
+
+    def __len__(self):
+        return self._size
+
+    def append(self, value):
+        """Tek bir örnek ekler."""
+        self._data[self._end] = value
+        self._data[self._end + self.capacity] = value
+        self._end = (self._end + 1) % self.capacity
+        self.total_samples += 1
+        if self._size == self.capacity:
+            self.overflow_count += 1
+        else:
+            self._size += 1
+
+    def extend(self, values):
+        """Birden fazla örneği tek seferde (vektörel) ekler."""
+        values = np.asarray(values, dtype=self._data.dtype).reshape(-1)
+        count = len(values)
+        if count == 0:
+            return
+        self.total_samples += count
+        self.overflow_count += max(self._size + count - self.capacity, 0)
+        skipped = max(count - self.capacity, 0) # Yalnızca son 'capacity' örnek tamponda kalabilir
+        positions = (self._end + skipped + np.arange(count - skipped)) % self.capacity
+        values = values[skipped:]
+        self._data[positions] = values
+        self._data[positions + self.capacity] = values
+        self._end = (self._end + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+    def view(self):
+        """
+        Tampondaki örnekleri eskiden yeniye, kopyasız ve salt okunur tek parça bir dizi olarak döndürür.
+        Görünüm tamponun belleğini paylaşır; sonraki eklemelerden sonra yeniden alınmalıdır.
+        """
+        start = (self._end - self._size) % self.capacity
+        samples = self._data[start:start + self._size]
+        samples.flags.writeable = False
+        return samples
+
+    def last(self):
+        """En son eklenen örnek; tampon boşsa None."""
+        return float(self._data[(self._end - 1) % self.capacity]) if self._size else None
+
+    def tolist(self):
+        """Örneklerin Python listesi kopyası (paket/JSON gibi kalıcı çıktılar için)."""
+        return self.view().tolist()
+
+    def clear(self):
+        """Tamponu boşaltır ve sayaçları sıfırlar (bellek yeniden ayrılmaz)."""
+        self._end = 0
+        self._size = 0
+        self.total_samples = 0
+        self.overflow_count = 0
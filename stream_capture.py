@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import time
+import struct
+import hashlib
+import argparse
+
+import numpy as np
+
+# --- Canlı Akış Kayıt (Capture) Dosyası ---
+# Her canlı oturum, alıcıya ulaşan ham örneklerle birlikte yalnızca sona ekleme (append-only) yapılan
+# küçük bir ikili dosyaya yazılır; akış bittikten sonra da eğri, paket kayıpları ve zamanlama aynen yeniden
+# oynatılabilir (bkz. BluetoothUroflowSimulator.start_replay).
+# Dosya düzeni (küçük endian):
+#   başlık : MAGIC (5 bayt) | sürüm (uint8) | meta veri uzunluğu (uint32)
+#   meta   : UTF-8 JSON (cihaz ayarları, hasta bilgileri, başlama zamanı)
+#   örnekler: CAPTURE_RECORD_DTYPE kayıtları, 12 bayt/örnek:
+#             index (uint32, cihaz sıra no) | arrival (float32, alıcıya varış; oturum başından s) | flow (float32, ml/s)
+# Her paket geldikçe dosya sonuna eklenip diske aktarılır; yarıda kesilen bir oturumda dosyanın sonundaki eksik
+# kayıt okunurken atlanır, önceki örnekler kullanılabilir kalır.
+
+MAGIC = b"UFCAP"
+FORMAT_VERSION = 1
+HEADER_FORMAT = "<5sBI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+CAPTURE_RECORD_DTYPE = np.dtype([("index", "<u4"), ("arrival", "<f4"), ("flow", "<f4")])
+CAPTURE_EXTENSION = ".ufcap"
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "captures")
+
+# Meta veriye yazılan hasta alanları (varsa)
+CAPTURE_PATIENT_FIELDS = ("PatientID", "PatientInfo", "Qmax", "Qave", "Volume", "FlowTime", "ClinicalNotes", "Diagnosis")
+
+
+def _json_default(value):
+    """NumPy sayılarını JSON'a yazılabilir hale getirir."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"JSON'a yazılamayan değer: {type(value).__name__}")
+
+
+def session_metadata(simulator, device_name=None):
+    """Simülatörün etkin akışı için kayıt meta verisini (cihaz ayarları + hasta bilgileri) üretir."""
+    patient = simulator.current_patient_data or {}
+    return {
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "device": {
+            "name": device_name or simulator.connected_device_name,
+            "sample_rate_hz": simulator.sample_rate_hz,
+            "jitter_ms": simulator.jitter_ms,
+            "drop_probability": simulator.drop_probability,
+            "clock_drift_ppm": simulator.clock_drift_ppm,
+        },
+        "patient": {field: patient.get(field) for field in CAPTURE_PATIENT_FIELDS if field in patient},
+        "flow_time_sec": simulator.flow_time_sec,
+        "expected_samples": simulator.expected_sample_count,
+        "replay_of": simulator.replay_source,
+    }
+
+
+def capture_path(patient_id, device_name=None, capture_dir=CAPTURE_DIR):
+    """Yeni bir oturum kaydı için dosya yolu üretir: <tarih-saat>_<cihaz>_<hasta>.ufcap"""
+    parts = [time.strftime("%Y%m%d-%H%M%S")] + [str(part) for part in (device_name, patient_id) if part]
+    name = re.sub(r"[^A-Za-z0-9_.-]+", "-", "_".join(parts))
+    return os.path.join(capture_dir, name + CAPTURE_EXTENSION)
+
+
+class CaptureWriter:
+    """Bir canlı oturumun örneklerini kayıt dosyasının sonuna ekleyen yazıcı."""
+
+    def __init__(self, path, metadata):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        base, extension = os.path.splitext(path)
+        suffix = 1
+        while os.path.exists(path): # Aynı saniyede açılan oturumlar birbirinin üzerine yazmaz
+            path = f"{base}-{suffix}{extension}"
+            suffix += 1
+        self.path = path
+        self._file = open(path, "xb")
+        encoded = json.dumps(metadata, ensure_ascii=False, default=_json_default).encode("utf-8")
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, FORMAT_VERSION, len(encoded)))
+        self._file.write(encoded)
+        self._file.flush()
+        self.origin = time.perf_counter() # Varış zamanları bu andan itibaren ölçülür
+        self.num_samples = 0
+
+    def write_packet(self, packet, received_at=None):
+        """Paketteki örnekleri (sıra no, varış zamanı, akış hızı) dosyanın sonuna ekler; yazılan örnek sayısını döndürür."""
+        indices = packet.get("SampleIndices") or ()
+        if self._file is None or not len(indices):
+            return 0
+        records = np.empty(len(indices), dtype=CAPTURE_RECORD_DTYPE)
+        records["index"] = indices
+        records["arrival"] = (received_at or time.perf_counter()) - self.origin
+        records["flow"] = packet["NewSamples"]
+        self._file.write(records.tobytes())
+        self._file.flush()
+        self.num_samples += len(records)
+        return len(records)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_capture(path):
+    """
+    Kayıt dosyasını okur. ({'metadata': ..., 'records': CAPTURE_RECORD_DTYPE dizisi}, hata) döndürür.
+    Dosya sonundaki yarım kayıt (kesintiye uğramış oturum) atlanır.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                return None, "Kayıt dosyası çok kısa."
+            magic, version, metadata_length = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC:
+                return None, "Bu bir akış kayıt dosyası değil."
+            if version != FORMAT_VERSION:
+                return None, f"Desteklenmeyen kayıt sürümü: {version}"
+            metadata = json.loads(f.read(metadata_length).decode("utf-8"))
+            data = f.read()
+    except (OSError, ValueError) as e:
+        return None, f"Kayıt dosyası okunamadı ({e})."
+    usable = len(data) - len(data) % CAPTURE_RECORD_DTYPE.itemsize
+    return {"metadata": metadata, "records": np.frombuffer(data[:usable], dtype=CAPTURE_RECORD_DTYPE)}, None
+
+
+def replay_capture(path, realtime=False):
+    """
+    Kaydı simülatör (get_latest_data_packet) ve alıcı (stream_ingest) üzerinden uçtan uca oynatır.
+    Özet sözlüğü döndürür (hatada None, hata). curve_digest, yeniden kurulan eğrinin özetidir; aynı kayıt
+    her oynatmada aynı özeti vermelidir (regresyon testi).
+    """
+    import bluetooth_simulator
+    import stream_ingest
+
+    simulator = bluetooth_simulator.BluetoothUroflowSimulator(send_full_curve=False)
+    success, message = simulator.start_replay(path, realtime=realtime)
+    if not success:
+        return None, message
+    ingestor = stream_ingest.SampleIngestor(simulator.sample_rate_hz, simulator.live_flow_points.capacity)
+
+    start = time.perf_counter()
+    num_packets = 0
+    last_packet = None
+    while True:
+        packet, _ = simulator.get_latest_data_packet()
+        if packet is None:
+            break
+        if ingestor.ingest(packet):
+            num_packets += 1
+            last_packet = packet
+        elif realtime:
+            time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+
+    curve = ingestor.samples.view()
+    return {
+        "packets": num_packets,
+        "received_samples": ingestor.received_count,
+        "interpolated_samples": ingestor.interpolated_count,
+        "elapsed_s": elapsed,
+        "samples_per_s": ingestor.received_count / max(elapsed, 1e-9),
+        "qmax": last_packet["CurrentQmax"] if last_packet else None,
+        "volume": last_packet["CurrentVolume"] if last_packet else None,
+        "flow_time": last_packet["CurrentFlowTime"] if last_packet else None,
+        "curve_digest": hashlib.blake2b(curve.tobytes(), digest_size=8).hexdigest(),
+    }, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Canlı akış kayıtlarını inceler ve yeniden oynatır.")
+    parser.add_argument("capture", help="Kayıt dosyası (.ufcap)")
+    parser.add_argument("--info", action="store_true", help="Yalnızca meta veriyi ve örnek sayısını göster")
+    parser.add_argument("--realtime", action="store_true", help="Kayıttaki zamanlamayla (1x) oynat (varsayılan: en yüksek hız)")
+    args = parser.parse_args()
+
+    if args.info:
+        loaded, error = load_capture(args.capture)
+        if error:
+            print(f"Hata: {error}")
+        else:
+            print(json.dumps(loaded["metadata"], ensure_ascii=False, indent=2))
+            print(f"{len(loaded['records'])} örnek")
+    else:
+        summary, error = replay_capture(args.capture, realtime=args.realtime)
+        if error:
+            print(f"Hata: {error}")
+        else:
+            print(f"{summary['packets']} paket, {summary['received_samples']} örnek "
+                  f"(+{summary['interpolated_samples']} interpolasyon), {summary['elapsed_s']:.3f} sn "
+                  f"({summary['samples_per_s']:.0f} örnek/sn)")
+            print(f"Qmax {summary['qmax']} ml/s, hacim {summary['volume']} ml, süre {summary['flow_time']} s, "
+                  f"eğri özeti {summary['curve_digest']}")
@@ -0,0 +1,71 @@
+import numpy as np
+
+import sample_buffer
+
+# --- Alıcı Tarafı Örnek Toplama ---
+# Cihazdan gelen toplu paketler (bkz. bluetooth_simulator.get_latest_data_packet) sıra numaralarına göre
+# eşit aralıklı bir örnek dizisine yerleştirilir. Örneklerin yeri varış saatine değil cihazın sıra numarasına
+# (SampleIndices) göre belirlendiği için iletim gecikmesi ve saat kayması eğriyi bozmaz.
+# Kaybolan paketlerin bıraktığı boşluklar, komşu örnekler arasında doğrusal interpolasyonla doldurulur;
+# geç gelen veya tekrarlanan örnekler yok sayılır. Arayüz yenileme hızı cihaz hızından bağımsızdır: her karede
+# o ana kadar biriken tüm paketler tek seferde işlenir.
+# Tam eğri gönderen cihazlarda (send_full_curve=True; pakette NewSamples yerine LiveFlowCurve) eğri, cihazın akış
+# başından beri biriktirdiği örneklerdir (kayıplar cihaz tarafında olmadığı için dahil); eğrinin henüz alınmamış
+# kısmı ardışık örnekler olarak eklenir.
+
+
+class SampleIngestor:
+    """Toplu cihaz paketlerini boşlukları doldurarak eşit aralıklı bir örnek tamponunda biriktirir."""
+
+    def __init__(self, sample_rate_hz, capacity):
+        self.sample_rate_hz = sample_rate_hz
+        self.sample_interval = 1.0 / sample_rate_hz
+        self.samples = sample_buffer.SampleRingBuffer(capacity)
+        self.reset()
+
+    def reset(self):
+        """Yeni akış için tamponu ve sayaçları sıfırlar."""
+        self.samples.clear()
+        self.next_index = 0            # Beklenen bir sonraki sıra numarası
+        self._last_value = None        # Son alınan örnek (interpolasyonun sol ucu)
+        self.received_count = 0        # Cihazdan alınan örnekler
+        self.interpolated_count = 0    # Boşluk doldurmak için üretilen örnekler
+        self.ignored_count = 0         # Geç gelen / tekrarlanan örnekler
+
+    @property
+    def elapsed_time(self):
+        """Tampondaki son örneğin cihaz saatine göre zamanı (s)."""
+        return max(self.next_index - 1, 0) * self.sample_interval
+
+    def ingest(self, packet):
+        """Paketteki yeni örnekleri ekler; tampona eklenen (alınan + interpolasyonlu) örnek sayısını döndürür."""
+        values = packet.get("NewSamples")
+        indices = packet.get("SampleIndices")
+        if values is None: # Tam eğri paketi: eğrideki konum cihaz sıra numarasıdır
+            values = packet.get("LiveFlowCurve", ())[self.next_index:]
+            indices = None
+        values = np.asarray(values, dtype=float)
+        if indices is None: # Sıra numarası taşımayan paket: örnekler ardışık kabul edilir
+            indices = np.arange(self.next_index, self.next_index + len(values))
+        indices = np.asarray(indices, dtype=np.int64)
+
+        fresh = indices >= self.next_index
+        self.ignored_count += int(len(indices) - fresh.sum())
+        values, indices = values[fresh], indices[fresh]
+        if len(indices) == 0:
+            return 0
+
+        if self._last_value is None: # Akış başındaki kayıp örnekler ilk alınan değerle doldurulur
+            known_indices, known_values = indices, values
+        else:
+            known_indices = np.concatenate([[self.next_index - 1], indices])
+            known_values = np.concatenate([[self._last_value], values])
+        full_indices = np.arange(self.next_index, indices[-1] + 1)
+        filled = np.interp(full_indices, known_indices, known_values)
+
+        self.samples.extend(filled)
+        self.received_count += len(indices)
+        self.interpolated_count += len(full_indices) - len(indices)
+        self.next_index = int(indices[-1]) + 1
+        self._last_value = float(values[-1])
+        return len(full_indices)
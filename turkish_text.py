@@ -0,0 +1,103 @@
+import re
+import hashlib
+
+# --- Türkçe Metin Normalleştirici ---
+# Klinik notlar Türkçedir; bu modül NLTK'nın İngilizce durma kelimeleri ve WordNet lemmatizer'ı yerine
+# kullanılan, harici veri seti gerektirmeyen (indirme/dosya okuma yok) hafif bir normalleştiricidir:
+#   1. Türkçe küçük harfe çevirme: 'I' -> 'ı', 'İ' -> 'i' (str.lower() 'I'yı 'i' yapar, 'İ'yi 'i̇' yapar)
+#   2. ASCII katlama: ı->i, ş->s, ç->c, ğ->g, ö->o, ü->u (klavyeden Türkçe karaktersiz girilen notlar da eşleşir)
+#   3. Noktalama kaldırma ve tokenizasyon
+#   4. Yerleşik durma kelimesi listesiyle filtreleme
+#   5. Basit ek atma (suffix stripping): çoğul, hal, iyelik, fiilimsi ekleri, kök en az MIN_STEM_LENGTH harf kalacak şekilde
+# Ek atma gerçek bir morfolojik çözümleme değildir; amaç aynı kelimenin çekimli biçimlerini
+# ("zorlanma", "zorlanıyor") tek bir köke toplamaktır.
+# Yokluk eki (-sız/-siz/-suz/-süz) atılmaz, köke NEGATION_MARKER olarak eklenir: "ağrısız" -> "agr_yok",
+# "ağrılı" -> "agr". Böylece klinik olarak zıt bulgular ("kesintisiz" / "kesintili") aynı köke inmez.
+
+MIN_STEM_LENGTH = 3
+MAX_SUFFIX_PASSES = 3
+NEGATION_MARKER = "_yok" # TF-IDF'in varsayılan token deseni (\w) alt çizgiyi kelimenin parçası sayar
+
+_LOWER_MAP = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII_FOLD_MAP = str.maketrans({"ı": "i", "ş": "s", "ç": "c", "ğ": "g", "ö": "o", "ü": "u",
+                                 "â": "a", "î": "i", "û": "u"})
+
+# Harf/rakam ve boşluk dışındaki her karakter silinir; tokenlar boşlukla ayrılır
+_PUNCTUATION_PATTERN = re.compile(r"[^\w\s]|_")
+_TOKEN_PATTERN = re.compile(r"\S+")
+
+# Durma kelimeleri ASCII katlanmış biçimde tutulur.
+# Olumsuzluk bildiren kelimeler ("yok", "degil", "hic") klinik anlam taşıdığı için listede yoktur.
+TURKISH_STOPWORDS = frozenset("""
+    acaba ama ancak artik aslinda az bana bazi belki ben beni benim bile bir biraz birkac birsey biz bize
+    bizi bizim bu buna bunda bundan bunu bunun burada cok cunku da daha de defa diye dolayi en gibi hem
+    hep hepsi her hangi icin ile ise iste kadar kendi ki kim kimse mi mu nasil ne neden nerede nicin o ona
+    onda ondan onlar onu onun orada oyle sanki sen seni senin siz size sizi sizin sonra su sunu sunun tum
+    ve veya ya yani yine zaten olarak olan
+""".split())
+
+# Ekler uzundan kısaya denenir; ASCII katlanmış biçimdedir (-lık/-lik/-luk/-lük -> lik/luk)
+TURKISH_SUFFIXES = tuple(sorted(set("""
+    lerinden larindan lerinde larinda lerini larini leri lari ler lar
+    iyorum uyorum iyor uyor
+    sinda sinde sindan sinden inda inde indan inden nda nde dan den tan ten da de ta te
+    lik luk siz suz li lu
+    mak mek ma me
+    si su i u
+""".split()), key=len, reverse=True))
+PRIVATIVE_SUFFIXES = frozenset(("siz", "suz")) # Yokluk eki: atılır ama köke NEGATION_MARKER eklenir
+
+
+def config_digest():
+    """
+    Normalleştirici ayarlarının (harf eşlemeleri, durma kelimeleri, ekler, kök uzunluğu) kısa özeti.
+    İşlenmiş notları saklayan önbellekler bu özeti kendi şema etiketine katar; ayarlar değişince eski notlar kullanılmaz.
+    """
+    config = (sorted(_LOWER_MAP.items()), sorted(_ASCII_FOLD_MAP.items()), _PUNCTUATION_PATTERN.pattern,
+              sorted(TURKISH_STOPWORDS), TURKISH_SUFFIXES, sorted(PRIVATIVE_SUFFIXES), NEGATION_MARKER,
+              MIN_STEM_LENGTH, MAX_SUFFIX_PASSES)
+    return hashlib.blake2b(repr(config).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def turkish_lower(text):
+    """Türkçe kurallarıyla küçük harfe çevirir (I -> ı, İ -> i)."""
+    return text.translate(_LOWER_MAP).lower()
+
+
+def fold_ascii(text):
+    """Türkçe karakterleri ASCII karşılıklarına katlar (ı -> i, ş -> s, ...)."""
+    return text.translate(_ASCII_FOLD_MAP)
+
+
+def strip_suffixes(token):
+    """
+    Kelimenin sonundaki bilinen ekleri, kök en az MIN_STEM_LENGTH harf kalacak şekilde tekrar tekrar atar.
+    Yokluk eki atıldıysa köke NEGATION_MARKER eklenir ("istemsiz" -> "istem_yok").
+    """
+    negated = False
+    for _ in range(MAX_SUFFIX_PASSES):
+        for suffix in TURKISH_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= MIN_STEM_LENGTH:
+                token = token[:-len(suffix)]
+                negated = negated or suffix in PRIVATIVE_SUFFIXES
+                break
+        else:
+            break
+    return token + NEGATION_MARKER if negated else token
+
+
+def normalize_token(token):
+    """Katlanmış tek bir kelimenin kökünü döndürür; durma kelimesiyse None döndürür."""
+    if token in TURKISH_STOPWORDS:
+        return None
+    return strip_suffixes(token)
+
+
+def tokenize(text):
+    """Metni Türkçe küçük harfe çevirir, ASCII'ye katlar, noktalamayı kaldırır ve kelimelere ayırır."""
+    return _TOKEN_PATTERN.findall(_PUNCTUATION_PATTERN.sub("", fold_ascii(turkish_lower(text))))
+
+
+def normalize_text(text):
+    """Metnin normalleştirilmiş köklerini boşlukla birleştirilmiş tek bir metin olarak döndürür."""
+    return " ".join(stem for stem in map(normalize_token, tokenize(text)) if stem is not None)